@@ -0,0 +1,289 @@
+"""Stand-ins for the discord.py objects the cogs touch.
+
+They carry just enough state for the listeners and command callbacks to
+run without a gateway connection. Anything sent is recorded, not delivered.
+"""
+import itertools
+import discord
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any
+
+_ids = itertools.count(100000000000000000)
+
+def next_id() -> int:
+    return next(_ids)
+
+class FakeHTTPResponse:
+    def __init__(self, status: int):
+        self.status = status
+        self.reason = "Not Found" if status == 404 else "Error"
+
+class FakeAsset:
+    def __init__(self, url: str):
+        self.url = url
+
+class FakeRole:
+    def __init__(self, position: int = 0):
+        self.position = position
+    
+    def __lt__(self, other: "FakeRole") -> bool:
+        return self.position < other.position
+    
+    def __ge__(self, other: "FakeRole") -> bool:
+        return self.position >= other.position
+
+class FakeMember:
+    def __init__(
+        self,
+        guild: "FakeGuild",
+        name: str,
+        bot: bool = False,
+        account_age: timedelta = timedelta(days=400),
+        role_position: int = 1
+    ):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f"<@{self.id}>"
+        self.display_avatar = FakeAsset(f"https://cdn.discordapp.com/embed/avatars/{self.id % 5}.png")
+        self.created_at = datetime.now(timezone.utc) - account_age
+        self.joined_at = datetime.now(timezone.utc)
+        self.top_role = FakeRole(role_position)
+        self.sent: List[Dict[str, Any]] = []
+    
+    def __str__(self) -> str:
+        return self.name
+    
+    async def send(self, content: Optional[str] = None, **kwargs):
+        self.sent.append({'content': content, **kwargs})
+
+class FakeChannel:
+    def __init__(self, guild: "FakeGuild", name: str):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.mention = f"<#{self.id}>"
+        self.sent: List[Dict[str, Any]] = []
+        self.messages: List["FakeMessage"] = []
+    
+    async def send(self, content: Optional[str] = None, **kwargs) -> "FakeMessage":
+        self.sent.append({'content': content, **kwargs})
+        return FakeMessage(self, self.guild.me, content or "")
+    
+    def add_message(self, author: "FakeMember", content: str) -> "FakeMessage":
+        message = FakeMessage(self, author, content)
+        self.messages.append(message)
+        return message
+    
+    async def history(self, limit: Optional[int] = None, oldest_first: bool = False, **kwargs):
+        messages = self.messages if oldest_first else self.messages[::-1]
+        for message in messages[:limit]:
+            yield message
+    
+    async def delete_messages(self, messages: List["FakeMessage"]):
+        deleted = {message.id for message in messages}
+        self.messages = [message for message in self.messages if message.id not in deleted]
+
+class FakeMessage:
+    def __init__(self, channel: FakeChannel, author: FakeMember, content: str, mentions: int = 0):
+        self.id = next_id()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.attachments = []
+        self.raw_mentions = [next_id() for _ in range(mentions)]
+        self.raw_role_mentions = []
+        self.mention_everyone = False
+        self.webhook_id = None
+        self.pinned = False
+        self.created_at = datetime.now(timezone.utc)
+        self.jump_url = f"https://discord.com/channels/{self.guild.id}/{channel.id}/{self.id}"
+    
+    async def delete(self):
+        pass
+    
+    async def edit(self, **kwargs):
+        pass
+
+class FakeRawMessageDelete:
+    def __init__(self, message: FakeMessage):
+        self.message_id = message.id
+        self.channel_id = message.channel.id
+        self.guild_id = message.guild.id
+        self.cached_message = None
+
+class FakeRawMessageUpdate:
+    def __init__(self, message: FakeMessage, content: str):
+        self.message_id = message.id
+        self.channel_id = message.channel.id
+        self.guild_id = message.guild.id
+        self.cached_message = None
+        self.data = {
+            'id': str(message.id),
+            'channel_id': str(message.channel.id),
+            'guild_id': str(message.guild.id),
+            'content': content,
+            'author': {'id': str(message.author.id), 'bot': message.author.bot},
+            'edited_timestamp': datetime.now(timezone.utc).isoformat()
+        }
+
+class FakeGuild:
+    def __init__(self, name: str = "Benchmark Guild"):
+        self.id = next_id()
+        self.name = name
+        self.me = FakeMember(self, "HappyBot", bot=True, role_position=100)
+        self.owner_id = next_id()
+        self.channels: Dict[int, FakeChannel] = {}
+        self.chunked = True
+        self.fetched: List[int] = []
+        self.banned: List[int] = []
+        self.kicked: List[int] = []
+        self._members: Dict[int, FakeMember] = {}
+        # Members the API knows about but the cache doesn't, as when
+        # chunking is off
+        self._uncached: Dict[int, FakeMember] = {}
+    
+    @property
+    def members(self) -> List[FakeMember]:
+        return list(self._members.values())
+    
+    @property
+    def member_count(self) -> int:
+        return len(self._members) + len(self._uncached)
+    
+    def add_member(self, name: str, cached: bool = True, **kwargs) -> FakeMember:
+        member = FakeMember(self, name, **kwargs)
+        if cached:
+            self._members[member.id] = member
+        else:
+            self._uncached[member.id] = member
+            self.chunked = False
+        return member
+    
+    def add_channel(self, name: str) -> FakeChannel:
+        channel = FakeChannel(self, name)
+        self.channels[channel.id] = channel
+        return channel
+    
+    def get_member(self, user_id: int) -> Optional[FakeMember]:
+        return self._members.get(user_id)
+    
+    async def chunk(self):
+        self._members.update(self._uncached)
+        self._uncached.clear()
+        self.chunked = True
+    
+    async def fetch_member(self, user_id: int) -> FakeMember:
+        self.fetched.append(user_id)
+        member = self._members.get(user_id) or self._uncached.get(user_id)
+        if member is None:
+            raise discord.NotFound(FakeHTTPResponse(404), "Unknown Member")
+        return member
+    
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channels.get(channel_id)
+    
+    async def ban(self, user, **kwargs):
+        self.banned.append(user.id)
+    
+    async def kick(self, user, **kwargs):
+        self.kicked.append(user.id)
+    
+    async def invites(self) -> list:
+        return []
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+        self._done = False
+    
+    def is_done(self) -> bool:
+        return self._done
+    
+    async def send_message(self, content: Optional[str] = None, **kwargs):
+        self._done = True
+        self.interaction.sent.append({'content': content, **kwargs})
+    
+    async def defer(self, **kwargs):
+        self._done = True
+    
+    async def edit_message(self, **kwargs):
+        self.interaction.sent.append(kwargs)
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+    
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        self.interaction.sent.append({'content': content, **kwargs})
+        return FakeMessage(self.interaction.channel, self.interaction.guild.me, content or "")
+
+class FakeInteraction:
+    def __init__(self, guild: FakeGuild, user: FakeMember, channel: FakeChannel):
+        self.guild = guild
+        self.user = user
+        self.channel = channel
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.sent: List[Dict[str, Any]] = []
+    
+    async def original_response(self) -> FakeMessage:
+        return FakeMessage(self.channel, self.guild.me, "")
+    
+    async def edit_original_response(self, **kwargs):
+        self.sent.append(kwargs)
+
+def _member_payload(user_id: int, name: str, bot: bool = False) -> Dict[str, Any]:
+    return {
+        'user': {'id': str(user_id), 'username': name, 'global_name': name, 'discriminator': '0', 'avatar': None, 'bot': bot},
+        'roles': [],
+        'joined_at': '2024-01-01T00:00:00+00:00',
+        'deaf': False,
+        'mute': False,
+        'flags': 0
+    }
+
+def guild_create_payload(guild_id: int, bot_id: int, members: int, channels: int = 20, full: bool = True) -> Dict[str, Any]:
+    """A GUILD_CREATE event body for discord.py's state parser.
+    
+    With full=True it carries every member and presences for a quarter of
+    them, as with all intents and startup chunking; otherwise only the bot's
+    own member, as Discord sends without the presence intent.
+    """
+    member_ids = [next_id() for _ in range(members)]
+    member_data = [_member_payload(bot_id, "HappyBot", bot=True)]
+    presences = []
+    if full:
+        member_data += [_member_payload(user_id, f"user{user_id}") for user_id in member_ids]
+        presences = [
+            {'user': {'id': str(user_id)}, 'status': 'online', 'activities': [], 'client_status': {'desktop': 'online'}}
+            for user_id in member_ids[:members // 4]
+        ]
+    
+    return {
+        'id': str(guild_id),
+        'name': f"Guild {guild_id}",
+        'owner_id': str(member_ids[0] if member_ids else bot_id),
+        'member_count': members + 1,
+        'large': members > 250,
+        'roles': [{
+            'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0,
+            'color': 0, 'hoist': False, 'managed': False, 'mentionable': False
+        }],
+        'channels': [
+            {'id': str(next_id()), 'type': 0, 'name': f"channel{i}", 'position': i, 'permission_overwrites': []}
+            for i in range(channels)
+        ],
+        'members': member_data,
+        'presences': presences,
+        'voice_states': [],
+        'threads': [],
+        'emojis': [],
+        'stickers': [],
+        'features': [],
+        'stage_instances': [],
+        'guild_scheduled_events': []
+    }
@@ -0,0 +1,566 @@
+"""Replay scripted event streams against HappyBot without connecting to Discord.
+
+    python benchmarks/replay.py
+    python benchmarks/replay.py --scenario join_storm warn_burst --scale 0.5
+    python benchmarks/replay.py --output after.json --compare before.json
+
+The bot is built with its configured cogs on a temporary SQLite database.
+Listeners are awaited through the bot's own (instrumented) registrations and
+commands through their callbacks, using the fakes in benchmarks/fakes.py.
+Each scenario reports throughput, p50/p99 latency per handler, time spent
+in Database calls and peak traced memory. Results are written as JSON so
+runs from two commits can be compared with --compare.
+
+Benchmarks such as intents_profiles, cold_start and templates report plain metrics
+instead; cold_start launches the bot in fresh interpreters and times
+setup_hook (imports, DB connect and migrate, cache warm, cog loads).
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Tuple, Callable, Awaitable, Union
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+
+# Configure before config.py is imported; load_dotenv never overrides these
+_TMP_DIR = tempfile.mkdtemp(prefix="happy-replay-")
+os.environ["DATABASE_PATH"] = os.path.join(_TMP_DIR, "replay.db")
+os.environ["METRICS_PORT"] = "0"
+os.environ["MAINTENANCE_INTERVAL"] = "86400"
+
+import discord
+from main import HappyBot
+from benchmarks.fakes import (
+    FakeGuild,
+    FakeMessage,
+    FakeInteraction,
+    FakeRawMessageDelete,
+    FakeRawMessageUpdate,
+    guild_create_payload,
+    next_id
+)
+from config import ENABLED_COGS
+from utils.intents import build_intents, build_member_cache_flags
+from utils.templates import PLACEHOLDERS, compile_template
+
+Step = Tuple[str, Callable, tuple]
+# Runs alongside a scenario's steps until the event is set, then reports
+Background = Callable[[asyncio.Event], Awaitable[Dict[str, Any]]]
+
+def listener(bot: HappyBot, event: str) -> Callable:
+    handlers = list(bot.extra_events.get(event, []))
+    
+    async def dispatch(*args):
+        for handler in handlers:
+            await handler(*args)
+    return dispatch
+
+def command(bot: HappyBot, name: str) -> Callable:
+    cmd = bot.tree.get_command(name)
+    return functools.partial(cmd.callback, cmd.binding)
+
+async def join_storm(bot: HappyBot, guild: FakeGuild, size: int, raid: bool = False) -> List[Step]:
+    channel = guild.add_channel("welcome")
+    await bot.db.update_guild_settings(guild.id, {
+        'welcome_enabled': 1,
+        'welcome_channel_id': channel.id,
+        'welcome_message': "Welcome {user} to {guild}! You are our {membercount.ordinal} member ({user.age} on Discord).",
+        'raid_join_threshold': 10 if raid else 0,
+        'raid_join_window': 10
+    })
+    on_join = listener(bot, "on_member_join")
+    return [("on_member_join", on_join, (guild.add_member(f"joiner{i}"),)) for i in range(size)]
+
+async def raid_join_storm(bot: HappyBot, guild: FakeGuild, size: int) -> List[Step]:
+    return await join_storm(bot, guild, size, raid=True)
+
+async def message_log_flood(bot: HappyBot, guild: FakeGuild, size: int) -> List[Step]:
+    log_channel = guild.add_channel("logs")
+    channels = [guild.add_channel(f"chat{i}") for i in range(5)]
+    members = [guild.add_member(f"chatter{i}") for i in range(200)]
+    await bot.db.update_guild_settings(guild.id, {'log_enabled': 1, 'log_channel_id': log_channel.id})
+    
+    on_message = listener(bot, "on_message")
+    on_edit = listener(bot, "on_raw_message_edit")
+    on_delete = listener(bot, "on_raw_message_delete")
+    messages = [
+        FakeMessage(channels[i % len(channels)], members[i % len(members)], f"message number {i}")
+        for i in range(size)
+    ]
+    steps = [("on_message", on_message, (message,)) for message in messages]
+    for i, message in enumerate(messages):
+        if i % 10 == 9:
+            # Sent before the bot started, so nothing has it cached
+            unseen = FakeMessage(message.channel, message.author, "")
+            steps.append(("on_raw_message_delete", on_delete, (FakeRawMessageDelete(unseen),)))
+        elif i % 2:
+            steps.append(("on_raw_message_edit", on_edit, (FakeRawMessageUpdate(message, message.content + " (edited)"),)))
+        else:
+            steps.append(("on_raw_message_delete", on_delete, (FakeRawMessageDelete(message),)))
+    return steps
+
+async def warn_burst(bot: HappyBot, guild: FakeGuild, size: int) -> List[Step]:
+    channel = guild.add_channel("mod")
+    moderator = guild.add_member("moderator")
+    members = [guild.add_member(f"offender{i}") for i in range(50)]
+    
+    warn = command(bot, "warn")
+    warnings = command(bot, "warnings")
+    steps = [
+        ("/warn", warn, (FakeInteraction(guild, moderator, channel), members[i % len(members)], f"reason {i}"))
+        for i in range(size)
+    ]
+    steps += [
+        ("/warnings", warnings, (FakeInteraction(guild, moderator, channel), members[i % len(members)]))
+        for i in range(max(1, size // 10))
+    ]
+    return steps
+
+async def analytics(bot: HappyBot, guild: FakeGuild, size: int) -> List[Step]:
+    channel = guild.add_channel("general")
+    admin = guild.add_member("admin")
+    event_types = ("member_join", "member_leave", "moderation_warn", "moderation_ban", "message_delete")
+    await bot.db.log_events([
+        (guild.id, event_types[i % len(event_types)], f"seed {i}")
+        for i in range(size * 40)
+    ])
+    
+    run = command(bot, "analytics")
+    windows = ("24h", "7d", "30d", "all")
+    return [
+        ("/analytics", run, (FakeInteraction(guild, admin, channel), windows[i % len(windows)]))
+        for i in range(size)
+    ]
+
+async def automod_flood(bot: HappyBot, guild: FakeGuild, size: int) -> List[Step]:
+    channels = [guild.add_channel(f"chat{i}") for i in range(5)]
+    # Enough members that ordinary chatter stays under the flood limit
+    members = [guild.add_member(f"chatter{i}") for i in range(5000)]
+    await bot.db.update_guild_settings(guild.id, {
+        'automod_enabled': 1,
+        'automod_words': ", ".join(f"banned{i}" for i in range(200)) + ", free nitro"
+    })
+    
+    on_message = listener(bot, "on_message")
+    steps = []
+    for i in range(size):
+        if i % 50 == 0:
+            # A spammer sending the same link in a burst
+            spammer = members[i % len(members)]
+            for _ in range(8):
+                steps.append(("on_message", on_message, (FakeMessage(channels[0], spammer, "free nitro at example.com"),)))
+        message = FakeMessage(channels[i % len(channels)], members[i % len(members)], f"just chatting about thing {i}")
+        steps.append(("on_message", on_message, (message,)))
+    return steps
+
+WRITE_INTERVAL = 0.05
+
+async def db_reads(bot: HappyBot, guild: FakeGuild, size: int, write_load: bool = False) -> Union[List[Step], Tuple[List[Step], Background]]:
+    members = [guild.add_member(f"member{i}") for i in range(50)]
+    event_types = ("member_join", "member_leave", "moderation_warn", "message_delete")
+    await bot.db.log_events([
+        (guild.id, event_types[i % len(event_types)], f"seed {i}")
+        for i in range(20000)
+    ])
+    for i in range(500):
+        await bot.db.add_warn(guild.id, members[i % len(members)].id, guild.me.id, f"seed {i}")
+    
+    reads = (
+        ("get_recent_event_counts", lambda i: bot.db.get_recent_event_counts(guild.id, 24)),
+        ("get_event_counts", lambda i: bot.db.get_event_counts(guild.id, 7)),
+        ("get_warns", lambda i: bot.db.get_warns(guild.id, members[i % len(members)].id)),
+    )
+    steps = [(reads[i % len(reads)][0], reads[i % len(reads)][1], (i,)) for i in range(size)]
+    if not write_load:
+        return steps
+    
+    # Another guild's writes, so the rows being read don't grow under the test
+    busy_guild_id = next_id()
+    
+    async def writer(stop: asyncio.Event) -> Dict[str, Any]:
+        # A full event batch and a settings save every WRITE_INTERVAL, about
+        # what a busy shard's flush loop produces
+        rows = transactions = 0
+        start = time.perf_counter()
+        while not stop.is_set():
+            await bot.db.log_events([(busy_guild_id, "message_delete", "load") for _ in range(500)])
+            await bot.db.update_guild_settings(busy_guild_id, {'log_enabled': transactions % 2})
+            rows += 500
+            transactions += 2
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=WRITE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        elapsed = time.perf_counter() - start
+        return {
+            'rows_written': rows,
+            'write_transactions': transactions,
+            'rows_per_s': round(rows / elapsed, 1) if elapsed else None
+        }
+    
+    return steps, writer
+
+async def db_reads_under_write(bot: HappyBot, guild: FakeGuild, size: int) -> Tuple[List[Step], Background]:
+    return await db_reads(bot, guild, size, write_load=True)
+
+# name -> (builder, events at scale 1.0). Builders return their steps, or
+# (steps, background) for load that runs while the steps are timed.
+SCENARIOS: Dict[str, Tuple[Callable, int]] = {
+    "join_storm": (join_storm, 2000),
+    "raid_join_storm": (raid_join_storm, 2000),
+    "message_log_flood": (message_log_flood, 5000),
+    "warn_burst": (warn_burst, 1000),
+    "analytics": (analytics, 500),
+    "automod_flood": (automod_flood, 20000),
+    "db_reads": (db_reads, 1500),
+    "db_reads_under_write": (db_reads_under_write, 1500)
+}
+
+def _profile_client(profile: str, bot_id: int) -> discord.Client:
+    intents = build_intents(ENABLED_COGS, profile)
+    client = discord.Client(
+        intents=intents,
+        member_cache_flags=build_member_cache_flags("all" if profile == "all" else "joined", intents)
+    )
+    client._connection.user = discord.ClientUser(state=client._connection, data={
+        'id': str(bot_id), 'username': "HappyBot", 'discriminator': '0', 'avatar': None, 'bot': True
+    })
+    return client
+
+async def intents_profiles(size: int) -> Dict[str, Any]:
+    """GUILD_CREATE ingest time and cache memory: every intent vs the derived profile.
+    
+    `size` synthetic guilds of 1000 members each go through discord.py's
+    own state parser, configured as HappyBot would be with
+    GATEWAY_INTENTS=all (and MEMBER_CACHE=all) or auto. Time and memory are
+    taken in separate passes since tracemalloc slows parsing down.
+    """
+    metrics = {}
+    bot_id = next_id()
+    for profile in ("all", "auto"):
+        payloads = [
+            guild_create_payload(next_id(), bot_id, 1000, full=profile == "all")
+            for _ in range(size)
+        ]
+        
+        client = _profile_client(profile, bot_id)
+        start = time.perf_counter()
+        for payload in payloads:
+            client._connection._add_guild_from_data(payload)
+        metrics[f"{profile}_ingest_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        metrics[f"{profile}_cached_members"] = sum(len(guild.members) for guild in client.guilds)
+        del client
+        
+        client = _profile_client(profile, bot_id)
+        tracemalloc.start()
+        for payload in payloads:
+            client._connection._add_guild_from_data(payload)
+        metrics[f"{profile}_cache_bytes"] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    return metrics
+
+# Runs in a fresh interpreter so imports are part of the measurement
+COLD_START_CHILD = """
+import asyncio, json, sys
+sys.path.insert(0, sys.argv[1])
+from main import HappyBot
+
+async def start():
+    bot = HappyBot()
+    await bot.setup_hook()
+    bot.startup.mark("setup_done")
+    report = bot.startup.report()
+    try:
+        await bot.close()
+    except AttributeError:
+        pass
+    return report
+
+print("STARTUP " + json.dumps(asyncio.run(start())))
+"""
+
+async def _cold_start_once(db_path: str) -> Dict[str, float]:
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", COLD_START_CHILD, BOT_DIR,
+        env={**os.environ, "DATABASE_PATH": db_path, "MAINTENANCE_INTERVAL": "86400"},
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT
+    )
+    output, _ = await process.communicate()
+    lines = output.decode().splitlines()
+    report = next((json.loads(line[8:]) for line in lines if line.startswith("STARTUP ")), None)
+    if report is None:
+        raise RuntimeError("Cold start failed:\n" + "\n".join(lines[-20:]))
+    
+    # Setup is done at the setup_done mark; the process also had to shut down
+    timings = {'process_ms': (time.perf_counter() - start) * 1000}
+    for phase in report['phases']:
+        if phase['phase'] == "setup_done":
+            timings['setup_ms'] = phase['start_ms']
+        elif not phase['phase'].startswith("extension."):
+            timings[f"{phase['phase']}_ms"] = phase['duration_ms']
+    return timings
+
+async def cold_start(size: int) -> Dict[str, Any]:
+    """Gateway-free cold start: imports, DB connect and migrate, cache warm, cog loads.
+    
+    The first start runs every migration on an empty database; the next
+    `size` starts open the migrated database with 5000 guild settings rows
+    to warm into the cache, and report medians.
+    """
+    db_path = os.path.join(_TMP_DIR, "cold-start", "happy.db")
+    first = await _cold_start_once(db_path)
+    
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO guild_settings (guild_id, welcome_enabled) VALUES (?, 1)",
+            [(next_id(),) for _ in range(5000)]
+        )
+    
+    runs = [await _cold_start_once(db_path) for _ in range(size)]
+    metrics = {f"empty_db_{key}": round(value, 2) for key, value in first.items()}
+    for key in runs[0]:
+        metrics[f"median_{key}"] = round(statistics.median(run[key] for run in runs if key in run), 2)
+    return metrics
+
+LEGACY_WELCOME = "Welcome {user} to {guild}! You are member #{membercount}."
+
+def _legacy_render(source: str, member) -> str:
+    # The replace chain the welcome cog used before templates were compiled
+    return source.replace(
+        '{user}', member.mention
+    ).replace(
+        '{guild}', member.guild.name
+    ).replace(
+        '{membercount}', str(member.guild.member_count)
+    )
+
+async def templates(size: int) -> Dict[str, Any]:
+    """Welcome text renders per second: the old replace chain vs compiled templates.
+    
+    Compiled renders include the cache lookup the welcome cog does per join.
+    """
+    guild = FakeGuild()
+    member = guild.add_member("newcomer")
+    full = " ".join(f"{{{name}}}" for name in PLACEHOLDERS)
+    
+    def rate(render: Callable[[], str]) -> float:
+        start = time.perf_counter()
+        for _ in range(size):
+            render()
+        return round(size / (time.perf_counter() - start))
+    
+    return {
+        'legacy_per_sec': rate(lambda: _legacy_render(LEGACY_WELCOME, member)),
+        'compiled_per_sec': rate(lambda: compile_template(LEGACY_WELCOME).render(member)),
+        'all_placeholders_per_sec': rate(lambda: compile_template(full).render(member))
+    }
+
+# name -> (benchmark, size at scale 1.0). These build their own clients or
+# processes instead of replaying through the shared bot, and report a flat
+# set of metrics.
+BENCHMARKS: Dict[str, Tuple[Callable[[int], Awaitable[Dict[str, Any]]], int]] = {
+    "intents_profiles": (intents_profiles, 100),
+    "cold_start": (cold_start, 5),
+    "templates": (templates, 200000)
+}
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def db_totals(bot: HappyBot) -> Dict[str, Tuple[int, float]]:
+    return {
+        dict(labels).get('method', ''): (histogram.count, histogram.total)
+        for labels, histogram in bot.metrics.histograms("happy_db_duration_seconds").items()
+    }
+
+async def run_scenario(bot: HappyBot, name: str, scale: float, trace_memory: bool) -> Dict[str, Any]:
+    builder, base_size = SCENARIOS[name]
+    guild = FakeGuild(name)
+    # Payload-only (raw) listeners resolve the guild through the bot
+    bot._connection._guilds[guild.id] = guild
+    steps = await builder(bot, guild, max(1, int(base_size * scale)))
+    background = None
+    if isinstance(steps, tuple):
+        steps, background = steps
+    await bot.db.events.flush()
+    
+    db_before = db_totals(bot)
+    cache_before = bot.message_cache.stats()
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    if trace_memory:
+        tracemalloc.start()
+    
+    stop = asyncio.Event()
+    background_task = asyncio.create_task(background(stop)) if background else None
+    
+    start = time.perf_counter()
+    for handler, func, args in steps:
+        step_start = time.perf_counter()
+        await func(*args)
+        latencies[handler].append(time.perf_counter() - step_start)
+    await bot.db.events.flush()
+    elapsed = time.perf_counter() - start
+    
+    background_report = None
+    if background_task is not None:
+        stop.set()
+        background_report = await background_task
+    
+    peak_memory = None
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    
+    cache_after = bot.message_cache.stats()
+    db_calls = {}
+    for method, (count, total) in db_totals(bot).items():
+        before_count, before_total = db_before.get(method, (0, 0.0))
+        if count > before_count:
+            db_calls[method] = {'calls': count - before_count, 'seconds': round(total - before_total, 6)}
+    
+    return {
+        'events': len(steps),
+        'seconds': round(elapsed, 4),
+        'throughput_per_s': round(len(steps) / elapsed, 1) if elapsed else None,
+        'handlers': {
+            handler: {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 0.50) * 1000, 4),
+                'p99_ms': round(percentile(values, 0.99) * 1000, 4),
+                'max_ms': round(max(values) * 1000, 4)
+            }
+            for handler, values in latencies.items()
+        },
+        'db': {
+            'calls': sum(call['calls'] for call in db_calls.values()),
+            'seconds': round(sum(call['seconds'] for call in db_calls.values()), 6),
+            'methods': db_calls
+        },
+        'message_cache': {
+            'hits': cache_after['hits'] - cache_before['hits'],
+            'misses': cache_after['misses'] - cache_before['misses'],
+            'evictions': cache_after['evictions'] - cache_before['evictions'],
+            'bytes': cache_after['bytes']
+        },
+        'background': background_report,
+        'peak_memory_bytes': peak_memory
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+async def run(names: List[str], scale: float, trace_memory: bool) -> Dict[str, Any]:
+    bot = HappyBot()
+    await bot.setup_hook()
+    bot._connection.user = FakeGuild("bot").me
+    # Keep background passes out of the measurements; replayed settings
+    # changes reach the cache directly since there is only one process.
+    await bot.maintenance.stop()
+    await bot.settings_watcher.stop()
+    
+    results = {}
+    try:
+        for name in names:
+            print(f"▶ {name}", flush=True)
+            if name in BENCHMARKS:
+                benchmark, base_size = BENCHMARKS[name]
+                results[name] = {'metrics': await benchmark(max(1, int(base_size * scale)))}
+            else:
+                results[name] = await run_scenario(bot, name, scale, trace_memory)
+    finally:
+        try:
+            await bot.close()
+        except AttributeError:
+            # The shard manager only exists once the gateway has connected
+            pass
+    
+    return {
+        'commit': git_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'discord_py': discord.__version__,
+        'scale': scale,
+        'scenarios': results
+    }
+
+def print_report(report: Dict[str, Any], baseline: Dict[str, Any] = None):
+    def change(current, previous) -> str:
+        if not previous or current is None:
+            return ""
+        return f" ({(current - previous) / previous * 100:+.1f}%)"
+    
+    for name, result in report['scenarios'].items():
+        before = (baseline or {}).get('scenarios', {}).get(name, {})
+        if 'metrics' in result:
+            print(f"\n{name}:")
+            for key, value in result['metrics'].items():
+                print(f"  {key:<32} {value}{change(value, before.get('metrics', {}).get(key))}")
+            continue
+        print(f"\n{name}: {result['events']} events in {result['seconds']}s, "
+              f"{result['throughput_per_s']}/s{change(result['throughput_per_s'], before.get('throughput_per_s'))}")
+        for handler, stats in result['handlers'].items():
+            previous = before.get('handlers', {}).get(handler, {})
+            print(f"  {handler:<24} p50 {stats['p50_ms']:.3f}ms{change(stats['p50_ms'], previous.get('p50_ms'))}  "
+                  f"p99 {stats['p99_ms']:.3f}ms{change(stats['p99_ms'], previous.get('p99_ms'))}")
+        print(f"  db: {result['db']['calls']} calls, {result['db']['seconds']:.3f}s"
+              f"{change(result['db']['seconds'], before.get('db', {}).get('seconds'))}")
+        if result.get('background'):
+            print("  background: " + ", ".join(f"{key} {value}" for key, value in result['background'].items()))
+        cache = result.get('message_cache', {})
+        if cache.get('hits') or cache.get('misses'):
+            print(f"  message cache: {cache['hits']} hits, {cache['misses']} misses, "
+                  f"{cache['evictions']} evictions, {cache['bytes'] / 1024:.0f} KiB")
+        if result['peak_memory_bytes'] is not None:
+            print(f"  peak memory: {result['peak_memory_bytes'] / 1024 / 1024:.1f} MiB"
+                  f"{change(result['peak_memory_bytes'], before.get('peak_memory_bytes'))}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay event streams against HappyBot offline")
+    parser.add_argument("--scenario", nargs="+", choices=sorted([*SCENARIOS, *BENCHMARKS]), default=[*SCENARIOS, *BENCHMARKS])
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every scenario's event count")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Show changes against an earlier results file")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc, which slows handlers down")
+    args = parser.parse_args()
+    
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    
+    try:
+        report = asyncio.run(run(args.scenario, args.scale, not args.no_memory))
+    finally:
+        shutil.rmtree(_TMP_DIR, ignore_errors=True)
+    
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
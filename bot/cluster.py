@@ -0,0 +1,155 @@
+"""Run HappyBot as several worker processes, each owning a range of shards.
+
+    python cluster.py
+
+CLUSTER_WORKERS sets the number of processes and CLUSTER_SHARDS the total
+shard count (defaults to one shard per worker). The supervisor restarts a
+worker that exits with an error, backing off when it keeps crashing.
+
+Shared database rule: every worker opens its own connections to the same
+SQLite file in WAL mode. Readers never block, and SQLite allows one writer
+at a time across processes, so writes stay short (batched events, single-row
+updates) and wait on busy_timeout rather than fail. A guild always maps to
+the same shard, so each worker warms its settings cache with only the guilds
+on its own shards.
+Only worker 0 runs the retention task, and each worker publishes its
+latency and guild count to the cluster_status table for /ping and /uptime.
+With METRICS_PORT set, worker N serves its metrics on METRICS_PORT + N.
+
+On SIGINT or SIGTERM the supervisor asks every worker to close, which
+flushes buffered analytics and queued log messages, and only kills a
+worker that is still running SHUTDOWN_TIMEOUT seconds later.
+"""
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import DISCORD_TOKEN, CLUSTER_WORKERS, CLUSTER_SHARDS
+
+RESTART_BACKOFF = (1, 5, 15, 30, 60)
+STABLE_AFTER = 300
+SHUTDOWN_TIMEOUT = 30
+
+def shard_ranges(shard_count: int, workers: int) -> List[List[int]]:
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+def run_worker(cluster_id: int, shard_ids: List[int], shard_count: int):
+    from main import HappyBot
+    
+    print(f"✓ Cluster {cluster_id} starting shards {shard_ids}")
+    bot = HappyBot(shard_ids=shard_ids, shard_count=shard_count, cluster_id=cluster_id)
+    
+    async def runner():
+        # Client.run only stops cleanly on KeyboardInterrupt; the supervisor
+        # sends SIGTERM, so close the bot from a handler for both.
+        closing = []
+        
+        def shutdown():
+            if not closing:
+                closing.append(asyncio.ensure_future(bot.close()))
+        
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, shutdown)
+        
+        async with bot:
+            await bot.start(DISCORD_TOKEN)
+        if closing:
+            await closing[0]
+    
+    asyncio.run(runner())
+
+class Supervisor:
+    def __init__(self, shard_count: int, workers: int):
+        self.shard_count = shard_count
+        self.ranges = shard_ranges(shard_count, workers)
+        self.context = multiprocessing.get_context("spawn")
+        
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        self.started_at: Dict[int, float] = {}
+        self.failures: Dict[int, int] = {}
+        self.restart_at: Dict[int, float] = {}
+        self.running = True
+    
+    def start_worker(self, cluster_id: int):
+        process = self.context.Process(
+            target=run_worker,
+            args=(cluster_id, self.ranges[cluster_id], self.shard_count),
+            name=f"happy-cluster-{cluster_id}"
+        )
+        process.start()
+        self.processes[cluster_id] = process
+        self.started_at[cluster_id] = time.monotonic()
+    
+    def check_workers(self):
+        now = time.monotonic()
+        for cluster_id, process in list(self.processes.items()):
+            if process.is_alive():
+                if now - self.started_at[cluster_id] > STABLE_AFTER:
+                    self.failures[cluster_id] = 0
+                continue
+            
+            del self.processes[cluster_id]
+            if process.exitcode == 0:
+                print(f"✓ Cluster {cluster_id} exited cleanly")
+                continue
+            
+            failures = self.failures.get(cluster_id, 0)
+            delay = RESTART_BACKOFF[min(failures, len(RESTART_BACKOFF) - 1)]
+            self.failures[cluster_id] = failures + 1
+            self.restart_at[cluster_id] = now + delay
+            print(f"✗ Cluster {cluster_id} exited with code {process.exitcode}, restarting in {delay}s")
+        
+        for cluster_id, when in list(self.restart_at.items()):
+            if now >= when:
+                del self.restart_at[cluster_id]
+                self.start_worker(cluster_id)
+    
+    def stop(self, *_):
+        self.running = False
+        for process in self.processes.values():
+            process.terminate()
+    
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        
+        for cluster_id in range(len(self.ranges)):
+            self.start_worker(cluster_id)
+        
+        while self.running and (self.processes or self.restart_at):
+            self.check_workers()
+            time.sleep(1)
+        
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        for cluster_id, process in self.processes.items():
+            process.join(timeout=max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"✗ Cluster {cluster_id} did not close in {SHUTDOWN_TIMEOUT}s, killing it")
+                process.kill()
+
+def main():
+    if not DISCORD_TOKEN:
+        print("ERROR: DISCORD_BOT_TOKEN not found in environment variables!")
+        print("Please create a .env file with your bot token.")
+        return
+    
+    shard_count = CLUSTER_SHARDS or CLUSTER_WORKERS
+    print(f"✓ Launching {min(CLUSTER_WORKERS, shard_count)} workers for {shard_count} shards")
+    Supervisor(shard_count, CLUSTER_WORKERS).run()
+
+if __name__ == "__main__":
+    main()
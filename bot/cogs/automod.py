@@ -0,0 +1,138 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from datetime import timedelta
+from typing import Optional
+
+from utils.automod import AutoModEngine, compile_word_list
+
+# One warning and timeout per burst; messages in the cooldown are only deleted
+ACTION_COOLDOWN = 30.0
+
+class AutoMod(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.engine = AutoModEngine()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.guild is None or message.author.bot or message.webhook_id:
+            return
+
+        settings = await self.bot.db.get_guild_settings(message.guild.id)
+        if not settings or not settings['automod_enabled']:
+            return
+        if isinstance(message.author, discord.Member) and message.author.guild_permissions.manage_messages:
+            return
+
+        mentions = len(message.raw_mentions) + len(message.raw_role_mentions) + int(message.mention_everyone)
+        reason = self.engine.check(
+            message.guild.id,
+            message.author.id,
+            message.content,
+            mentions,
+            settings
+        )
+        if reason is not None:
+            await self._punish(message, reason, settings)
+
+    async def _punish(self, message: discord.Message, reason: str, settings: dict):
+        guild = message.guild
+        member = message.author
+
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+
+        if not self.engine.should_punish(guild.id, member.id, ACTION_COOLDOWN):
+            return
+
+        await self.bot.db.add_warn(guild.id, member.id, self.bot.user.id, f"Auto-mod: {reason}")
+        await self.bot.db.log_event(
+            guild.id,
+            "moderation_warn",
+            f"User {member.id} warned by {self.bot.user.id} (auto-mod: {reason})"
+        )
+
+        minutes = settings['automod_timeout_minutes'] or 0
+        if minutes and isinstance(member, discord.Member):
+            try:
+                await member.timeout(timedelta(minutes=minutes), reason=f"Auto-mod: {reason}")
+                await self.bot.db.log_event(
+                    guild.id,
+                    "moderation_timeout",
+                    f"User {member.id} timed out for {minutes}m by {self.bot.user.id} (auto-mod: {reason})"
+                )
+            except discord.HTTPException:
+                pass
+
+        try:
+            await message.channel.send(
+                f"⚠️ {member.mention} was warned for {reason}.",
+                delete_after=10,
+                allowed_mentions=discord.AllowedMentions(users=[member])
+            )
+        except discord.HTTPException:
+            pass
+
+    @app_commands.command(name="automod", description="Configure auto-moderation")
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.describe(
+        enabled="Enable or disable auto-moderation",
+        flood_limit="Messages allowed per 5 seconds (0 to disable)",
+        mention_limit="Mentions allowed per 10 seconds (0 to disable)",
+        timeout_minutes="Timeout applied on a violation (0 for warning only)",
+        banned_words="Comma separated words and phrases to block, or 'none' to clear"
+    )
+    async def automod(
+        self,
+        interaction: discord.Interaction,
+        enabled: bool,
+        flood_limit: Optional[app_commands.Range[int, 0, 50]] = None,
+        mention_limit: Optional[app_commands.Range[int, 0, 50]] = None,
+        timeout_minutes: Optional[app_commands.Range[int, 0, 40320]] = None,
+        banned_words: Optional[str] = None
+    ):
+        try:
+            settings = {}
+            settings['automod_enabled'] = 1 if enabled else 0
+
+            if flood_limit is not None:
+                settings['automod_flood_limit'] = flood_limit
+
+            if mention_limit is not None:
+                settings['automod_mention_limit'] = mention_limit
+
+            if timeout_minutes is not None:
+                settings['automod_timeout_minutes'] = timeout_minutes
+
+            if banned_words is not None:
+                settings['automod_words'] = None if banned_words.strip().lower() == "none" else banned_words
+                # Surface a bad list now rather than on the next message
+                compile_word_list(settings['automod_words'])
+
+            await self.bot.db.update_guild_settings(interaction.guild.id, settings)
+
+            embed = discord.Embed(
+                title="✓ Auto-Mod Settings Updated",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="Enabled", value=str(enabled), inline=True)
+            if flood_limit is not None:
+                embed.add_field(name="Flood Limit", value=f"{flood_limit} per 5s", inline=True)
+            if mention_limit is not None:
+                embed.add_field(name="Mention Limit", value=f"{mention_limit} per 10s", inline=True)
+            if timeout_minutes is not None:
+                embed.add_field(name="Timeout", value=f"{timeout_minutes} minutes", inline=True)
+            if banned_words is not None:
+                words = settings['automod_words']
+                count = len([word for word in words.split(",") if word.strip()]) if words else 0
+                embed.add_field(name="Banned Words", value=str(count), inline=True)
+
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except Exception as e:
+            await interaction.response.send_message(f"❌ Failed to update settings: {e}", ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(AutoMod(bot))
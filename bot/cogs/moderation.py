@@ -1,12 +1,218 @@
 import discord
+import asyncio
 from discord.ext import commands
 from discord import app_commands
-from datetime import timedelta
-from typing import Optional
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Set
+
+from utils.purge import PurgeFilter, PurgeJob
+from utils.mass_action import TargetSelector, MassActionJob
+
+WARNINGS_PER_PAGE = 10
+
+class WarningsView(discord.ui.View):
+    """Pages through a member's warnings one query at a time."""
+    
+    def __init__(self, bot, author: discord.abc.User, guild: discord.Guild, member: discord.Member, total: int):
+        super().__init__(timeout=180)
+        self.bot = bot
+        self.author = author
+        self.guild = guild
+        self.member = member
+        self.total = total
+        self.page = 0
+        self.warns = []
+        self.has_newer = False
+        self.has_older = False
+        self.message: Optional[discord.InteractionMessage] = None
+    
+    async def load(self, before_id: Optional[int] = None, after_id: Optional[int] = None):
+        # One extra row tells whether another page exists in that direction
+        rows = await self.bot.db.get_warns(
+            self.guild.id,
+            self.member.id,
+            limit=WARNINGS_PER_PAGE + 1,
+            before_id=before_id,
+            after_id=after_id
+        )
+        more = len(rows) > WARNINGS_PER_PAGE
+        if after_id is not None:
+            self.warns = rows[-WARNINGS_PER_PAGE:]
+            self.has_newer, self.has_older = more, True
+        else:
+            self.warns = rows[:WARNINGS_PER_PAGE]
+            self.has_newer, self.has_older = before_id is not None, more
+        
+        self.previous_page.disabled = not self.has_newer
+        self.next_page.disabled = not self.has_older
+    
+    def build_embed(self) -> discord.Embed:
+        embed = discord.Embed(
+            title=f"⚠️ Warnings for {self.member.display_name}",
+            color=discord.Color.gold()
+        )
+        
+        for warn in self.warns:
+            moderator = self.guild.get_member(warn['moderator_id'])
+            mod_mention = moderator.mention if moderator else f"<@{warn['moderator_id']}>"
+            
+            embed.add_field(
+                name=f"Warning #{warn['id']}",
+                value=f"**Reason:** {warn['reason']}\n**By:** {mod_mention}\n**Date:** {warn['created_at']}",
+                inline=False
+            )
+        
+        pages = max(1, -(-self.total // WARNINGS_PER_PAGE))
+        embed.set_footer(text=f"Total warnings: {self.total} • Page {self.page + 1}/{pages}")
+        return embed
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author.id
+    
+    async def on_timeout(self):
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+    
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.load(after_id=self.warns[0]['id'] if self.warns else None)
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+    
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.load(before_id=self.warns[-1]['id'] if self.warns else None)
+        self.page += 1
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+PURGE_MAX_MESSAGES = 10000
+PURGE_PROGRESS_INTERVAL = 2.0
+
+class PurgeView(discord.ui.View):
+    """Cancel button for a running purge job.
+    
+    The view has no timeout since a purge can outlast any fixed one; it is
+    stopped when the job ends so the bot stops listening for its button.
+    """
+    
+    def __init__(self, job: PurgeJob):
+        super().__init__(timeout=None)
+        self.job = job
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.job.moderator.id
+    
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.danger)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.job.cancel()
+        button.disabled = True
+        button.label = "Cancelling..."
+        await interaction.response.edit_message(view=self)
+
+def purge_embed(job: PurgeJob) -> discord.Embed:
+    colors = {
+        'finished': discord.Color.green(),
+        'cancelled': discord.Color.orange(),
+        'failed': discord.Color.red()
+    }
+    embed = discord.Embed(
+        title=f"🧹 Purge {job.status}",
+        color=colors.get(job.status, discord.Color.blurple())
+    )
+    embed.add_field(name="Deleted", value=f"{job.deleted}/{job.limit}", inline=True)
+    embed.add_field(name="Scanned", value=str(job.scanned), inline=True)
+    embed.add_field(name="Failed", value=str(job.failed), inline=True)
+    embed.add_field(name="Filters", value=job.filter.describe(), inline=False)
+    if job.error:
+        embed.add_field(name="Error", value=job.error[:1024], inline=False)
+    embed.set_footer(text=f"{job.duration:.1f}s")
+    return embed
+
+MASS_ACTION_MAX_TARGETS = 1000
+MASS_ACTION_CONCURRENCY = 5
+MASS_ACTION_PROGRESS_INTERVAL = 2.0
+
+class MassActionView(discord.ui.View):
+    """Confirm, then cancel, a mass ban or kick."""
+    
+    def __init__(self, job: MassActionJob):
+        super().__init__(timeout=300)
+        self.job = job
+        self.task: Optional[asyncio.Task] = None
+        self.interaction: Optional[discord.Interaction] = None
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.job.moderator.id
+    
+    async def on_timeout(self):
+        # Only reachable before Confirm, which clears the timeout
+        for item in self.children:
+            item.disabled = True
+        if self.interaction is not None:
+            try:
+                await self.interaction.edit_original_response(view=self)
+            except discord.HTTPException:
+                pass
+    
+    @discord.ui.button(label="Confirm", style=discord.ButtonStyle.danger)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.remove_item(button)
+        self.stop_button.label = "Stop"
+        self.timeout = None
+        await interaction.response.edit_message(embed=mass_action_embed(self.job), view=self)
+        self.task = asyncio.create_task(self.job.run())
+        self.task.add_done_callback(lambda _: self.stop())
+    
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
+    async def stop_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.job.cancel()
+        if self.task is None:
+            self.stop()
+            await interaction.response.edit_message(content="Cancelled, nobody was affected.", embed=None, view=None)
+        else:
+            button.disabled = True
+            await interaction.response.edit_message(view=self)
+
+def mass_action_embed(job: MassActionJob, selector: Optional[TargetSelector] = None) -> discord.Embed:
+    verb = "Ban" if job.action == "ban" else "Kick"
+    if job.status == "pending" or job.status == "dry run":
+        embed = discord.Embed(
+            title=f"🔨 Mass {verb} preview" + (" (dry run)" if job.dry_run else ""),
+            description=f"{len(job.targets)} members match",
+            color=discord.Color.orange()
+        )
+        sample = " ".join(f"<@{target.id}>" for target in job.targets[:30])
+        if len(job.targets) > 30:
+            sample += f" and {len(job.targets) - 30} more"
+        embed.add_field(name="Targets", value=sample or "None", inline=False)
+    else:
+        embed = discord.Embed(
+            title=f"🔨 Mass {verb} {job.status}",
+            description=f"{job.done_count}/{len(job.targets)} processed",
+            color=discord.Color.red() if job.done else discord.Color.blurple()
+        )
+        embed.add_field(name="Succeeded", value=str(len(job.succeeded)), inline=True)
+        embed.add_field(name="Failed", value=str(len(job.failed)), inline=True)
+        embed.set_footer(text=f"{job.duration:.1f}s")
+    if selector is not None:
+        embed.add_field(name="Criteria", value=selector.describe(), inline=False)
+    embed.add_field(name="Reason", value=job.reason, inline=False)
+    return embed
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.purge_jobs: Dict[int, PurgeJob] = {}
+        self.pending_logs: Set[asyncio.Task] = set()
+    
+    def cog_unload(self):
+        for job in self.purge_jobs.values():
+            job.cancel()
     
     @app_commands.command(name="ban", description="Ban a member from the server")
     @app_commands.default_permissions(ban_members=True)
@@ -107,25 +313,189 @@ class Moderation(commands.Cog):
         except Exception as e:
             await interaction.response.send_message(f"❌ Failed to timeout member: {e}", ephemeral=True)
     
-    @app_commands.command(name="purge", description="Delete multiple messages")
+    @app_commands.command(name="purge", description="Delete messages matching filters")
     @app_commands.default_permissions(manage_messages=True)
-    @app_commands.describe(amount="Number of messages to delete (1-100)")
-    async def purge(self, interaction: discord.Interaction, amount: int):
-        if amount < 1 or amount > 100:
-            await interaction.response.send_message("❌ Amount must be between 1 and 100", ephemeral=True)
+    @app_commands.describe(
+        amount=f"Number of messages to delete (1-{PURGE_MAX_MESSAGES})",
+        user="Only delete messages from this user",
+        contains="Only delete messages matching this regular expression",
+        attachments="Only delete messages with attachments",
+        within="Only delete messages sent in the last N minutes"
+    )
+    async def purge(
+        self,
+        interaction: discord.Interaction,
+        amount: app_commands.Range[int, 1, PURGE_MAX_MESSAGES],
+        user: Optional[discord.User] = None,
+        contains: Optional[app_commands.Range[str, 1, 200]] = None,
+        attachments: Optional[bool] = False,
+        within: Optional[app_commands.Range[int, 1, 525600]] = None
+    ):
+        channel = interaction.channel
+        running = self.purge_jobs.get(channel.id)
+        if running is not None and not running.done:
+            await interaction.response.send_message("❌ A purge is already running in this channel", ephemeral=True)
             return
         
         try:
-            await interaction.response.defer(ephemeral=True)
-            deleted = await interaction.channel.purge(limit=amount)
-            await self.bot.db.log_event(
-                interaction.guild.id,
-                "moderation_purge",
-                f"{len(deleted)} messages purged in {interaction.channel.id} by {interaction.user.id}"
+            purge_filter = PurgeFilter(
+                author_id=user.id if user else None,
+                pattern=contains,
+                attachments_only=bool(attachments),
+                after=datetime.now(timezone.utc) - timedelta(minutes=within) if within else None
             )
-            await interaction.followup.send(f"✓ Deleted {len(deleted)} messages", ephemeral=True)
-        except Exception as e:
-            await interaction.followup.send(f"❌ Failed to purge messages: {e}", ephemeral=True)
+        except re.error as e:
+            await interaction.response.send_message(f"❌ Invalid pattern: {e}", ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        last_update = 0.0
+        message: Optional[discord.WebhookMessage] = None
+        
+        async def on_progress(job: PurgeJob):
+            nonlocal last_update
+            if message is None:
+                return
+            now = time.monotonic()
+            if not job.done and now - last_update < PURGE_PROGRESS_INTERVAL:
+                return
+            last_update = now
+            try:
+                await message.edit(embed=purge_embed(job), view=None if job.done else view)
+            except discord.HTTPException:
+                # The interaction token expires after 15 minutes; keep purging
+                pass
+        
+        job = PurgeJob(channel, interaction.user, amount, purge_filter, on_progress=on_progress)
+        view = PurgeView(job)
+        message = await interaction.followup.send(embed=purge_embed(job), view=view, ephemeral=True, wait=True)
+        
+        self.purge_jobs[channel.id] = job
+        job.start().add_done_callback(lambda _: self._purge_finished(job, view))
+    
+    def _purge_finished(self, job: PurgeJob, view: PurgeView):
+        view.stop()
+        if self.purge_jobs.get(job.channel.id) is job:
+            del self.purge_jobs[job.channel.id]
+        # Held until done; the event loop keeps only a weak reference
+        task = asyncio.create_task(self.bot.db.log_event(job.channel.guild.id, "moderation_purge", job.summary()))
+        self.pending_logs.add(task)
+        task.add_done_callback(self.pending_logs.discard)
+    
+    @app_commands.command(name="massban", description="Ban every member matching raid criteria")
+    @app_commands.default_permissions(ban_members=True)
+    @app_commands.describe(
+        joined_within="Members who joined in the last N minutes",
+        account_age="Accounts created less than N days ago",
+        name_pattern="Regular expression matched against usernames and nicknames",
+        user_ids="User IDs separated by spaces or commas",
+        reason="Reason for the bans",
+        dry_run="Only list who would be banned"
+    )
+    async def massban(
+        self,
+        interaction: discord.Interaction,
+        joined_within: Optional[app_commands.Range[int, 1, 10080]] = None,
+        account_age: Optional[app_commands.Range[int, 1, 3650]] = None,
+        name_pattern: Optional[app_commands.Range[str, 1, 200]] = None,
+        user_ids: Optional[str] = None,
+        reason: Optional[str] = "Raid cleanup",
+        dry_run: Optional[bool] = False
+    ):
+        await self._mass_action(interaction, "ban", joined_within, account_age, name_pattern, user_ids, reason, dry_run)
+    
+    @app_commands.command(name="masskick", description="Kick every member matching raid criteria")
+    @app_commands.default_permissions(kick_members=True)
+    @app_commands.describe(
+        joined_within="Members who joined in the last N minutes",
+        account_age="Accounts created less than N days ago",
+        name_pattern="Regular expression matched against usernames and nicknames",
+        user_ids="User IDs separated by spaces or commas",
+        reason="Reason for the kicks",
+        dry_run="Only list who would be kicked"
+    )
+    async def masskick(
+        self,
+        interaction: discord.Interaction,
+        joined_within: Optional[app_commands.Range[int, 1, 10080]] = None,
+        account_age: Optional[app_commands.Range[int, 1, 3650]] = None,
+        name_pattern: Optional[app_commands.Range[str, 1, 200]] = None,
+        user_ids: Optional[str] = None,
+        reason: Optional[str] = "Raid cleanup",
+        dry_run: Optional[bool] = False
+    ):
+        await self._mass_action(interaction, "kick", joined_within, account_age, name_pattern, user_ids, reason, dry_run)
+    
+    async def _mass_action(
+        self,
+        interaction: discord.Interaction,
+        action: str,
+        joined_within: Optional[int],
+        account_age: Optional[int],
+        name_pattern: Optional[str],
+        user_ids: Optional[str],
+        reason: str,
+        dry_run: bool
+    ):
+        ids = [int(user_id) for user_id in re.findall(r"\d{15,20}", user_ids or "")]
+        if not any((joined_within, account_age, name_pattern, ids)):
+            await interaction.response.send_message("❌ Give at least one way to select members", ephemeral=True)
+            return
+        
+        try:
+            selector = TargetSelector(
+                joined_within=timedelta(minutes=joined_within) if joined_within else None,
+                account_younger_than=timedelta(days=account_age) if account_age else None,
+                name_pattern=name_pattern,
+                user_ids=ids
+            )
+        except re.error as e:
+            await interaction.response.send_message(f"❌ Invalid pattern: {e}", ephemeral=True)
+            return
+        
+        # Loading the member list can outlast the interaction's 3 second window
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        targets = await selector.select(interaction.guild, interaction.user, MASS_ACTION_MAX_TARGETS)
+        if not targets:
+            await interaction.edit_original_response(content="No members match those criteria")
+            return
+        
+        last_update = 0.0
+        
+        async def on_progress(job: MassActionJob):
+            nonlocal last_update
+            now = time.monotonic()
+            if not job.done and now - last_update < MASS_ACTION_PROGRESS_INTERVAL:
+                return
+            last_update = now
+            try:
+                await interaction.edit_original_response(
+                    embed=mass_action_embed(job, selector),
+                    view=None if job.done else view
+                )
+            except discord.HTTPException:
+                pass
+        
+        job = MassActionJob(
+            self.bot.db,
+            interaction.guild,
+            interaction.user,
+            action,
+            targets,
+            reason,
+            concurrency=MASS_ACTION_CONCURRENCY,
+            dry_run=bool(dry_run),
+            on_progress=on_progress
+        )
+        
+        if job.dry_run:
+            await interaction.edit_original_response(embed=mass_action_embed(job, selector))
+            return
+        
+        view = MassActionView(job)
+        view.interaction = interaction
+        await interaction.edit_original_response(embed=mass_action_embed(job, selector), view=view)
     
     @app_commands.command(name="warn", description="Warn a member")
     @app_commands.default_permissions(moderate_members=True)
@@ -140,16 +510,13 @@ class Moderation(commands.Cog):
         reason: str
     ):
         try:
-            warn_id = await self.bot.db.add_warn(
+            warn_id, warn_count = await self.bot.db.add_warn(
                 interaction.guild.id,
                 member.id,
                 interaction.user.id,
                 reason
             )
             
-            warns = await self.bot.db.get_warns(interaction.guild.id, member.id)
-            warn_count = len(warns)
-            
             await self.bot.db.log_event(
                 interaction.guild.id,
                 "moderation_warn",
@@ -187,32 +554,19 @@ class Moderation(commands.Cog):
     @app_commands.describe(member="The member to check warnings for")
     async def warnings(self, interaction: discord.Interaction, member: discord.Member):
         try:
-            warns = await self.bot.db.get_warns(interaction.guild.id, member.id)
+            total = await self.bot.db.get_warn_count(interaction.guild.id, member.id)
             
-            if not warns:
+            if not total:
                 await interaction.response.send_message(
                     f"{member.mention} has no warnings",
                     ephemeral=True
                 )
                 return
             
-            embed = discord.Embed(
-                title=f"⚠️ Warnings for {member.display_name}",
-                color=discord.Color.gold()
-            )
-            
-            for warn in warns[:10]:
-                moderator = interaction.guild.get_member(warn['moderator_id'])
-                mod_mention = moderator.mention if moderator else f"<@{warn['moderator_id']}>"
-                
-                embed.add_field(
-                    name=f"Warning #{warn['id']}",
-                    value=f"**Reason:** {warn['reason']}\n**By:** {mod_mention}\n**Date:** {warn['created_at']}",
-                    inline=False
-                )
-            
-            embed.set_footer(text=f"Total warnings: {len(warns)}")
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            view = WarningsView(self.bot, interaction.user, interaction.guild, member, total)
+            await view.load()
+            await interaction.response.send_message(embed=view.build_embed(), view=view, ephemeral=True)
+            view.message = await interaction.original_response()
         except Exception as e:
             await interaction.response.send_message(f"❌ Failed to fetch warnings: {e}", ephemeral=True)
     
@@ -221,7 +575,7 @@ class Moderation(commands.Cog):
     @app_commands.describe(warn_id="The ID of the warning to remove")
     async def clearwarn(self, interaction: discord.Interaction, warn_id: int):
         try:
-            success = await self.bot.db.remove_warn(warn_id)
+            success = await self.bot.db.remove_warn(interaction.guild.id, warn_id)
             if success:
                 await interaction.response.send_message(f"✓ Warning #{warn_id} has been removed", ephemeral=True)
             else:
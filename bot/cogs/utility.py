@@ -3,6 +3,21 @@ from discord.ext import commands
 from discord import app_commands
 from datetime import datetime
 
+from utils.intents import get_or_fetch_member
+
+ANALYTICS_WINDOWS = {
+    "7d": 7,
+    "30d": 30,
+    "all": None
+}
+
+WINDOW_LABELS = {
+    "24h": "Last 24 hours",
+    "7d": "Last 7 days",
+    "30d": "Last 30 days",
+    "all": "All time"
+}
+
 class Utility(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -16,6 +31,19 @@ class Utility(commands.Cog):
             description=f"Latency: **{latency}ms**",
             color=discord.Color.green() if latency < 100 else discord.Color.orange()
         )
+        
+        if self.bot.cluster_id is not None:
+            workers = await self.bot.db.get_cluster_status()
+            for worker in workers:
+                embed.add_field(
+                    name=f"Cluster {worker['cluster_id']}",
+                    value=f"{round(worker['latency'] * 1000)}ms • {worker['guild_count']} guilds",
+                    inline=True
+                )
+            if workers:
+                average = round(sum(worker['latency'] for worker in workers) / len(workers) * 1000)
+                embed.set_footer(text=f"Cluster average: {average}ms across {len(workers)} workers")
+        
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="uptime", description="Check how long the bot has been running")
@@ -31,6 +59,16 @@ class Utility(commands.Cog):
             color=discord.Color.blue()
         )
         embed.set_footer(text=f"Started at {self.bot.start_time.strftime('%Y-%m-%d %H:%M:%S')} UTC")
+        
+        if self.bot.cluster_id is not None:
+            workers = await self.bot.db.get_cluster_status()
+            for worker in workers:
+                embed.add_field(
+                    name=f"Cluster {worker['cluster_id']}",
+                    value=f"Since {worker['started_at']} UTC",
+                    inline=True
+                )
+        
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="serverinfo", description="Get information about the server")
@@ -45,7 +83,8 @@ class Utility(commands.Cog):
         if guild.icon:
             embed.set_thumbnail(url=guild.icon.url)
         
-        embed.add_field(name="Owner", value=guild.owner.mention if guild.owner else "Unknown", inline=True)
+        owner = guild.owner or await get_or_fetch_member(guild, guild.owner_id)
+        embed.add_field(name="Owner", value=owner.mention if owner else "Unknown", inline=True)
         embed.add_field(name="Server ID", value=str(guild.id), inline=True)
         embed.add_field(name="Created", value=f"<t:{int(guild.created_at.timestamp())}:R>", inline=True)
         
@@ -110,14 +149,20 @@ class Utility(commands.Cog):
     
     @app_commands.command(name="analytics", description="View server analytics")
     @app_commands.default_permissions(manage_guild=True)
-    async def analytics(self, interaction: discord.Interaction):
+    @app_commands.describe(window="Time window to count events over")
+    @app_commands.choices(window=[
+        app_commands.Choice(name="Last 24 hours", value="24h"),
+        app_commands.Choice(name="Last 7 days", value="7d"),
+        app_commands.Choice(name="Last 30 days", value="30d"),
+        app_commands.Choice(name="All time", value="all")
+    ])
+    async def analytics(self, interaction: discord.Interaction, window: str = "7d"):
         try:
-            events = await self.bot.db.get_analytics(interaction.guild.id)
-            
-            event_counts = {}
-            for event in events:
-                event_type = event['event_type']
-                event_counts[event_type] = event_counts.get(event_type, 0) + 1
+            if window == "24h":
+                event_counts = await self.bot.db.get_recent_event_counts(interaction.guild.id, hours=24)
+            else:
+                days = ANALYTICS_WINDOWS[window]
+                event_counts = await self.bot.db.get_event_counts(interaction.guild.id, days=days)
             
             embed = discord.Embed(
                 title=f"📊 Analytics for {interaction.guild.name}",
@@ -125,7 +170,7 @@ class Utility(commands.Cog):
             )
             
             if event_counts:
-                for event_type, count in sorted(event_counts.items(), key=lambda x: x[1], reverse=True):
+                for event_type, count in event_counts.items():
                     embed.add_field(
                         name=event_type.replace('_', ' ').title(),
                         value=str(count),
@@ -134,11 +179,21 @@ class Utility(commands.Cog):
             else:
                 embed.description = "No analytics data available yet"
             
-            embed.set_footer(text=f"Showing last {len(events)} events")
+            embed.set_footer(text=f"{WINDOW_LABELS[window]} • {sum(event_counts.values())} events")
             
             await interaction.response.send_message(embed=embed)
         except Exception as e:
             await interaction.response.send_message(f"❌ Failed to fetch analytics: {e}", ephemeral=True)
+    
+    @app_commands.command(name="rebuildanalytics", description="Rebuild analytics totals from the raw event log")
+    @app_commands.default_permissions(administrator=True)
+    async def rebuildanalytics(self, interaction: discord.Interaction):
+        try:
+            await interaction.response.defer(ephemeral=True)
+            buckets = await self.bot.db.rebuild_event_counts(interaction.guild.id)
+            await interaction.followup.send(f"✓ Rebuilt analytics ({buckets} daily totals)", ephemeral=True)
+        except Exception as e:
+            await interaction.followup.send(f"❌ Failed to rebuild analytics: {e}", ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(Utility(bot))
\ No newline at end of file
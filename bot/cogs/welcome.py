@@ -3,9 +3,28 @@ from discord.ext import commands
 from discord import app_commands
 from typing import Optional
 
+from utils.join_monitor import JoinMonitor
+from utils.invites import InviteTracker
+from utils.templates import TemplateError, compile_template, placeholder_help
+
+DEFAULT_LEAVE_MESSAGE = "{user} has left the server"
+
+def load_template(source: Optional[str]):
+    # Templates saved before validation existed may not compile; those
+    # are sent as plain text.
+    try:
+        return compile_template(source or "")
+    except TemplateError:
+        return None
+
 class Welcome(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.join_monitor = JoinMonitor()
+        self.invites = InviteTracker()
+    
+    async def cog_unload(self):
+        await self.join_monitor.close()
     
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
@@ -15,14 +34,20 @@ class Welcome(commands.Cog):
             channel_id = settings['welcome_channel_id']
             if channel_id:
                 channel = member.guild.get_channel(channel_id)
-                if channel:
-                    message = settings['welcome_message'].replace(
-                        '{user}', member.mention
-                    ).replace(
-                        '{guild}', member.guild.name
-                    ).replace(
-                        '{membercount}', str(member.guild.member_count)
-                    )
+                threshold = settings['raid_join_threshold'] or 0
+                window = settings['raid_join_window'] or 0
+                
+                if channel and self.join_monitor.record(member.guild.id, threshold, window):
+                    self.join_monitor.add_to_digest(member.guild.id, channel, member, window)
+                elif channel:
+                    template = load_template(settings['welcome_message'])
+                    if template is None:
+                        message = settings['welcome_message']
+                    else:
+                        invite = None
+                        if template.uses("invite") or template.uses("inviter"):
+                            invite = await self.invites.find_used(member.guild)
+                        message = template.render(member, invite)
                     
                     embed = discord.Embed(
                         title="👋 Welcome!",
@@ -49,9 +74,11 @@ class Welcome(commands.Cog):
             if channel_id:
                 channel = member.guild.get_channel(channel_id)
                 if channel:
+                    source = settings['leave_message'] or DEFAULT_LEAVE_MESSAGE
+                    template = load_template(source)
                     embed = discord.Embed(
                         title="👋 Goodbye",
-                        description=f"{member.mention} has left the server",
+                        description=template.render(member) if template else source,
                         color=discord.Color.red()
                     )
                     embed.set_thumbnail(url=member.display_avatar.url)
@@ -66,67 +93,176 @@ class Welcome(commands.Cog):
         )
     
     @commands.Cog.listener()
-    async def on_message_delete(self, message: discord.Message):
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.invites.forget(guild.id)
+        self.bot.message_cache.drop_guild(guild.id)
+    
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
         if message.author.bot or not message.guild:
             return
         
         settings = await self.bot.db.get_guild_settings(message.guild.id)
         
         if settings and settings['log_enabled']:
-            channel_id = settings['log_channel_id']
-            if channel_id:
-                channel = message.guild.get_channel(channel_id)
-                if channel:
-                    embed = discord.Embed(
-                        title="🗑️ Message Deleted",
-                        color=discord.Color.red()
-                    )
-                    embed.add_field(name="Author", value=message.author.mention, inline=True)
-                    embed.add_field(name="Channel", value=message.channel.mention, inline=True)
-                    embed.add_field(name="Content", value=message.content[:1024] if message.content else "*No content*", inline=False)
-                    embed.timestamp = discord.utils.utcnow()
-                    
-                    await channel.send(embed=embed)
+            self.bot.message_cache.add(
+                message.id,
+                message.guild.id,
+                message.channel.id,
+                message.author.id,
+                message.content
+            )
+        elif self.bot.message_cache.has_guild(message.guild.id):
+            # Logging was switched off, possibly from the dashboard
+            self.bot.message_cache.drop_guild(message.guild.id)
+    
+    def _log_channel(self, guild_id: int, settings) -> Optional[discord.abc.Messageable]:
+        if not settings or not settings['log_enabled'] or not settings['log_channel_id']:
+            return None
+        guild = self.bot.get_guild(guild_id)
+        return guild.get_channel(settings['log_channel_id']) if guild else None
     
     @commands.Cog.listener()
-    async def on_message_edit(self, before: discord.Message, after: discord.Message):
-        if before.author.bot or not before.guild or before.content == after.content:
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        if not payload.guild_id:
+            return
+        if payload.cached_message is not None and payload.cached_message.author.bot:
             return
         
-        settings = await self.bot.db.get_guild_settings(before.guild.id)
+        cached = self.bot.message_cache.pop(payload.message_id)
+        if cached is not None:
+            author_id, content = cached.author_id, cached.content
+        elif payload.cached_message is not None:
+            author_id, content = payload.cached_message.author.id, payload.cached_message.content
+        else:
+            return
         
-        if settings and settings['log_enabled']:
-            channel_id = settings['log_channel_id']
-            if channel_id:
-                channel = before.guild.get_channel(channel_id)
-                if channel:
-                    embed = discord.Embed(
-                        title="✏️ Message Edited",
-                        color=discord.Color.blue()
-                    )
-                    embed.add_field(name="Author", value=before.author.mention, inline=True)
-                    embed.add_field(name="Channel", value=before.channel.mention, inline=True)
-                    embed.add_field(name="Before", value=before.content[:1024] if before.content else "*No content*", inline=False)
-                    embed.add_field(name="After", value=after.content[:1024] if after.content else "*No content*", inline=False)
-                    embed.add_field(name="Jump to Message", value=f"[Click here]({after.jump_url})", inline=False)
-                    embed.timestamp = discord.utils.utcnow()
-                    
-                    await channel.send(embed=embed)
+        settings = await self.bot.db.get_guild_settings(payload.guild_id)
+        channel = self._log_channel(payload.guild_id, settings)
+        if channel:
+            embed = discord.Embed(
+                title="🗑️ Message Deleted",
+                color=discord.Color.red()
+            )
+            embed.add_field(name="Author", value=f"<@{author_id}>", inline=True)
+            embed.add_field(name="Channel", value=f"<#{payload.channel_id}>", inline=True)
+            embed.add_field(name="Content", value=content[:1024] if content else "*No content*", inline=False)
+            embed.timestamp = discord.utils.utcnow()
+            
+            self.bot.log_dispatcher.submit(channel, embed)
+    
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        author = payload.data.get('author') or {}
+        after = payload.data.get('content')
+        if not payload.guild_id or after is None or author.get('bot') or payload.data.get('webhook_id'):
+            return
+        
+        cached = self.bot.message_cache.get(payload.message_id)
+        if cached is not None:
+            before = cached.content
+        elif payload.cached_message is not None:
+            before = payload.cached_message.content
+        elif payload.data.get('edited_timestamp'):
+            before = None
+        else:
+            # Embed unfurls also arrive as updates; only real edits carry a timestamp
+            return
+        
+        if before == after:
+            return
+        if cached is not None:
+            self.bot.message_cache.update(payload.message_id, after)
+        
+        settings = await self.bot.db.get_guild_settings(payload.guild_id)
+        channel = self._log_channel(payload.guild_id, settings)
+        if channel:
+            if before is None:
+                before_value = "*Not cached*"
+            else:
+                before_value = before[:1024] if before else "*No content*"
+            
+            embed = discord.Embed(
+                title="✏️ Message Edited",
+                color=discord.Color.blue()
+            )
+            embed.add_field(name="Author", value=f"<@{author['id']}>", inline=True)
+            embed.add_field(name="Channel", value=f"<#{payload.channel_id}>", inline=True)
+            embed.add_field(name="Before", value=before_value, inline=False)
+            embed.add_field(name="After", value=after[:1024] if after else "*No content*", inline=False)
+            embed.add_field(
+                name="Jump to Message",
+                value=f"[Click here](https://discord.com/channels/{payload.guild_id}/{payload.channel_id}/{payload.message_id})",
+                inline=False
+            )
+            embed.timestamp = discord.utils.utcnow()
+            
+            self.bot.log_dispatcher.submit(channel, embed)
+    
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        if not payload.guild_id:
+            return
+        
+        fallback = {message.id: message for message in payload.cached_messages}
+        found = []
+        for message_id in sorted(payload.message_ids):
+            cached = self.bot.message_cache.pop(message_id)
+            if cached is not None:
+                found.append((cached.author_id, cached.content))
+            elif message_id in fallback and not fallback[message_id].author.bot:
+                found.append((fallback[message_id].author.id, fallback[message_id].content))
+        
+        settings = await self.bot.db.get_guild_settings(payload.guild_id)
+        channel = self._log_channel(payload.guild_id, settings)
+        if channel:
+            lines = []
+            for author_id, content in found:
+                content = content[:100] if content else "*No content*"
+                lines.append(f"**<@{author_id}>:** {content}")
+            
+            embed = discord.Embed(
+                title=f"🗑️ {len(payload.message_ids)} Messages Deleted",
+                color=discord.Color.red()
+            )
+            embed.add_field(name="Channel", value=f"<#{payload.channel_id}>", inline=True)
+            embed.add_field(name="Cached", value=str(len(found)), inline=True)
+            if lines:
+                embed.description = "\n".join(lines)[:4096]
+            embed.timestamp = discord.utils.utcnow()
+            
+            self.bot.log_dispatcher.submit(channel, embed)
     
     @app_commands.command(name="setwelcome", description="Configure welcome messages")
     @app_commands.default_permissions(manage_guild=True)
     @app_commands.describe(
         enabled="Enable or disable welcome messages",
         channel="Channel to send welcome messages",
-        message="Welcome message (use {user}, {guild}, {membercount})"
+        message="Welcome message (placeholders such as {user}, {user.age}, {membercount.ordinal}, {invite})",
+        raid_threshold="Joins within the raid window that switch to a join digest (0 to disable)",
+        raid_window="Raid detection window in seconds"
     )
     async def setwelcome(
         self,
         interaction: discord.Interaction,
         enabled: bool,
         channel: Optional[discord.TextChannel] = None,
-        message: Optional[str] = None
+        message: Optional[str] = None,
+        raid_threshold: Optional[app_commands.Range[int, 0, 1000]] = None,
+        raid_window: Optional[app_commands.Range[int, 1, 3600]] = None
     ):
+        if message:
+            try:
+                template = compile_template(message)
+            except TemplateError as e:
+                await interaction.response.send_message(
+                    f"❌ {e}\n\n**Available placeholders:**\n{placeholder_help()}",
+                    ephemeral=True
+                )
+                return
+            if template.uses("invite") or template.uses("inviter"):
+                await self.invites.prime(interaction.guild)
+        
         try:
             settings = {}
             settings['welcome_enabled'] = 1 if enabled else 0
@@ -137,6 +273,12 @@ class Welcome(commands.Cog):
             if message:
                 settings['welcome_message'] = message
             
+            if raid_threshold is not None:
+                settings['raid_join_threshold'] = raid_threshold
+            
+            if raid_window is not None:
+                settings['raid_join_window'] = raid_window
+            
             await self.bot.db.update_guild_settings(interaction.guild.id, settings)
             
             embed = discord.Embed(
@@ -148,6 +290,10 @@ class Welcome(commands.Cog):
                 embed.add_field(name="Channel", value=channel.mention, inline=True)
             if message:
                 embed.add_field(name="Message", value=message, inline=False)
+            if raid_threshold is not None:
+                embed.add_field(name="Raid Threshold", value=str(raid_threshold), inline=True)
+            if raid_window is not None:
+                embed.add_field(name="Raid Window", value=f"{raid_window}s", inline=True)
             
             await interaction.response.send_message(embed=embed)
         except Exception as e:
@@ -157,14 +303,26 @@ class Welcome(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     @app_commands.describe(
         enabled="Enable or disable leave logging",
-        channel="Channel to send leave logs"
+        channel="Channel to send leave logs",
+        message="Leave message (placeholders such as {user.name}, {user.joined}, {membercount})"
     )
     async def setleavelog(
         self,
         interaction: discord.Interaction,
         enabled: bool,
-        channel: Optional[discord.TextChannel] = None
+        channel: Optional[discord.TextChannel] = None,
+        message: Optional[str] = None
     ):
+        if message:
+            try:
+                compile_template(message)
+            except TemplateError as e:
+                await interaction.response.send_message(
+                    f"❌ {e}\n\n**Available placeholders:**\n{placeholder_help()}",
+                    ephemeral=True
+                )
+                return
+        
         try:
             settings = {}
             settings['leave_enabled'] = 1 if enabled else 0
@@ -172,6 +330,9 @@ class Welcome(commands.Cog):
             if channel:
                 settings['leave_channel_id'] = channel.id
             
+            if message:
+                settings['leave_message'] = message
+            
             await self.bot.db.update_guild_settings(interaction.guild.id, settings)
             
             embed = discord.Embed(
@@ -181,6 +342,8 @@ class Welcome(commands.Cog):
             embed.add_field(name="Enabled", value=str(enabled), inline=True)
             if channel:
                 embed.add_field(name="Channel", value=channel.mention, inline=True)
+            if message:
+                embed.add_field(name="Message", value=message, inline=False)
             
             await interaction.response.send_message(embed=embed)
         except Exception as e:
@@ -206,6 +369,8 @@ class Welcome(commands.Cog):
                 settings['log_channel_id'] = channel.id
             
             await self.bot.db.update_guild_settings(interaction.guild.id, settings)
+            if not enabled:
+                self.bot.message_cache.drop_guild(interaction.guild.id)
             
             embed = discord.Embed(
                 title="✓ Message Log Settings Updated",
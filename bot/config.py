@@ -5,4 +5,43 @@ load_dotenv()
 
 DISCORD_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 DISCORD_CLIENT_ID = os.getenv("DISCORD_CLIENT_ID")
-DATABASE_PATH = os.getenv("DATABASE_PATH", "data/nooby.db")
\ No newline at end of file
+DATABASE_PATH = os.getenv("DATABASE_PATH", "data/nooby.db")
+DATABASE_READERS = int(os.getenv("DATABASE_READERS", "4"))
+
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "500"))
+EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", "2.0"))
+EVENT_MAX_PENDING = int(os.getenv("EVENT_MAX_PENDING", "10000"))
+
+SETTINGS_CACHE_SIZE = int(os.getenv("SETTINGS_CACHE_SIZE", "10000"))
+SETTINGS_POLL_INTERVAL = float(os.getenv("SETTINGS_POLL_INTERVAL", "1.0"))
+
+MAINTENANCE_INTERVAL = float(os.getenv("MAINTENANCE_INTERVAL", "3600"))
+ANALYTICS_RETENTION_DAYS = int(os.getenv("ANALYTICS_RETENTION_DAYS", "90"))
+TICKET_RETENTION_DAYS = int(os.getenv("TICKET_RETENTION_DAYS", "30"))
+
+LOG_BATCH_LINGER = float(os.getenv("LOG_BATCH_LINGER", "1.5"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "500"))
+LOG_FLUSH_MESSAGES = int(os.getenv("LOG_FLUSH_MESSAGES", "3"))
+MESSAGE_CACHE_BYTES = int(os.getenv("MESSAGE_CACHE_BYTES", str(32 * 1024 * 1024)))
+MESSAGE_CACHE_GUILD_BYTES = int(os.getenv("MESSAGE_CACHE_GUILD_BYTES", str(1024 * 1024)))
+
+ENABLED_COGS = [
+    cog.strip()
+    for cog in os.getenv("ENABLED_COGS", "cogs.moderation,cogs.welcome,cogs.tickets,cogs.utility,cogs.automod").split(",")
+    if cog.strip()
+]
+GATEWAY_INTENTS = os.getenv("GATEWAY_INTENTS", "auto")
+MEMBER_CACHE = os.getenv("MEMBER_CACHE", "joined")
+CHUNK_GUILDS_AT_STARTUP = os.getenv("CHUNK_GUILDS_AT_STARTUP", "false").lower() in ("1", "true", "yes")
+MAX_MESSAGES = int(os.getenv("MAX_MESSAGES", "1000")) or None
+
+CLUSTER_WORKERS = int(os.getenv("CLUSTER_WORKERS", "1"))
+CLUSTER_SHARDS = int(os.getenv("CLUSTER_SHARDS", "0")) or None
+CLUSTER_HEARTBEAT_INTERVAL = float(os.getenv("CLUSTER_HEARTBEAT_INTERVAL", "15"))
+
+DEV_GUILD_IDS = [int(guild_id) for guild_id in os.getenv("DEV_GUILD_IDS", "").split(",") if guild_id.strip()]
+
+STARTUP_TRACE_PATH = os.getenv("STARTUP_TRACE_PATH")
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
@@ -1,53 +1,217 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 import discord
 from discord.ext import commands
 import asyncio
+import math
 from datetime import datetime
 import os
 import sys
+from typing import Optional, List
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from config import DISCORD_TOKEN, DATABASE_PATH
+from config import (
+    DISCORD_TOKEN,
+    DATABASE_PATH,
+    EVENT_BATCH_SIZE,
+    EVENT_FLUSH_INTERVAL,
+    EVENT_MAX_PENDING,
+    SETTINGS_CACHE_SIZE,
+    SETTINGS_POLL_INTERVAL,
+    DATABASE_READERS,
+    MAINTENANCE_INTERVAL,
+    ANALYTICS_RETENTION_DAYS,
+    TICKET_RETENTION_DAYS,
+    LOG_BATCH_LINGER,
+    LOG_QUEUE_SIZE,
+    LOG_FLUSH_MESSAGES,
+    MESSAGE_CACHE_BYTES,
+    MESSAGE_CACHE_GUILD_BYTES,
+    ENABLED_COGS,
+    GATEWAY_INTENTS,
+    MEMBER_CACHE,
+    CHUNK_GUILDS_AT_STARTUP,
+    MAX_MESSAGES,
+    CLUSTER_HEARTBEAT_INTERVAL,
+    DEV_GUILD_IDS,
+    STARTUP_TRACE_PATH,
+    METRICS_HOST,
+    METRICS_PORT
+)
 from utils.database import Database
+from utils.maintenance import MaintenanceTask
+from utils.settings_watcher import SettingsWatcher
+from utils.log_dispatcher import LogDispatcher
+from utils.cache import MessageContentCache
+from utils.intents import build_intents, build_member_cache_flags
+from utils.command_sync import CommandSyncManager
+from utils.startup import StartupTracer
+from utils.metrics import (
+    MetricsRegistry,
+    MetricsServer,
+    LoopLagMonitor,
+    timed,
+    instrument_database,
+    instrument_app_commands
+)
+
+_IMPORT_END = time.perf_counter()
 
-class HappyBot(commands.Bot):
-    def __init__(self):
-        intents = discord.Intents.all()
+class HappyBot(commands.AutoShardedBot):
+    def __init__(
+        self,
+        shard_ids: Optional[List[int]] = None,
+        shard_count: Optional[int] = None,
+        cluster_id: Optional[int] = None
+    ):
+        self.startup = StartupTracer(origin=_IMPORT_START)
+        self.startup.record("imports", _IMPORT_START, _IMPORT_END)
+        
+        intents = build_intents(ENABLED_COGS, GATEWAY_INTENTS)
         
         super().__init__(
             command_prefix="/",
             intents=intents,
-            help_command=None
+            help_command=None,
+            member_cache_flags=build_member_cache_flags(MEMBER_CACHE, intents),
+            chunk_guilds_at_startup=CHUNK_GUILDS_AT_STARTUP,
+            max_messages=MAX_MESSAGES,
+            shard_ids=shard_ids,
+            shard_count=shard_count
+        )
+        
+        self.cluster_id = cluster_id
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._heartbeat_stop = asyncio.Event()
+        
+        self.db = Database(
+            DATABASE_PATH,
+            event_batch_size=EVENT_BATCH_SIZE,
+            event_flush_interval=EVENT_FLUSH_INTERVAL,
+            event_max_pending=EVENT_MAX_PENDING,
+            settings_cache_size=SETTINGS_CACHE_SIZE,
+            readers=DATABASE_READERS,
+            shard_ids=shard_ids,
+            shard_count=shard_count
+        )
+        self.maintenance = MaintenanceTask(
+            self.db,
+            interval=MAINTENANCE_INTERVAL,
+            analytics_retention_days=ANALYTICS_RETENTION_DAYS,
+            ticket_retention_days=TICKET_RETENTION_DAYS
+        )
+        self.settings_watcher = SettingsWatcher(self.db, interval=SETTINGS_POLL_INTERVAL)
+        self.log_dispatcher = LogDispatcher(
+            linger=LOG_BATCH_LINGER,
+            max_queue=LOG_QUEUE_SIZE,
+            max_messages=LOG_FLUSH_MESSAGES
         )
+        self.message_cache = MessageContentCache(
+            max_bytes=MESSAGE_CACHE_BYTES,
+            max_guild_bytes=MESSAGE_CACHE_GUILD_BYTES
+        )
+        self.command_sync = CommandSyncManager(self, dev_guild_ids=DEV_GUILD_IDS)
         
-        self.db = Database(DATABASE_PATH)
+        self.metrics = MetricsRegistry()
+        self.metrics.add_collector(self._collect_metrics)
+        instrument_database(self.db, self.metrics)
+        self.loop_lag = LoopLagMonitor(self.metrics)
+        # Each cluster worker takes the next port up
+        metrics_port = METRICS_PORT + (cluster_id or 0) if METRICS_PORT else 0
+        self.metrics_server = MetricsServer(self.metrics, METRICS_HOST, metrics_port) if metrics_port else None
+        self._timed_listeners = {}
+        self._commands_synced = False
         self.start_time = datetime.utcnow()
     
     async def setup_hook(self):
         print("Starting setup_hook")
-        await self.db.connect()
+        with self.startup.phase("db.connect"):
+            await self.db.connect(tracer=self.startup)
         print("DB connected")
         
-        cogs_to_load = [
-            "cogs.moderation",
-            "cogs.welcome",
-            "cogs.tickets",
-            "cogs.utility"
-        ]
+        # In a cluster only the first worker prunes, so workers don't
+        # compete for the shared database's write lock.
+        if self.cluster_id in (None, 0):
+            self.maintenance.start()
+        await self.settings_watcher.start()
+        if self.cluster_id is not None:
+            self._heartbeat_task = asyncio.create_task(self._cluster_heartbeat())
         
-        for cog in cogs_to_load:
+        self.loop_lag.start()
+        if self.metrics_server is not None:
             try:
+                await self.metrics_server.start()
+            except OSError as e:
+                print(f"✗ Failed to start metrics server: {e}")
+        
+        # The cogs don't depend on each other, so they load concurrently.
+        with self.startup.phase("extensions"):
+            await asyncio.gather(*(self._load_cog(cog) for cog in ENABLED_COGS))
+    
+    async def _load_cog(self, cog: str):
+        try:
+            with self.startup.phase(f"extension.{cog}"):
                 await self.load_extension(cog)
-                print(f"✓ Loaded {cog}")
-            except Exception as e:
-                print(f"✗ Failed to load {cog}: {e}")
+            print(f"✓ Loaded {cog}")
+        except Exception as e:
+            print(f"✗ Failed to load {cog}: {e}")
+    
+    async def add_cog(self, cog: commands.Cog, **kwargs):
+        instrument_app_commands(cog, self.metrics)
+        await super().add_cog(cog, **kwargs)
+    
+    def add_listener(self, func, name: str = discord.utils.MISSING):
+        name = func.__name__ if name is discord.utils.MISSING else name
+        key = (func, name)
+        if key not in self._timed_listeners:
+            self._timed_listeners[key] = timed(
+                self.metrics,
+                "happy_listener",
+                func,
+                event=name,
+                handler=func.__qualname__
+            )
+        super().add_listener(self._timed_listeners[key], name)
+    
+    def remove_listener(self, func, name: str = discord.utils.MISSING):
+        name = func.__name__ if name is discord.utils.MISSING else name
+        super().remove_listener(self._timed_listeners.pop((func, name), func), name)
+    
+    def _collect_metrics(self):
+        yield "happy_gateway_latency_seconds", {}, self.latency if math.isfinite(self.latency) else 0.0
+        yield "happy_guilds", {}, len(self.guilds)
         
+        if hasattr(self.db, 'events'):
+            for key, value in self.db.events.stats().items():
+                yield f"happy_event_buffer_{key}", {}, value
+        for key, value in self.db.settings_cache.stats().items():
+            yield f"happy_settings_cache_{key}", {}, value
+        for key, value in self.log_dispatcher.stats().items():
+            yield f"happy_log_dispatcher_{key}", {}, value
+        for key, value in self.message_cache.stats().items():
+            yield f"happy_message_cache_{key}", {}, value
+        yield "happy_settings_version", {}, self.settings_watcher.version
+        yield "happy_settings_refreshed", {}, self.settings_watcher.refreshed
     
     async def on_ready(self):
         print(f"✓ Logged in as {self.user} (ID: {self.user.id})")
         print(f"✓ Bot is in {len(self.guilds)} guilds")
         print("━" * 50)
+        
+        if not self.startup.written:
+            self.startup.mark("ready")
+            try:
+                self.startup.write(STARTUP_TRACE_PATH)
+            except OSError as e:
+                print(f"✗ Failed to write startup trace: {e}")
 
+        try:
+            await self.db.sync_guilds([(guild.id, guild.name) for guild in self.guilds])
+        except Exception as e:
+            print(f"✗ Failed to record guilds: {e}")
+        
         await self.change_presence(
             activity=discord.Activity(
                 type=discord.ActivityType.watching,
@@ -55,9 +219,14 @@ class HappyBot(commands.Bot):
             )
         )
 
+        # on_ready fires again after every reconnect; the tree only needs
+        # checking once per process, and only by one worker in a cluster.
+        if self._commands_synced or self.cluster_id not in (None, 0):
+            return
+        
         try:
-            await self.tree.sync()
-            print("✓ Slash commands synced")
+            await self.command_sync.sync()
+            self._commands_synced = True
         except Exception as e:
             print(f"✗ Failed to sync commands: {e}")
     
@@ -66,10 +235,45 @@ class HappyBot(commands.Bot):
         await self.db.log_event(guild.id, "guild_join", f"Bot joined {guild.name}")
     
     async def on_guild_remove(self, guild: discord.Guild):
+        await self.db.remove_guild(guild.id)
         await self.db.log_event(guild.id, "guild_leave", f"Bot left {guild.name}")
     
+    async def _cluster_heartbeat(self):
+        await self.wait_until_ready()
+        while not self._heartbeat_stop.is_set():
+            try:
+                await self.db.update_cluster_status(
+                    self.cluster_id,
+                    list(self.shard_ids or []),
+                    len(self.guilds),
+                    self.latency if math.isfinite(self.latency) else 0.0,
+                    self.start_time
+                )
+            except Exception as e:
+                print(f"✗ Failed to report cluster status: {e}")
+            
+            try:
+                await asyncio.wait_for(self._heartbeat_stop.wait(), timeout=CLUSTER_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    
     async def close(self):
-        await self.db.close()
+        self.loop_lag.stop()
+        try:
+            if self.metrics_server is not None:
+                await self.metrics_server.stop()
+            if self._heartbeat_task is not None:
+                self._heartbeat_stop.set()
+                if self.is_ready():
+                    await self._heartbeat_task
+                else:
+                    self._heartbeat_task.cancel()
+            await self.log_dispatcher.close()
+            await self.maintenance.stop()
+            await self.settings_watcher.stop()
+            await self.db.close()
+        except Exception as e:
+            print(f"✗ Failed to flush database on shutdown: {e}")
         await super().close()
 
 def main():
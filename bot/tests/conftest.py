@@ -0,0 +1,29 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Modules import each other as top-level packages (utils.*, cogs.*), as
+# they do when main.py is run from the bot directory.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import Database
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion on a fresh event loop."""
+    return asyncio.run
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "data" / "test.db")
+
+@pytest.fixture
+def database(db_path):
+    """Open a migrated Database inside the test's own event loop."""
+    async def open_database() -> Database:
+        db = Database(db_path, readers=1)
+        await db.connect()
+        return db
+    return open_database
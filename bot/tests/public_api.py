@@ -0,0 +1,25 @@
+"""Import the dashboard API routers, which live in public/ as Python
+modules with a .js extension and import each other as the `api` package."""
+import importlib.machinery
+import importlib.util
+import os
+import sys
+import types
+
+PUBLIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "public")
+
+def load(name: str) -> types.ModuleType:
+    qualified = f"api.{name}"
+    if qualified in sys.modules:
+        return sys.modules[qualified]
+    if "api" not in sys.modules:
+        package = types.ModuleType("api")
+        package.__path__ = [PUBLIC_DIR]
+        sys.modules["api"] = package
+    
+    loader = importlib.machinery.SourceFileLoader(qualified, os.path.join(PUBLIC_DIR, f"{name}.js"))
+    spec = importlib.util.spec_from_loader(qualified, loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[qualified] = module
+    loader.exec_module(module)
+    return module
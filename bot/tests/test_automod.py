@@ -0,0 +1,114 @@
+from utils.automod import AutoModEngine, compile_word_list
+
+GUILD_ID = 1
+
+def settings(**overrides):
+    return {
+        'automod_flood_limit': 0,
+        'automod_mention_limit': 0,
+        'automod_words': None,
+        **overrides
+    }
+
+def test_flood_limit_is_a_token_bucket():
+    engine = AutoModEngine(flood_window=5.0)
+    rules = settings(automod_flood_limit=5)
+    
+    burst = [engine.check(GUILD_ID, 1, f"message {i}", 0, rules, now=0.0) for i in range(6)]
+    # One token back per second at a limit of 5 per 5 seconds
+    recovered = engine.check(GUILD_ID, 1, "later", 0, rules, now=2.0)
+    
+    assert burst == [None] * 5 + ["flood"]
+    assert recovered is None
+    assert engine.violations == {"flood": 1}
+
+def test_mention_limit_counts_mentions_not_messages():
+    engine = AutoModEngine(mention_window=10.0)
+    rules = settings(automod_mention_limit=8)
+    
+    first = engine.check(GUILD_ID, 1, "hey", 5, rules, now=0.0)
+    second = engine.check(GUILD_ID, 1, "hey you", 5, rules, now=1.0)
+    refilled = engine.check(GUILD_ID, 1, "hey all", 5, rules, now=11.0)
+    
+    assert first is None
+    assert second == "mention spam"
+    assert refilled is None
+
+def test_duplicates_within_the_window():
+    engine = AutoModEngine(duplicate_window=30.0, duplicate_limit=3)
+    rules = settings()
+    
+    repeated = [engine.check(GUILD_ID, 1, "Buy now", 0, rules, now=float(i)) for i in range(3)]
+    # Case and surrounding whitespace do not make a message new
+    variants = [
+        engine.check(GUILD_ID, 2, content, 0, rules, now=float(i))
+        for i, content in enumerate(("buy now", "  BUY NOW ", "Buy Now"))
+    ]
+    spaced = [engine.check(GUILD_ID, 3, "Buy now", 0, rules, now=i * 31.0) for i in range(3)]
+    
+    assert repeated == [None, None, "duplicate messages"]
+    assert variants == [None, None, "duplicate messages"]
+    assert spaced == [None, None, None]
+
+def test_words_match_whole_tokens():
+    matcher = compile_word_list("spam, Scam\nbad")
+    
+    assert matcher.words == {"spam", "scam", "bad"}
+    assert matcher.search("what a SCAM.")
+    assert matcher.search("bad!")
+    assert not matcher.search("badge of spammers")
+
+def test_phrases_match_consecutive_tokens():
+    matcher = compile_word_list("free nitro, click this link now")
+    
+    assert matcher.phrases == {2: {("free", "nitro")}, 4: {("click", "this", "link", "now")}}
+    assert matcher.search("Get FREE   nitro here")
+    assert matcher.search("please click this link now!!")
+    assert not matcher.search("nitro is not free")
+    assert not matcher.search("click this other link now")
+
+def test_entries_that_are_not_words_use_the_regex_fallback():
+    matcher = compile_word_list("f*ck, free nitro")
+    
+    assert matcher.fallback is not None
+    assert "f*ck" not in matcher.words
+    assert matcher.search("what the F*CK")
+    assert not matcher.search("f ck")
+    assert compile_word_list("spam, free nitro").fallback is None
+
+def test_word_list_is_compiled_once_per_text():
+    engine = AutoModEngine()
+    rules = settings(automod_words="spam")
+    
+    first = engine.check(GUILD_ID, 1, "spam", 0, rules, now=0.0)
+    matcher = engine._matchers[GUILD_ID][1]
+    engine.check(GUILD_ID, 2, "more spam", 0, rules, now=0.0)
+    kept = engine._matchers[GUILD_ID][1] is matcher
+    engine.check(GUILD_ID, 3, "eggs", 0, settings(automod_words="eggs"), now=0.0)
+    
+    assert first == "banned word"
+    assert kept
+    assert engine._matchers[GUILD_ID][1] is not matcher
+
+def test_least_recently_seen_member_is_evicted():
+    engine = AutoModEngine(max_users=3)
+    rules = settings(automod_flood_limit=5)
+    
+    for user_id in (1, 2, 3):
+        engine.check(GUILD_ID, user_id, "hi", 0, rules, now=0.0)
+    engine.check(GUILD_ID, 1, "hi again", 0, rules, now=1.0)
+    engine.check(GUILD_ID, 4, "hi", 0, rules, now=1.0)
+    
+    assert list(engine._states) == [(GUILD_ID, 3), (GUILD_ID, 1), (GUILD_ID, 4)]
+    assert engine.stats()['evictions'] == 1
+    assert engine.stats()['tracked_users'] == 3
+
+def test_a_burst_earns_one_penalty_per_cooldown():
+    engine = AutoModEngine()
+    engine.check(GUILD_ID, 1, "hi", 0, settings(), now=0.0)
+    
+    punished = [engine.should_punish(GUILD_ID, 1, 60.0, now=t) for t in (0.0, 30.0, 59.9, 60.0)]
+    
+    assert punished == [True, False, False, True]
+    # A member the engine no longer tracks is always punishable
+    assert engine.should_punish(GUILD_ID, 2, 60.0, now=0.0)
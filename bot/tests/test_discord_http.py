@@ -0,0 +1,120 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+from aiohttp import web
+
+import public_api
+
+auth = public_api.load("auth")
+
+@asynccontextmanager
+async def stand_in(handler):
+    """A local stand-in for the Discord API serving every path with `handler`."""
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    
+    client = auth.DiscordHTTP(base_url=f"http://127.0.0.1:{port}", retries=3)
+    try:
+        yield client
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+async def guilds(request):
+    return web.json_response([{'id': "1", 'name': "Guild", 'permissions': "8"}])
+
+def test_route_state_is_dropped_after_a_load_of_distinct_tokens(run):
+    async def user(client, token):
+        # One dashboard user at a time per token, as the guild list does
+        return [
+            await client.get("/users/@me/guilds", headers={'Authorization': f"Bearer {token}"})
+            for _ in range(10)
+        ]
+    
+    async def scenario():
+        async with stand_in(guilds) as client:
+            responses = await asyncio.gather(*(user(client, f"token{i}") for i in range(100)))
+            return client, [response for batch in responses for response in batch]
+    
+    client, responses = run(scenario())
+    
+    assert len(responses) == 1000
+    assert all(response.status_code == 200 for response in responses)
+    assert client._route_locks == {}
+    assert client._in_flight == {}
+    assert client._reset_at == {}
+
+def test_pooled_client_beats_a_client_per_request(run):
+    fetches = 50
+    
+    async def scenario():
+        async with stand_in(guilds) as client:
+            url = client._url("/users/@me/guilds")
+            headers = {'Authorization': "Bearer token"}
+            
+            # What callback() and get_user_guilds() did before: a new
+            # client, so a new connection, for every call
+            start = time.perf_counter()
+            for _ in range(fetches):
+                async with httpx.AsyncClient(timeout=10.0) as fresh:
+                    assert (await fresh.get(url, headers=headers)).status_code == 200
+            per_request = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            for _ in range(fetches):
+                assert (await client.get(url, headers=headers)).status_code == 200
+            pooled = time.perf_counter() - start
+            return per_request, pooled
+    
+    per_request, pooled = run(scenario())
+    
+    # About 25x locally: a new client builds an SSL context and connection
+    # every time. 3x leaves room for a noisy machine.
+    assert pooled * 3 < per_request
+
+def test_exhausted_route_is_kept_until_its_reset(run):
+    async def limited(request):
+        if request.headers['Authorization'] != "Bearer a":
+            return web.json_response({})
+        return web.json_response({}, headers={'X-RateLimit-Remaining': "0", 'X-RateLimit-Reset-After': "0.2"})
+    
+    async def scenario():
+        async with stand_in(limited) as client:
+            await client.get("/users/@me", headers={'Authorization': "Bearer a"})
+            held = len(client._route_locks), len(client._reset_at)
+            
+            await asyncio.sleep(0.25)
+            client._next_sweep = 0.0
+            await client.get("/users/@me", headers={'Authorization': "Bearer b"})
+            return client, held
+    
+    client, held = run(scenario())
+    
+    assert held == (1, 1)
+    assert client._route_locks == {}
+    assert client._reset_at == {}
+
+def test_rate_limited_request_is_retried(run):
+    calls = []
+    
+    async def flaky(request):
+        calls.append(request.path)
+        if len(calls) == 1:
+            return web.json_response({'retry_after': 0.05}, status=429)
+        return web.json_response({'id': "1"})
+    
+    async def scenario():
+        async with stand_in(flaky) as client:
+            return await client.get("/users/@me", headers={'Authorization': "Bearer a"})
+    
+    response = run(scenario())
+    
+    assert response.status_code == 200
+    assert len(calls) == 2
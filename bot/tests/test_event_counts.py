@@ -0,0 +1,84 @@
+GUILD_ID = 42
+
+async def seed(db):
+    conn = db.pool.writer
+    # One event every 10 minutes for the last 30 hours, plus another guild's
+    await conn.executemany(
+        "INSERT INTO analytics (guild_id, event_type, created_at) VALUES (?, ?, datetime('now', ?))",
+        [
+            (guild_id, "member_join" if minutes % 30 else "message_delete", f"-{minutes} minutes")
+            for guild_id in (GUILD_ID, GUILD_ID + 1)
+            for minutes in range(0, 30 * 60, 10)
+        ]
+    )
+    await conn.commit()
+    await db.rebuild_event_counts(GUILD_ID)
+
+async def raw_counts(db, hours):
+    async with db.pool.writer.execute(
+        """
+        SELECT event_type, COUNT(*) FROM analytics
+        WHERE guild_id = ? AND created_at >= datetime('now', ?) GROUP BY event_type
+        """,
+        (GUILD_ID, f"-{hours} hours")
+    ) as cursor:
+        return {event_type: total async for event_type, total in cursor}
+
+def test_recent_counts_match_the_raw_rows(run, database):
+    async def scenario():
+        db = await database()
+        try:
+            await seed(db)
+            return [
+                (await db.get_recent_event_counts(GUILD_ID, hours), await raw_counts(db, hours))
+                for hours in (0, 1, 6, 24)
+            ]
+        finally:
+            await db.close()
+    
+    for counts, expected in run(scenario()):
+        assert counts == expected
+
+def test_recent_counts_are_served_from_hourly_rollups(run, database):
+    async def scenario():
+        db = await database()
+        try:
+            await seed(db)
+            before = await db.get_recent_event_counts(GUILD_ID, 24)
+            # Raw rows of whole hours inside the window are not read again
+            await db.pool.writer.execute(
+                """
+                DELETE FROM analytics WHERE guild_id = ?
+                AND created_at >= strftime('%Y-%m-%d %H:00:00', 'now', '-22 hours')
+                AND created_at < strftime('%Y-%m-%d %H:00:00', 'now')
+                """,
+                (GUILD_ID,)
+            )
+            await db.pool.writer.commit()
+            return before, await db.get_recent_event_counts(GUILD_ID, 24)
+        finally:
+            await db.close()
+    
+    before, after = run(scenario())
+    
+    assert sum(before.values()) >= 24 * 6
+    assert after == before
+
+def test_flushed_events_update_the_hourly_rollups(run, database):
+    async def scenario():
+        db = await database()
+        try:
+            await db.log_events([(GUILD_ID, "member_join", None)] * 5 + [(GUILD_ID, "message_delete", None)])
+            await db.events.flush()
+            async with db.pool.writer.execute(
+                "SELECT SUM(count) FROM analytics_hourly WHERE guild_id = ?", (GUILD_ID,)
+            ) as cursor:
+                hourly = (await cursor.fetchone())[0]
+            return hourly, await db.get_recent_event_counts(GUILD_ID, 24)
+        finally:
+            await db.close()
+    
+    hourly, counts = run(scenario())
+    
+    assert hourly == 6
+    assert counts == {"member_join": 5, "message_delete": 1}
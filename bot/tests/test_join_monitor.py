@@ -0,0 +1,79 @@
+import asyncio
+
+from benchmarks.fakes import FakeGuild
+from utils.join_monitor import JoinMonitor
+
+THRESHOLD = 10
+WINDOW = 0.2
+
+def join(monitor, guild, channel, name):
+    """What Welcome.on_member_join does: digest during a burst, else welcome."""
+    member = guild.add_member(name)
+    if monitor.record(guild.id, THRESHOLD, WINDOW):
+        monitor.add_to_digest(guild.id, channel, member, WINDOW)
+    else:
+        channel.sent.append({'content': f"Welcome {member.mention}"})
+
+def digest_counts(channel):
+    return [
+        int(message['embed'].title.split()[1])
+        for message in channel.sent if 'embed' in message
+    ]
+
+def test_join_storm_is_digested_and_ends(run):
+    monitor = JoinMonitor(digest_interval=0.05, sample_size=5)
+    raided, quiet = FakeGuild("Raided"), FakeGuild("Quiet")
+    raided_channel, quiet_channel = raided.add_channel("welcome"), quiet.add_channel("welcome")
+    
+    async def storm():
+        for i in range(500):
+            join(monitor, raided, raided_channel, f"raider{i}")
+            if i % 100 == 0:
+                join(monitor, quiet, quiet_channel, f"regular{i}")
+        in_raid = monitor.is_raid(raided.id)
+        # Well past the window, so the next digest ends the burst
+        await asyncio.sleep(WINDOW + 0.2)
+        await monitor.close()
+        return in_raid
+    
+    in_raid = run(storm())
+    
+    welcomes = [message for message in raided_channel.sent if 'embed' not in message]
+    counts = digest_counts(raided_channel)
+    
+    assert in_raid
+    # Individual welcomes stop at the join that completes the burst
+    assert len(welcomes) == THRESHOLD - 1
+    # Every other join is counted in exactly one digest, sent as a handful of messages
+    assert sum(counts) == 500 - (THRESHOLD - 1)
+    assert len(counts) <= 2
+    assert "and 486 more" in raided_channel.sent[THRESHOLD - 1]['embed'].description
+    assert monitor.raids_started == 1
+    assert monitor.digests_sent == len(counts)
+    
+    # The burst is over and the digest task has stopped
+    assert not monitor.is_raid(raided.id)
+    assert monitor._states[raided.id].task is None
+    
+    # A quiet guild alongside the storm is welcomed as normal
+    assert not monitor.is_raid(quiet.id)
+    assert len(quiet_channel.sent) == 5
+    assert digest_counts(quiet_channel) == []
+
+def test_slow_joins_never_trigger_digest_mode():
+    monitor = JoinMonitor()
+    
+    raids = [monitor.record(1, THRESHOLD, WINDOW, now=i * WINDOW) for i in range(100)]
+    
+    assert not any(raids)
+    assert monitor.raids_started == 0
+
+def test_idle_guild_state_is_swept():
+    monitor = JoinMonitor(idle_after=60)
+    
+    for guild_id in range(999):
+        monitor.record(guild_id, THRESHOLD, WINDOW, now=0.0)
+    # The 1000th record sweeps every guild idle for longer than idle_after
+    monitor.record(999, THRESHOLD, WINDOW, now=120.0)
+    
+    assert list(monitor._states) == [999]
@@ -0,0 +1,52 @@
+import asyncio
+
+import discord
+
+from benchmarks.fakes import FakeGuild
+from utils.log_dispatcher import LogDispatcher, MAX_EMBED_CHARACTERS, MAX_EMBEDS_PER_MESSAGE
+
+def deleted(i: int, size: int = 100) -> discord.Embed:
+    return discord.Embed(title="🗑️ Message Deleted", description=f"{i} " + "x" * size)
+
+def flush(dispatcher: LogDispatcher, channel, embeds):
+    async def scenario():
+        for embed in embeds:
+            dispatcher.submit(channel, embed)
+        await dispatcher.close()
+    asyncio.run(scenario())
+
+def test_large_burst_is_capped_and_summarized():
+    channel = FakeGuild().add_channel("logs")
+    dispatcher = LogDispatcher(linger=0.01, max_messages=3)
+    
+    flush(dispatcher, channel, [deleted(i) for i in range(500)])
+    
+    assert len(channel.sent) == 3
+    summary = channel.sent[-1]['embeds'][-1]
+    shown = sum(len(message['embeds']) for message in channel.sent) - 1
+    assert summary.title == f"📋 ...and {500 - shown} more events"
+    assert "🗑️ Message Deleted × " in summary.description
+    assert dispatcher.summarized == 500 - shown
+    assert dispatcher.stats()['queue_depth'] == 0
+
+def test_every_message_fits_discord_limits():
+    channel = FakeGuild().add_channel("logs")
+    dispatcher = LogDispatcher(linger=0.01, max_messages=3)
+    
+    # Near the 4096-character description limit, so size decides the packing
+    flush(dispatcher, channel, [deleted(i, size=4000) for i in range(40)])
+    
+    for message in channel.sent:
+        assert len(message['embeds']) <= MAX_EMBEDS_PER_MESSAGE
+        assert sum(len(embed) for embed in message['embeds']) <= MAX_EMBED_CHARACTERS
+    assert len(channel.sent) == 3
+
+def test_small_burst_is_sent_whole():
+    channel = FakeGuild().add_channel("logs")
+    dispatcher = LogDispatcher(linger=0.01)
+    
+    flush(dispatcher, channel, [deleted(i) for i in range(12)])
+    
+    assert [len(message['embeds']) for message in channel.sent] == [10, 2]
+    assert dispatcher.summarized == 0
+    assert dispatcher.sent_embeds == 12
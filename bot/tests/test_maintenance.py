@@ -0,0 +1,85 @@
+from utils import database as database_module
+from utils.maintenance import MaintenanceTask
+
+async def seed(db):
+    conn = db.pool.writer
+    # 120 guilds with recent rows, every third also with expired ones
+    await conn.executemany(
+        "INSERT INTO analytics (guild_id, event_type, created_at) VALUES (?, 'x', datetime('now', '-1 hours'))",
+        [(guild_id,) for guild_id in range(120)]
+    )
+    await conn.executemany(
+        "INSERT INTO analytics (guild_id, event_type, created_at) VALUES (?, 'x', datetime('now', '-200 days'))",
+        [(guild_id,) for guild_id in range(0, 120, 3) for _ in range(5)]
+    )
+    await conn.execute(
+        "INSERT INTO analytics (guild_id, event_type, created_at) VALUES (NULL, 'x', datetime('now', '-200 days'))"
+    )
+    await conn.executemany(
+        "INSERT INTO tickets (guild_id, status, closed_at) VALUES (?, ?, datetime('now', ?))",
+        [(1, 'closed', '-40 days'), (2, 'closed', '-1 days'), (3, 'open', None)]
+    )
+    # Guild 0 keeps everything; guild 3 keeps 365 days
+    await conn.executemany(
+        "INSERT INTO guild_settings (guild_id, analytics_retention_days) VALUES (?, ?)",
+        [(0, 0), (3, 365)]
+    )
+    await conn.commit()
+
+async def remaining(db, query):
+    async with db.pool.writer.execute(query) as cursor:
+        return (await cursor.fetchone())[0]
+
+def test_only_guilds_with_expired_rows_are_pruned(run, database):
+    async def scenario():
+        db = await database()
+        try:
+            await seed(db)
+            return (
+                await db.expired_event_guilds(90),
+                await db.expired_ticket_guilds(30)
+            )
+        finally:
+            await db.close()
+    
+    events, tickets = run(scenario())
+    
+    # 40 guilds with old rows, minus the two whose retention keeps them
+    assert len(events) == 38 + 1
+    assert (0, 0) not in events and 3 not in [guild_id for guild_id, _ in events]
+    assert (None, 90) in events
+    assert tickets == [(1, 30)]
+
+def test_pass_commits_in_bounded_transactions(run, database, monkeypatch):
+    monkeypatch.setattr(database_module, "PRUNE_GUILDS_PER_TRANSACTION", 10)
+    
+    async def scenario():
+        db = await database()
+        try:
+            await seed(db)
+            transactions = []
+            prune_guilds = db._prune_guilds
+            
+            async def counted(delete, retention, batch_size):
+                deleted, done = await prune_guilds(delete, retention, batch_size)
+                transactions.append((deleted, done))
+                return deleted, done
+            db._prune_guilds = counted
+            
+            maintenance = MaintenanceTask(db, batch_size=50, batch_pause=0)
+            report = await maintenance.run_pass()
+            old = await remaining(db, "SELECT COUNT(*) FROM analytics WHERE created_at < datetime('now', '-90 days')")
+            total = await remaining(db, "SELECT COUNT(*) FROM analytics")
+            return report, transactions, old, total
+        finally:
+            await db.close()
+    
+    report, transactions, old, total = run(scenario())
+    
+    assert report['events_removed'] == 38 * 5 + 1
+    assert report['tickets_removed'] == 1
+    # Kept by guilds 0 and 3's retention settings
+    assert old == 2 * 5
+    assert total == 120 + 2 * 5
+    assert all(deleted <= 50 and done <= 10 for deleted, done in transactions)
+    assert len(transactions) >= 4 + 1
@@ -0,0 +1,132 @@
+import asyncio
+from datetime import timedelta
+
+import discord
+
+from benchmarks.fakes import FakeGuild, FakeInteraction
+from cogs.moderation import MassActionView
+from utils.mass_action import TargetSelector, MassActionJob
+
+def make_guild():
+    guild = FakeGuild()
+    moderator = guild.add_member("moderator", role_position=10)
+    raiders = [
+        guild.add_member(f"raider{i}", cached=False, account_age=timedelta(hours=1))
+        for i in range(5)
+    ]
+    # New account ranked above the moderator, only known to the API
+    admin = guild.add_member("admin", cached=False, account_age=timedelta(hours=1), role_position=50)
+    return guild, moderator, raiders, admin
+
+def test_member_criteria_load_uncached_members(run):
+    guild, moderator, raiders, admin = make_guild()
+    selector = TargetSelector(account_younger_than=timedelta(days=1))
+    
+    targets = run(selector.select(guild, moderator, limit=100))
+    
+    assert guild.chunked
+    assert {target.id for target in targets} == {raider.id for raider in raiders}
+
+def test_listed_ids_are_rank_checked_when_uncached(run):
+    guild, moderator, raiders, admin = make_guild()
+    stranger_id = 999
+    selector = TargetSelector(user_ids=[raiders[0].id, admin.id, moderator.id, stranger_id])
+    
+    targets = run(selector.select(guild, moderator, limit=100))
+    
+    ids = [target.id for target in targets]
+    assert admin.id not in ids
+    assert moderator.id not in ids
+    assert raiders[0].id in ids
+    # Not a member at all: banned by ID
+    assert stranger_id in ids
+    assert isinstance(targets[ids.index(stranger_id)], discord.Object)
+    assert set(guild.fetched) == {raiders[0].id, admin.id, stranger_id}
+
+def test_owner_bypasses_role_check(run):
+    guild, moderator, raiders, admin = make_guild()
+    guild.owner_id = moderator.id
+    selector = TargetSelector(user_ids=[admin.id])
+    
+    targets = run(selector.select(guild, moderator, limit=100))
+    
+    assert [target.id for target in targets] == [admin.id]
+
+def test_limit_caps_selection(run):
+    guild, moderator, raiders, admin = make_guild()
+    selector = TargetSelector(account_younger_than=timedelta(days=1))
+    
+    assert len(run(selector.select(guild, moderator, limit=2))) == 2
+
+def test_job_bans_targets_and_writes_audit_rows(run, database):
+    async def scenario():
+        db = await database()
+        try:
+            guild, moderator, raiders, admin = make_guild()
+            targets = await TargetSelector(account_younger_than=timedelta(days=1)).select(guild, moderator, 100)
+            job = MassActionJob(db, guild, moderator, "ban", targets, "raid", concurrency=3)
+            await job.run()
+            
+            counts = await db.get_recent_event_counts(guild.id)
+            return guild, raiders, job, counts
+        finally:
+            await db.close()
+    
+    guild, raiders, job, counts = run(scenario())
+    
+    assert job.status == "finished"
+    assert sorted(guild.banned) == sorted(raider.id for raider in raiders)
+    assert counts.get("moderation_ban") == len(raiders)
+
+def test_dry_run_touches_nobody(run):
+    guild, moderator, raiders, admin = make_guild()
+    job = MassActionJob(None, guild, moderator, "kick", raiders, "raid", dry_run=True)
+    
+    run(job.run())
+    
+    assert job.status == "dry run"
+    assert guild.kicked == []
+
+def test_view_stops_when_the_job_ends(run, database):
+    async def scenario():
+        db = await database()
+        try:
+            guild, moderator, raiders, admin = make_guild()
+            job = MassActionJob(db, guild, moderator, "kick", raiders, "raid")
+            view = MassActionView(job)
+            interaction = FakeInteraction(guild, moderator, guild.add_channel("mod"))
+            
+            await view.confirm.callback(interaction)
+            listening = not view.is_finished()
+            await view.task
+            await asyncio.sleep(0)
+            return guild, raiders, view, listening
+        finally:
+            await db.close()
+    
+    guild, raiders, view, listening = run(scenario())
+    
+    assert listening
+    assert sorted(guild.kicked) == sorted(raider.id for raider in raiders)
+    assert view.is_finished()
+
+def test_unconfirmed_view_disables_its_buttons_on_timeout(run):
+    async def scenario():
+        guild, moderator, raiders, admin = make_guild()
+        job = MassActionJob(None, guild, moderator, "ban", raiders, "raid")
+        view = MassActionView(job)
+        view.interaction = FakeInteraction(guild, moderator, guild.add_channel("mod"))
+        
+        # What discord.py does when the 300 second timeout expires
+        view._dispatch_timeout()
+        timed_out = await view.wait()
+        await asyncio.sleep(0)
+        return guild, job, view, timed_out
+    
+    guild, job, view, timed_out = run(scenario())
+    
+    assert timed_out
+    assert all(item.disabled for item in view.children)
+    assert view.interaction.sent == [{'view': view}]
+    assert job.status == "pending"
+    assert guild.banned == []
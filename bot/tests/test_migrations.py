@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from utils import migrations
+from utils.migrations import MIGRATIONS
+
+# The schema Database.create_tables built before migrations existed;
+# databases created by it have user_version 0.
+OLD_SCHEMA = '''
+CREATE TABLE guilds (
+    guild_id INTEGER PRIMARY KEY,
+    name TEXT,
+    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE guild_settings (
+    guild_id INTEGER PRIMARY KEY,
+    welcome_enabled INTEGER DEFAULT 0,
+    welcome_channel_id INTEGER,
+    welcome_message TEXT DEFAULT 'Welcome {user} to {guild}!',
+    leave_enabled INTEGER DEFAULT 0,
+    leave_channel_id INTEGER,
+    log_enabled INTEGER DEFAULT 0,
+    log_channel_id INTEGER,
+    ticket_enabled INTEGER DEFAULT 0,
+    ticket_category_id INTEGER,
+    FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
+);
+CREATE TABLE warns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER,
+    user_id INTEGER,
+    moderator_id INTEGER,
+    reason TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
+);
+CREATE TABLE tickets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER,
+    channel_id INTEGER,
+    user_id INTEGER,
+    status TEXT DEFAULT 'open',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    closed_at TIMESTAMP,
+    FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
+);
+CREATE TABLE analytics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER,
+    event_type TEXT,
+    event_data TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
+);
+'''
+
+GUILD_ID = 1
+USER_ID = 10
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What each cluster worker does at startup
+WORKER = """
+import asyncio, sys
+sys.path.insert(0, sys.argv[1])
+from utils.database import Database
+
+async def main():
+    db = Database(sys.argv[2], readers=1)
+    await db.connect()
+    await db.close()
+
+asyncio.run(main())
+"""
+
+@pytest.fixture
+def old_database(db_path):
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(OLD_SCHEMA)
+        conn.execute("INSERT INTO guilds (guild_id, name) VALUES (?, 'Old Guild')", (GUILD_ID,))
+        conn.execute(
+            "INSERT INTO guild_settings (guild_id, welcome_enabled, welcome_message) VALUES (?, 1, 'Hi {user}')",
+            (GUILD_ID,)
+        )
+        conn.executemany(
+            "INSERT INTO warns (guild_id, user_id, moderator_id, reason) VALUES (?, ?, 2, ?)",
+            [(GUILD_ID, USER_ID, f"reason {i}") for i in range(3)]
+        )
+        conn.executemany(
+            "INSERT INTO analytics (guild_id, event_type, event_data) VALUES (?, ?, '')",
+            [(GUILD_ID, "member_join")] * 4 + [(GUILD_ID, "message_delete")]
+        )
+    conn.close()
+    return db_path
+
+def schema(db_path):
+    with sqlite3.connect(db_path) as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    return version, indexes
+
+def test_old_database_is_migrated_forward(run, database, old_database):
+    async def scenario():
+        db = await database()
+        try:
+            return (
+                await db.get_guild_settings(GUILD_ID),
+                await db.get_warns(GUILD_ID, USER_ID),
+                await db.get_warn_count(GUILD_ID, USER_ID),
+                await db.get_event_counts(GUILD_ID)
+            )
+        finally:
+            await db.close()
+    
+    settings, warns, warn_count, event_counts = run(scenario())
+    version, indexes = schema(old_database)
+    
+    assert version == MIGRATIONS[-1][0]
+    assert {"idx_warns_guild_user", "idx_analytics_guild_created", "idx_tickets_guild_status"} <= indexes
+    
+    # Existing rows survive and new columns take their defaults
+    assert settings['welcome_enabled'] == 1
+    assert settings['welcome_message'] == "Hi {user}"
+    assert settings['raid_join_threshold'] == 10
+    assert settings['leave_message'] == "{user} has left the server"
+    assert [warn['reason'] for warn in warns] == ["reason 2", "reason 1", "reason 0"]
+    
+    # Counters and rollups are backfilled from the existing rows
+    assert warn_count == 3
+    assert event_counts == {"member_join": 4, "message_delete": 1}
+
+def test_migrated_database_is_left_alone_on_reconnect(run, database, old_database, capsys):
+    async def connect_twice():
+        await (await database()).close()
+        capsys.readouterr()
+        db = await database()
+        applied = await db.migrate()
+        await db.close()
+        return applied
+    
+    applied = run(connect_twice())
+    
+    assert applied == []
+    assert "Applied migration" not in capsys.readouterr().out
+    assert schema(old_database)[0] == MIGRATIONS[-1][0]
+
+def test_failed_migration_rolls_back_to_the_last_version(run, database, old_database, monkeypatch):
+    broken = (MIGRATIONS[-1][0] + 1, "broken", ("CREATE TABLE half_done (a)", "NOT SQL"))
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS + [broken])
+    
+    with pytest.raises(RuntimeError, match="broken"):
+        run(database())
+    
+    version, _ = schema(old_database)
+    with sqlite3.connect(old_database) as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert version == MIGRATIONS[-1][0]
+    assert "half_done" not in tables
+
+def test_workers_started_together_migrate_once(db_path):
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, BOT_DIR, db_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT
+        )
+        for _ in range(4)
+    ]
+    outputs = [worker.communicate(timeout=60)[0].decode() for worker in workers]
+    
+    assert [worker.returncode for worker in workers] == [0] * 4, "\n".join(outputs)
+    # Every migration was applied by exactly one of them
+    applied = "".join(outputs)
+    for version, description, _ in MIGRATIONS:
+        assert applied.count(f"Applied migration {version}: {description}") == 1
+    assert schema(db_path)[0] == MIGRATIONS[-1][0]
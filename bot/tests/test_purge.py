@@ -0,0 +1,46 @@
+import asyncio
+from types import SimpleNamespace
+
+from benchmarks.fakes import FakeGuild, FakeInteraction
+from cogs.moderation import Moderation, PurgeView
+
+def test_purge_stops_its_view_and_logs_when_finished(run, database):
+    async def scenario():
+        db = await database()
+        try:
+            guild = FakeGuild()
+            moderator = guild.add_member("moderator")
+            spammer = guild.add_member("spammer")
+            channel = guild.add_channel("general")
+            for i in range(150):
+                channel.add_message(spammer if i % 3 else moderator, f"message {i}")
+            
+            cog = Moderation(SimpleNamespace(db=db))
+            interaction = FakeInteraction(guild, moderator, channel)
+            await cog.purge.callback(cog, interaction, amount=50, user=spammer)
+            
+            job = cog.purge_jobs[channel.id]
+            view = interaction.sent[0]['view']
+            listening = not view.is_finished()
+            await job.start()
+            await asyncio.sleep(0)
+            logging = set(cog.pending_logs)
+            await asyncio.gather(*logging)
+            
+            await db.events.flush()
+            counts = await db.get_recent_event_counts(guild.id)
+            return cog, channel, spammer, job, view, listening, logging, counts
+        finally:
+            await db.close()
+    
+    cog, channel, spammer, job, view, listening, logging, counts = run(scenario())
+    
+    assert listening and isinstance(view, PurgeView)
+    assert job.status == "finished"
+    assert job.deleted == 50
+    assert sum(message.author is spammer for message in channel.messages) == 100 - 50
+    # Stopped once the job ended, so its Cancel button is no longer handled
+    assert view.is_finished()
+    assert cog.purge_jobs == {}
+    assert len(logging) == 1 and cog.pending_logs == set()
+    assert counts == {"moderation_purge": 1}
@@ -0,0 +1,33 @@
+from utils.database import Database
+
+SHARD_COUNT = 4
+
+def guild_on_shard(shard_id: int, n: int) -> int:
+    return ((n * SHARD_COUNT + shard_id) << 22) | n
+
+def test_worker_warms_only_its_own_shards(run, db_path):
+    guild_ids = [guild_on_shard(shard_id, n) for shard_id in range(SHARD_COUNT) for n in range(1, 6)]
+    
+    async def scenario():
+        db = Database(db_path, readers=1)
+        await db.connect()
+        try:
+            for guild_id in guild_ids:
+                await db.update_guild_settings(guild_id, {'welcome_enabled': 1})
+        finally:
+            await db.close()
+        
+        worker = Database(db_path, readers=1, shard_ids=[1, 2], shard_count=SHARD_COUNT)
+        await worker.connect()
+        try:
+            cached = set(worker.settings_cache._entries)
+            # Guilds on other shards are still read through on demand
+            other = await worker.get_guild_settings(guild_on_shard(3, 1))
+            return cached, other
+        finally:
+            await worker.close()
+    
+    cached, other = run(scenario())
+    
+    assert cached == {guild_id for guild_id in guild_ids if (guild_id >> 22) % SHARD_COUNT in (1, 2)}
+    assert other['welcome_enabled'] == 1
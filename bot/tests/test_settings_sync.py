@@ -0,0 +1,155 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS_DIR = os.path.join(BOT_DIR, "tests")
+
+GUILD_ID = 1234
+TOKEN = "dashboard-token"
+CHANGES = 6
+POLL_INTERVAL = 0.25
+WRITE_DELAY = 0.05
+# Scheduling, the poll query and the cache refresh on a busy test machine
+SLACK = 0.5
+
+# The bot side: its Database and SettingsWatcher, reading the settings cache
+# the way handlers do and reporting when each version becomes visible.
+BOT = f"""
+import asyncio, sys, time
+sys.path.insert(0, sys.argv[1])
+from config import SETTINGS_POLL_INTERVAL
+from utils.database import Database
+from utils.settings_watcher import SettingsWatcher
+
+async def main():
+    db = Database(sys.argv[2], readers=1)
+    await db.connect()
+    await db.update_guild_settings({GUILD_ID}, {{'welcome_message': "v0"}})
+    watcher = SettingsWatcher(db, interval=SETTINGS_POLL_INTERVAL)
+    await watcher.start()
+    print("READY", flush=True)
+    
+    seen = 0
+    deadline = time.monotonic() + 30
+    while seen < {CHANGES} and time.monotonic() < deadline:
+        settings = await db.get_guild_settings({GUILD_ID})
+        version = int(settings['welcome_message'][1:])
+        if version > seen:
+            seen = version
+            print(f"SEEN {{version}} {{time.time()}}", flush=True)
+        await asyncio.sleep(0.005)
+    
+    await watcher.stop()
+    await db.close()
+
+asyncio.run(main())
+"""
+
+# The dashboard side: the config router behind a real HTTP server
+API = f"""
+import asyncio, sys, time
+sys.path.insert(0, sys.argv[1])
+import public_api
+import uvicorn
+from fastapi import FastAPI
+
+auth = public_api.load("auth")
+config = public_api.load("config")
+app = FastAPI()
+app.include_router(config.router, prefix="/api/config")
+
+async def main():
+    await auth.sessions.set("{TOKEN}", {{
+        'expires_at': time.time() + 3600,
+        'guilds': [{{'id': "{GUILD_ID}", 'can_manage': True}}]
+    }})
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=int(sys.argv[2]), log_level="warning"))
+    await server.serve()
+
+asyncio.run(main())
+"""
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for_api(client: httpx.Client, api: subprocess.Popen):
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        assert api.poll() is None, api.communicate()[0].decode()
+        try:
+            client.get(f"/api/config/{GUILD_ID}")
+            return
+        except httpx.TransportError:
+            time.sleep(0.05)
+    raise TimeoutError("API did not start")
+
+def test_dashboard_write_reaches_the_bot_process(tmp_path, record_property):
+    """Dashboard API and bot as separate processes on one database file."""
+    db_path = str(tmp_path / "data" / "happy.db")
+    env = {
+        **os.environ,
+        'DATABASE_PATH': db_path,
+        'SESSION_DB_PATH': str(tmp_path / "sessions.db"),
+        'SETTINGS_POLL_INTERVAL': str(POLL_INTERVAL),
+        'CONFIG_WRITE_DELAY': str(WRITE_DELAY)
+    }
+    port = free_port()
+    
+    bot = subprocess.Popen(
+        [sys.executable, "-c", BOT, BOT_DIR, db_path],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    api = None
+    try:
+        # The bot migrates the database before the API reads its columns
+        for line in bot.stdout:
+            if line.startswith("READY"):
+                break
+        assert bot.poll() is None, "bot failed to start"
+        
+        api = subprocess.Popen(
+            [sys.executable, "-c", API, TESTS_DIR, str(port)],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        with httpx.Client(
+            base_url=f"http://127.0.0.1:{port}",
+            headers={'Authorization': f"Bearer {TOKEN}"}
+        ) as client:
+            wait_for_api(client, api)
+            
+            sent_at = {}
+            for version in range(1, CHANGES + 1):
+                sent_at[version] = time.time()
+                response = client.post(f"/api/config/{GUILD_ID}", json={'welcome_message': f"v{version}"})
+                assert response.status_code == 200
+                assert response.json()['welcome_message'] == f"v{version}"
+                # Land the writes at different points of the poll cycle
+                time.sleep(POLL_INTERVAL * 1.4)
+        
+        output, _ = bot.communicate(timeout=30)
+    finally:
+        for process in (api, bot):
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+    
+    seen_at = {}
+    for line in output.splitlines():
+        if line.startswith("SEEN "):
+            _, version, at = line.split()
+            seen_at[int(version)] = float(at)
+    
+    assert sorted(seen_at) == list(range(1, CHANGES + 1)), output
+    latencies = [seen_at[version] - sent_at[version] for version in seen_at]
+    record_property("settings_propagation_ms", [round(latency * 1000, 1) for latency in latencies])
+    
+    # POST to the API, written after the write delay, picked up on the
+    # bot's next poll of the change log
+    assert max(latencies) < WRITE_DELAY + POLL_INTERVAL + SLACK
@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks.fakes import FakeGuild
+from utils.templates import PLACEHOLDERS, TemplateError, compile_template
+
+def test_render_matches_the_old_replace_chain():
+    guild = FakeGuild()
+    member = guild.add_member("newcomer")
+    
+    text = compile_template("Welcome {user} to {guild}! You are member #{membercount}.").render(member)
+    
+    assert text == f"Welcome {member.mention} to {guild.name}! You are member #{guild.member_count}."
+
+def test_literal_text_is_kept_verbatim():
+    member = FakeGuild().add_member("newcomer")
+    
+    text = compile_template("{{user}} 100% \"quoted\" 'single' \\ {USER}{user}").render(member)
+    
+    assert text == f"{{user}} 100% \"quoted\" 'single' \\ {member.mention}{member.mention}"
+
+def test_every_placeholder_renders_to_text():
+    member = FakeGuild().add_member("newcomer")
+    template = compile_template(" ".join(f"{{{name}}}" for name in PLACEHOLDERS))
+    
+    text = template.render(member)
+    
+    assert isinstance(text, str)
+    assert "unknown" in text  # no invite given
+    assert template.uses("inviter")
+
+def test_template_without_placeholders():
+    assert compile_template("").render(None) == ""
+    assert compile_template("100% {{plain}}").render(None) == "100% {plain}"
+
+@pytest.mark.parametrize("source, message", [
+    ("Hi {nope} {user} {bad}", "Unknown placeholders: {nope}, {bad}"),
+    ("Hi {user", "Unmatched '{' at position 4"),
+])
+def test_invalid_templates_are_rejected(source, message):
+    with pytest.raises(TemplateError, match=message):
+        compile_template(source)
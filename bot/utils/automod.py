@@ -0,0 +1,186 @@
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, Set, Iterable
+
+class UserState:
+    """Per-member counters for one guild, a handful of floats each."""
+    
+    __slots__ = ("updated_at", "message_tokens", "mention_tokens", "content_hash", "repeats", "cooldown_until")
+    
+    def __init__(self, now: float, flood_limit: float, mention_limit: float):
+        self.updated_at = now
+        self.message_tokens = flood_limit
+        self.mention_tokens = mention_limit
+        self.content_hash = 0
+        self.repeats = 0
+        self.cooldown_until = 0.0
+
+TOKEN = re.compile(r"\w+")
+
+class WordMatcher:
+    """Banned words and phrases compiled into hash sets.
+    
+    A message is split into word tokens once; single words are then one set
+    intersection and phrases one lookup per n-gram of each phrase length,
+    so the cost does not grow with the size of the list. Entries that are
+    not plain words (such as "f*ck") fall back to a single regex.
+    """
+    
+    def __init__(self, entries: Iterable[str]):
+        self.words: Set[str] = set()
+        self.phrases: Dict[int, Set[Tuple[str, ...]]] = {}
+        patterns = []
+        
+        for entry in entries:
+            tokens = tuple(TOKEN.findall(entry))
+            if not tokens or " ".join(tokens) != " ".join(entry.split()):
+                patterns.append(re.escape(entry))
+            elif len(tokens) == 1:
+                self.words.add(tokens[0])
+            else:
+                self.phrases.setdefault(len(tokens), set()).add(tokens)
+        
+        self.fallback = re.compile("|".join(patterns), re.IGNORECASE) if patterns else None
+    
+    def search(self, content: str) -> bool:
+        tokens = TOKEN.findall(content.casefold())
+        if not self.words.isdisjoint(tokens):
+            return True
+        for length, phrases in self.phrases.items():
+            if any(gram in phrases for gram in zip(*(tokens[i:] for i in range(length)))):
+                return True
+        return self.fallback is not None and self.fallback.search(content) is not None
+
+def compile_word_list(text: Optional[str]) -> Optional[WordMatcher]:
+    """Build a matcher from a comma or newline separated word list."""
+    if not text:
+        return None
+    entries = {entry.strip().casefold() for entry in re.split(r"[,\n]", text) if entry.strip()}
+    return WordMatcher(entries) if entries else None
+
+class AutoModEngine:
+    """Checks messages against flood, mention, duplicate and word rules.
+    
+    Flood and mention limits are token buckets that refill continuously over
+    their window, so a check is a few float operations per message plus
+    one tokenisation for the word list.
+    States live in one LRU bounded by max_users; an evicted member simply
+    starts again with full buckets. Word lists are compiled once per guild
+    and recompiled only when the setting text changes.
+    """
+    
+    def __init__(
+        self,
+        max_users: int = 50000,
+        flood_window: float = 5.0,
+        mention_window: float = 10.0,
+        duplicate_window: float = 30.0,
+        duplicate_limit: int = 3
+    ):
+        self.max_users = max_users
+        self.flood_window = flood_window
+        self.mention_window = mention_window
+        self.duplicate_window = duplicate_window
+        self.duplicate_limit = duplicate_limit
+        
+        self._states: "OrderedDict[Tuple[int, int], UserState]" = OrderedDict()
+        self._matchers: Dict[int, Tuple[str, Optional[WordMatcher]]] = {}
+        
+        self.checked = 0
+        self.evictions = 0
+        self.violations: Dict[str, int] = {}
+    
+    def matcher(self, guild_id: int, words: Optional[str]) -> Optional[WordMatcher]:
+        cached = self._matchers.get(guild_id)
+        if cached is None or cached[0] != words:
+            cached = (words, compile_word_list(words))
+            self._matchers[guild_id] = cached
+        return cached[1]
+    
+    def _state(self, guild_id: int, user_id: int, now: float, flood_limit: int, mention_limit: int) -> UserState:
+        key = (guild_id, user_id)
+        state = self._states.get(key)
+        if state is None:
+            state = UserState(now, flood_limit, mention_limit)
+            self._states[key] = state
+            if len(self._states) > self.max_users:
+                self._states.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._states.move_to_end(key)
+        return state
+    
+    def check(
+        self,
+        guild_id: int,
+        user_id: int,
+        content: str,
+        mentions: int,
+        settings: Dict[str, Any],
+        now: Optional[float] = None
+    ) -> Optional[str]:
+        """Return the rule a message breaks, or None."""
+        now = time.monotonic() if now is None else now
+        self.checked += 1
+        
+        flood_limit = settings.get('automod_flood_limit') or 0
+        mention_limit = settings.get('automod_mention_limit') or 0
+        state = self._state(guild_id, user_id, now, flood_limit, mention_limit)
+        
+        elapsed = now - state.updated_at
+        state.updated_at = now
+        reason = None
+        
+        if flood_limit:
+            state.message_tokens = min(flood_limit, state.message_tokens + elapsed * flood_limit / self.flood_window)
+            # Floored at -1 so a member recovers soon after the burst stops
+            state.message_tokens = max(state.message_tokens - 1, -1.0)
+            if state.message_tokens < 0:
+                reason = "flood"
+        
+        if mention_limit and reason is None:
+            state.mention_tokens = min(mention_limit, state.mention_tokens + elapsed * mention_limit / self.mention_window)
+            if mentions:
+                state.mention_tokens -= mentions
+                if state.mention_tokens < 0:
+                    reason = "mention spam"
+        
+        if content:
+            content_hash = hash(content.strip().casefold())
+            if content_hash == state.content_hash and elapsed < self.duplicate_window:
+                state.repeats += 1
+            else:
+                state.content_hash = content_hash
+                state.repeats = 1
+            if reason is None and self.duplicate_limit and state.repeats >= self.duplicate_limit:
+                reason = "duplicate messages"
+            
+            if reason is None:
+                matcher = self.matcher(guild_id, settings.get('automod_words'))
+                if matcher is not None and matcher.search(content):
+                    reason = "banned word"
+        
+        if reason is not None:
+            self.violations[reason] = self.violations.get(reason, 0) + 1
+        return reason
+    
+    def should_punish(self, guild_id: int, user_id: int, cooldown: float, now: Optional[float] = None) -> bool:
+        """Start a cooldown unless one is running, so a burst earns one penalty."""
+        now = time.monotonic() if now is None else now
+        state = self._states.get((guild_id, user_id))
+        if state is None:
+            return True
+        if now < state.cooldown_until:
+            return False
+        state.cooldown_until = now + cooldown
+        state.repeats = 0
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'checked': self.checked,
+            'tracked_users': len(self._states),
+            'evictions': self.evictions,
+            'violations': dict(self.violations)
+        }
@@ -0,0 +1,176 @@
+import sys
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+MISSING = object()
+
+class GuildSettingsCache:
+    """Bounded LRU cache of guild_settings rows keyed by guild ID.
+    
+    A guild without a settings row is stored as None so repeated lookups
+    for unconfigured guilds do not reach the database either.
+    """
+    
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Optional[Dict[str, Any]]]" = OrderedDict()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, guild_id: int):
+        entry = self._entries.get(guild_id, MISSING)
+        if entry is MISSING:
+            self.misses += 1
+            return MISSING
+        
+        self.hits += 1
+        self._entries.move_to_end(guild_id)
+        return entry
+    
+    def set(self, guild_id: int, settings: Optional[Dict[str, Any]]):
+        self._entries[guild_id] = settings
+        self._entries.move_to_end(guild_id)
+        
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, guild_id: int):
+        self._entries.pop(guild_id, None)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+# Measured cost of an entry besides its content: the slotted object, its
+# integers and the slots in both ordered dicts.
+MESSAGE_ENTRY_OVERHEAD = 400
+
+class CachedMessage:
+    __slots__ = ("id", "guild_id", "channel_id", "author_id", "content", "size")
+    
+    def __init__(self, message_id: int, guild_id: int, channel_id: int, author_id: int, content: str):
+        self.id = message_id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.content = content
+        self.size = sys.getsizeof(content) + MESSAGE_ENTRY_OVERHEAD
+
+class MessageContentCache:
+    """Recent message content for guilds that log deletions and edits.
+    
+    discord.py's message cache is shared by every guild, so busy guilds push
+    quiet ones out of it. Here each guild may use up to `max_guild_bytes` and
+    all guilds together `max_bytes`. The least recently seen message is
+    evicted first: from its own guild when that guild is over budget, from
+    any guild when the total is.
+    """
+    
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_guild_bytes: int = 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_guild_bytes = max_guild_bytes
+        self._messages: "OrderedDict[int, CachedMessage]" = OrderedDict()
+        self._guilds: Dict[int, "OrderedDict[int, None]"] = {}
+        self._guild_bytes: Dict[int, int] = {}
+        self.bytes = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def add(self, message_id: int, guild_id: int, channel_id: int, author_id: int, content: str):
+        if message_id in self._messages:
+            self._remove(message_id)
+        
+        entry = CachedMessage(message_id, guild_id, channel_id, author_id, content)
+        self._messages[message_id] = entry
+        guild = self._guilds.get(guild_id)
+        if guild is None:
+            guild = self._guilds[guild_id] = OrderedDict()
+        guild[message_id] = None
+        self._guild_bytes[guild_id] = self._guild_bytes.get(guild_id, 0) + entry.size
+        self.bytes += entry.size
+        
+        while self._guild_bytes.get(guild_id, 0) > self.max_guild_bytes:
+            self._remove(next(iter(self._guilds[guild_id])))
+            self.evictions += 1
+        while self.bytes > self.max_bytes:
+            self._remove(next(iter(self._messages)))
+            self.evictions += 1
+    
+    def get(self, message_id: int) -> Optional[CachedMessage]:
+        entry = self._messages.get(message_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self._messages.move_to_end(message_id)
+        self._guilds[entry.guild_id].move_to_end(message_id)
+        return entry
+    
+    def pop(self, message_id: int) -> Optional[CachedMessage]:
+        if message_id not in self._messages:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return self._remove(message_id)
+    
+    def update(self, message_id: int, content: str):
+        entry = self._messages.get(message_id)
+        if entry is not None:
+            self.add(message_id, entry.guild_id, entry.channel_id, entry.author_id, content)
+    
+    def has_guild(self, guild_id: int) -> bool:
+        return guild_id in self._guilds
+    
+    def drop_guild(self, guild_id: int):
+        for message_id in list(self._guilds.get(guild_id, ())):
+            self._remove(message_id)
+    
+    def _remove(self, message_id: int) -> CachedMessage:
+        entry = self._messages.pop(message_id)
+        guild = self._guilds[entry.guild_id]
+        del guild[message_id]
+        self._guild_bytes[entry.guild_id] -= entry.size
+        if not guild:
+            del self._guilds[entry.guild_id]
+            del self._guild_bytes[entry.guild_id]
+        self.bytes -= entry.size
+        return entry
+    
+    def __len__(self) -> int:
+        return len(self._messages)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._messages),
+            'guilds': len(self._guilds),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
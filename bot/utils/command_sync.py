@@ -0,0 +1,61 @@
+import discord
+import hashlib
+import json
+import time
+from typing import Iterable, Optional, Dict, Any
+
+def command_payload(tree: discord.app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None):
+    payload = []
+    for command in tree.get_commands(guild=guild):
+        try:
+            payload.append(command.to_dict(tree))
+        except TypeError:
+            # discord.py < 2.4 takes no tree argument
+            payload.append(command.to_dict())
+    return sorted(payload, key=lambda c: (c.get('type', 1), c['name']))
+
+def command_hash(tree: discord.app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    encoded = json.dumps(command_payload(tree, guild), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class CommandSyncManager:
+    """Uploads the command tree only when its contents have changed.
+
+    The hash of the last uploaded tree is stored per scope (global or a
+    development guild) in the bot_state table, so reconnects and restarts
+    with an unchanged tree skip the sync entirely.
+    """
+
+    def __init__(self, bot, dev_guild_ids: Iterable[int] = ()):
+        self.bot = bot
+        self.dev_guild_ids = list(dev_guild_ids)
+        self.last_results: Dict[str, Dict[str, Any]] = {}
+    
+    async def sync(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
+        results = {"global": await self._sync_scope(None, force)}
+        
+        for guild_id in self.dev_guild_ids:
+            guild = discord.Object(id=guild_id)
+            self.bot.tree.copy_global_to(guild=guild)
+            results[f"guild:{guild_id}"] = await self._sync_scope(guild, force)
+        
+        self.last_results = results
+        return results
+    
+    async def _sync_scope(self, guild: Optional[discord.Object], force: bool) -> Dict[str, Any]:
+        scope = "global" if guild is None else f"guild:{guild.id}"
+        key = f"command_hash:{scope}"
+        start = time.perf_counter()
+        
+        digest = command_hash(self.bot.tree, guild)
+        if not force and await self.bot.db.get_state(key) == digest:
+            elapsed = round((time.perf_counter() - start) * 1000, 2)
+            print(f"✓ Slash commands unchanged ({scope}), sync skipped in {elapsed}ms")
+            return {'synced': False, 'hash': digest, 'duration_ms': elapsed}
+        
+        synced = await self.bot.tree.sync(guild=guild)
+        await self.bot.db.set_state(key, digest)
+        
+        elapsed = round((time.perf_counter() - start) * 1000, 2)
+        print(f"✓ Synced {len(synced)} slash commands ({scope}) in {elapsed}ms")
+        return {'synced': True, 'hash': digest, 'duration_ms': elapsed, 'commands': len(synced)}
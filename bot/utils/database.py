@@ -1,80 +1,758 @@
-import aiosqlite
+import asyncio
 import os
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
+
+from utils.cache import GuildSettingsCache, MISSING
+from utils.pool import ConnectionPool
+from utils.migrations import run_migrations
+
+# Bounds the statements one prune transaction holds the write lock for
+PRUNE_GUILDS_PER_TRANSACTION = 50
+# How far back analytics_hourly is kept; longer windows read raw rows
+HOURLY_ROLLUP_HOURS = 7 * 24
+
+SETTINGS_COLUMNS = (
+    'welcome_enabled',
+    'welcome_channel_id',
+    'welcome_message',
+    'leave_enabled',
+    'leave_channel_id',
+    'log_enabled',
+    'log_channel_id',
+    'ticket_enabled',
+    'ticket_category_id',
+    'analytics_retention_days',
+    'ticket_retention_days',
+    'raid_join_threshold',
+    'raid_join_window',
+    'automod_enabled',
+    'automod_words',
+    'automod_flood_limit',
+    'automod_mention_limit',
+    'automod_timeout_minutes',
+    'leave_message'
+)
+
+class EventBuffer:
+    """Write-behind sink for analytics rows.
+    
+    Rows are collected in memory and written with a single executemany
+    transaction once max_batch rows are pending or flush_interval seconds
+    have passed. When max_pending rows are waiting, put() blocks until the
+    next flush makes room.
+    """
+    
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        max_batch: int = 500,
+        flush_interval: float = 2.0,
+        max_pending: int = 10000
+    ):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        
+        self._pending: List[Tuple[int, str, str, str]] = []
+        self._cond = asyncio.Condition()
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        
+        self.flushed_events = 0
+        self.flush_count = 0
+        self.blocked_puts = 0
+        self.high_water = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+    
+    def start(self):
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        # The flusher is never cancelled mid-write: aiosqlite cannot recover
+        # from a cancelled query, so it is asked to finish its loop instead.
+        if self._task is not None:
+            self._closing = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+    
+    async def put(self, guild_id: int, event_type: str, event_data: str):
+        created_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        
+        async with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self.blocked_puts += 1
+                self._wake.set()
+                await self._cond.wait_for(lambda: len(self._pending) < self.max_pending)
+            
+            self._pending.append((guild_id, event_type, event_data, created_at))
+            self.high_water = max(self.high_water, len(self._pending))
+            
+            if len(self._pending) >= self.max_batch:
+                self._wake.set()
+    
+    async def flush(self):
+        async with self._flush_lock:
+            async with self._cond:
+                rows, self._pending = self._pending, []
+            
+            if not rows:
+                return
+            
+            rollups: Dict[Tuple[int, str, str], int] = {}
+            hourly: Dict[Tuple[int, str, str], int] = {}
+            for guild_id, event_type, _, created_at in rows:
+                key = (guild_id, event_type, created_at[:10])
+                rollups[key] = rollups.get(key, 0) + 1
+                key = (guild_id, event_type, created_at[:13] + ":00:00")
+                hourly[key] = hourly.get(key, 0) + 1
+            
+            start = time.perf_counter()
+            try:
+                async with self.pool.transaction() as conn:
+                    await conn.executemany(
+                        "INSERT INTO analytics (guild_id, event_type, event_data, created_at) VALUES (?, ?, ?, ?)",
+                        rows
+                    )
+                    await conn.executemany(
+                        """
+                        INSERT INTO analytics_daily (guild_id, event_type, day, count) VALUES (?, ?, ?, ?)
+                        ON CONFLICT (guild_id, event_type, day) DO UPDATE SET count = count + excluded.count
+                        """,
+                        [(*key, count) for key, count in rollups.items()]
+                    )
+                    await conn.executemany(
+                        """
+                        INSERT INTO analytics_hourly (guild_id, event_type, hour, count) VALUES (?, ?, ?, ?)
+                        ON CONFLICT (guild_id, hour, event_type) DO UPDATE SET count = count + excluded.count
+                        """,
+                        [(*key, count) for key, count in hourly.items()]
+                    )
+            except Exception as e:
+                print(f"✗ Failed to flush {len(rows)} analytics events: {e}")
+                async with self._cond:
+                    self._pending = rows + self._pending
+                raise
+            finally:
+                async with self._cond:
+                    self._cond.notify_all()
+            
+            elapsed = (time.perf_counter() - start) * 1000
+            self.flushed_events += len(rows)
+            self.flush_count += 1
+            self.last_flush_ms = elapsed
+            self.max_flush_ms = max(self.max_flush_ms, elapsed)
+            self.total_flush_ms += elapsed
+    
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            
+            try:
+                await self.flush()
+            except Exception:
+                if not self._closing:
+                    await asyncio.sleep(self.flush_interval)
+    
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self.queue_depth,
+            'high_water': self.high_water,
+            'flushed_events': self.flushed_events,
+            'flush_count': self.flush_count,
+            'blocked_puts': self.blocked_puts,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+            'max_flush_ms': round(self.max_flush_ms, 2),
+            'avg_flush_ms': round(self.total_flush_ms / self.flush_count, 2) if self.flush_count else 0.0
+        }
 
 class Database:
-    def __init__(self, db_path: str = "data/happy.db"):
+    def __init__(
+        self,
+        db_path: str = "data/happy.db",
+        event_batch_size: int = 500,
+        event_flush_interval: float = 2.0,
+        event_max_pending: int = 10000,
+        settings_cache_size: int = 10000,
+        readers: int = 4,
+        shard_ids: Optional[List[int]] = None,
+        shard_count: Optional[int] = None
+    ):
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path, readers=readers)
+        self.event_batch_size = event_batch_size
+        self.event_flush_interval = event_flush_interval
+        self.event_max_pending = event_max_pending
+        self.settings_cache = GuildSettingsCache(settings_cache_size)
+        # A cluster worker only warms the guilds on its own shards
+        self.shard_ids = shard_ids if shard_ids and shard_count else None
+        self.shard_count = shard_count
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
     
-    async def connect(self):
-        self.conn = await aiosqlite.connect(self.db_path)
-        await self.create_tables()
+    async def connect(self, tracer=None):
+        def phase(name):
+            return tracer.phase(name) if tracer else nullcontext()
+        
+        try:
+            with phase("db.open"):
+                await self.pool.open()
+                self.conn = self.pool.writer
+            with phase("db.migrate"):
+                await self.migrate()
+            with phase("db.readers"):
+                await self.pool.open_readers()
+            with phase("db.settings_cache"):
+                await self.load_guild_settings()
+        except Exception:
+            # aiosqlite connections run on non-daemon threads; left open,
+            # they would keep a worker that failed to start from exiting.
+            await self.pool.close()
+            raise
+        
+        self.events = EventBuffer(
+            self.pool,
+            max_batch=self.event_batch_size,
+            flush_interval=self.event_flush_interval,
+            max_pending=self.event_max_pending
+        )
+        self.events.start()
     
     async def close(self):
-        if hasattr(self, 'conn'):
-            await self.conn.close()
-    
-    async def create_tables(self):
-        await self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS guilds (
-                guild_id INTEGER PRIMARY KEY,
-                name TEXT,
-                joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        await self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS guild_settings (
-                guild_id INTEGER PRIMARY KEY,
-                welcome_enabled INTEGER DEFAULT 0,
-                welcome_channel_id INTEGER,
-                welcome_message TEXT DEFAULT 'Welcome {user} to {guild}!',
-                leave_enabled INTEGER DEFAULT 0,
-                leave_channel_id INTEGER,
-                log_enabled INTEGER DEFAULT 0,
-                log_channel_id INTEGER,
-                ticket_enabled INTEGER DEFAULT 0,
-                ticket_category_id INTEGER,
-                FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
-            )
-        ''')
-        
-        await self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS warns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                user_id INTEGER,
-                moderator_id INTEGER,
-                reason TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
-            )
-        ''')
-        
-        await self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS tickets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                channel_id INTEGER,
-                user_id INTEGER,
-                status TEXT DEFAULT 'open',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                closed_at TIMESTAMP,
-                FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
-            )
-        ''')
-        
-        await self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS analytics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                event_type TEXT,
-                event_data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
-            )
-        ''')
-        
-        await self.conn.commit()
\ No newline at end of file
+        if hasattr(self, 'events'):
+            await self.events.stop()
+        await self.pool.close()
+    
+    async def log_event(self, guild_id: int, event_type: str, event_data: str = None):
+        await self.events.put(guild_id, event_type, event_data)
+    
+    async def log_events(self, events: List[Tuple[int, str, str]]):
+        """Record several events and write them together in one flush."""
+        for guild_id, event_type, event_data in events:
+            await self.events.put(guild_id, event_type, event_data)
+        await self.events.flush()
+    
+    async def add_guild(self, guild_id: int, name: str):
+        await self.sync_guilds([(guild_id, name)])
+    
+    async def sync_guilds(self, guilds: List[Tuple[int, str]]):
+        async with self.pool.transaction() as conn:
+            await conn.executemany(
+                """
+                INSERT INTO guilds (guild_id, name) VALUES (?, ?)
+                ON CONFLICT (guild_id) DO UPDATE SET name = excluded.name
+                """,
+                guilds
+            )
+    
+    async def remove_guild(self, guild_id: int):
+        async with self.pool.transaction() as conn:
+            await conn.execute("DELETE FROM guilds WHERE guild_id = ?", (guild_id,))
+    
+    async def load_guild_settings(self):
+        self.settings_cache.clear()
+        query = "SELECT * FROM guild_settings"
+        params: List[Any] = []
+        if self.shard_ids is not None:
+            # Discord's shard formula: (guild_id >> 22) % shard_count
+            query += f" WHERE (guild_id >> 22) % ? IN ({', '.join('?' * len(self.shard_ids))})"
+            params += [self.shard_count, *self.shard_ids]
+        query += " LIMIT ?"
+        params.append(self.settings_cache.max_size)
+        
+        async with self.pool.reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                async for row in cursor:
+                    self.settings_cache.set(row['guild_id'], dict(row))
+    
+    async def get_guild_settings(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        settings = self.settings_cache.get(guild_id)
+        if settings is not MISSING:
+            return settings
+        
+        async with self.pool.reader() as conn:
+            async with conn.execute(
+                "SELECT * FROM guild_settings WHERE guild_id = ?",
+                (guild_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+        
+        settings = dict(row) if row else None
+        self.settings_cache.set(guild_id, settings)
+        return settings
+    
+    async def update_guild_settings(self, guild_id: int, settings: Dict[str, Any]):
+        unknown = set(settings) - set(SETTINGS_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        
+        async with self.pool.transaction() as conn:
+            await conn.execute(
+                "INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)",
+                (guild_id,)
+            )
+            if settings:
+                assignments = ", ".join(f"{column} = ?" for column in settings)
+                await conn.execute(
+                    f"UPDATE guild_settings SET {assignments} WHERE guild_id = ?",
+                    (*settings.values(), guild_id)
+                )
+            
+            await conn.execute(
+                "INSERT INTO settings_changes (guild_id) VALUES (?)",
+                (guild_id,)
+            )
+            
+            async with conn.execute(
+                "SELECT * FROM guild_settings WHERE guild_id = ?",
+                (guild_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+        self.settings_cache.set(guild_id, dict(row))
+    
+    async def get_settings_version(self) -> int:
+        async with self.pool.reader() as conn:
+            async with conn.execute("SELECT COALESCE(MAX(version), 0) FROM settings_changes") as cursor:
+                row = await cursor.fetchone()
+        return row[0]
+    
+    async def get_settings_changes(self, since: int) -> Tuple[int, List[int]]:
+        """Return the latest change version and the guilds changed after `since`."""
+        async with self.pool.reader() as conn:
+            async with conn.execute(
+                "SELECT version, guild_id FROM settings_changes WHERE version > ? ORDER BY version",
+                (since,)
+            ) as cursor:
+                rows = await cursor.fetchall()
+        
+        if not rows:
+            return since, []
+        return rows[-1]['version'], list({row['guild_id'] for row in rows})
+    
+    async def refresh_guild_settings(self, guild_ids: List[int]) -> int:
+        # Only guilds already cached need re-reading; the rest load on demand.
+        cached = [guild_id for guild_id in guild_ids if guild_id in self.settings_cache]
+        if not cached:
+            return 0
+        
+        placeholders = ", ".join("?" for _ in cached)
+        async with self.pool.reader() as conn:
+            async with conn.execute(
+                f"SELECT * FROM guild_settings WHERE guild_id IN ({placeholders})",
+                cached
+            ) as cursor:
+                rows = {row['guild_id']: dict(row) async for row in cursor}
+        
+        for guild_id in cached:
+            self.settings_cache.set(guild_id, rows.get(guild_id))
+        return len(cached)
+    
+    async def prune_settings_changes(self, max_age_hours: int = 24) -> int:
+        async with self.pool.transaction() as conn:
+            cursor = await conn.execute(
+                "DELETE FROM settings_changes WHERE changed_at < datetime('now', ?)",
+                (f"-{max_age_hours} hours",)
+            )
+            return cursor.rowcount
+    
+    async def prune_hourly_rollups(self) -> int:
+        async with self.pool.transaction() as conn:
+            cursor = await conn.execute(
+                "DELETE FROM analytics_hourly WHERE hour < strftime('%Y-%m-%d %H:00:00', 'now', ?)",
+                (f"-{HOURLY_ROLLUP_HOURS} hours",)
+            )
+            return cursor.rowcount
+    
+    async def get_event_counts(self, guild_id: int, days: Optional[int] = None) -> Dict[str, int]:
+        """Count events per type from the daily rollups.
+        
+        days=None covers all time; otherwise the window is the current UTC
+        day plus the days - 1 before it.
+        """
+        query = "SELECT event_type, SUM(count) AS total FROM analytics_daily WHERE guild_id = ?"
+        params: List[Any] = [guild_id]
+        if days is not None:
+            query += " AND day >= date('now', ?)"
+            params.append(f"-{days - 1} days")
+        query += " GROUP BY event_type ORDER BY total DESC"
+        
+        async with self.pool.reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                return {row['event_type']: row['total'] async for row in cursor}
+    
+    async def get_recent_event_counts(self, guild_id: int, hours: int = 24) -> Dict[str, int]:
+        """Count events per type over the last `hours` hours.
+        
+        Whole hours come from the hourly rollups; only the partial hours at
+        either end of the window are counted from raw analytics rows.
+        """
+        now = datetime.utcnow()
+        start = now - timedelta(hours=hours)
+        if hours > HOURLY_ROLLUP_HOURS:
+            # Older than the hourly rollups are kept
+            query = """
+                SELECT event_type, COUNT(*) AS total FROM analytics
+                WHERE guild_id = :guild_id AND created_at >= :start
+                GROUP BY event_type ORDER BY total DESC
+            """
+        else:
+            query = """
+                SELECT event_type, SUM(total) AS total FROM (
+                    SELECT event_type, count AS total FROM analytics_hourly
+                    WHERE guild_id = :guild_id AND hour >= :first_hour AND hour < :current_hour
+                    UNION ALL
+                    SELECT event_type, 1 FROM analytics
+                    WHERE guild_id = :guild_id AND created_at >= :start AND created_at < :first_hour
+                    UNION ALL
+                    SELECT event_type, 1 FROM analytics
+                    WHERE guild_id = :guild_id AND created_at >= :current_start
+                )
+                GROUP BY event_type ORDER BY total DESC
+            """
+        
+        current_hour = now.replace(minute=0, second=0, microsecond=0)
+        first_hour = min(start.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1), current_hour)
+        params = {
+            'guild_id': guild_id,
+            'start': start.strftime('%Y-%m-%d %H:%M:%S'),
+            'first_hour': first_hour.strftime('%Y-%m-%d %H:%M:%S'),
+            'current_hour': current_hour.strftime('%Y-%m-%d %H:%M:%S'),
+            # Windows shorter than an hour start inside the current one
+            'current_start': max(start, current_hour).strftime('%Y-%m-%d %H:%M:%S')
+        }
+        async with self.pool.reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                return {row['event_type']: row['total'] async for row in cursor}
+    
+    async def rebuild_event_counts(self, guild_id: int) -> int:
+        """Recompute a guild's rollups from the raw analytics rows.
+        
+        Days before the oldest remaining raw event are left untouched, since
+        retention has already pruned the rows they were counted from.
+        """
+        await self.events.flush()
+        
+        async with self.pool.transaction() as conn:
+            async with conn.execute(
+                "SELECT date(MIN(created_at)) FROM analytics WHERE guild_id = ?",
+                (guild_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row[0] is None:
+                return 0
+            
+            await conn.execute(
+                "DELETE FROM analytics_daily WHERE guild_id = ? AND day >= ?",
+                (guild_id, row[0])
+            )
+            cursor = await conn.execute(
+                """
+                INSERT INTO analytics_daily (guild_id, event_type, day, count)
+                SELECT guild_id, event_type, date(created_at), COUNT(*) FROM analytics
+                WHERE guild_id = ? AND event_type IS NOT NULL AND created_at IS NOT NULL
+                GROUP BY guild_id, event_type, date(created_at)
+                """,
+                (guild_id,)
+            )
+            rebuilt = cursor.rowcount
+            
+            await conn.execute(
+                "DELETE FROM analytics_hourly WHERE guild_id = ? AND hour >= strftime('%Y-%m-%d %H:00:00', ?)",
+                (guild_id, row[0])
+            )
+            await conn.execute(
+                """
+                INSERT INTO analytics_hourly (guild_id, event_type, hour, count)
+                SELECT guild_id, event_type, strftime('%Y-%m-%d %H:00:00', created_at), COUNT(*) FROM analytics
+                WHERE guild_id = ? AND event_type IS NOT NULL AND created_at >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
+                GROUP BY guild_id, event_type, strftime('%Y-%m-%d %H:00:00', created_at)
+                """,
+                (guild_id, f"-{HOURLY_ROLLUP_HOURS} hours")
+            )
+            return rebuilt
+    
+    async def _expired_guilds(self, table: str, column: str, default_days: int, expired: str) -> List[Tuple[Optional[int], int]]:
+        # Walks the distinct guild_ids of `table` through its guild_id index,
+        # one seek per guild, and keeps the guilds for which `expired` (a
+        # condition on guild.id and the cutoff) finds rows. Runs on a reader,
+        # so the walk never holds the write lock.
+        async with self.pool.reader() as conn:
+            async with conn.execute(
+                f"""
+                WITH RECURSIVE walk(id) AS (
+                    SELECT MIN(guild_id) FROM {table}
+                    UNION ALL
+                    SELECT (SELECT MIN(guild_id) FROM {table} WHERE guild_id > walk.id)
+                    FROM walk WHERE walk.id IS NOT NULL
+                ),
+                retention(id, days) AS (
+                    SELECT walk.id, COALESCE(s.{column}, :default) FROM walk
+                    LEFT JOIN guild_settings s ON s.guild_id = walk.id
+                    WHERE walk.id IS NOT NULL
+                    UNION ALL
+                    -- Rows without a guild follow the default
+                    SELECT NULL, :default
+                ),
+                cutoff(id, days, at) AS (
+                    SELECT id, days, datetime('now', '-' || days || ' days') FROM retention
+                    WHERE days > 0
+                )
+                SELECT guild.id, guild.days FROM cutoff guild WHERE {expired}
+                """,
+                {'default': default_days}
+            ) as cursor:
+                return [(row[0], row[1]) for row in await cursor.fetchall()]
+    
+    async def _prune_guilds(self, delete: str, retention: List[Tuple[Optional[int], int]], batch_size: int) -> Tuple[int, int]:
+        deleted = 0
+        done = 0
+        async with self.pool.transaction() as conn:
+            for guild_id, days in retention[:PRUNE_GUILDS_PER_TRANSACTION]:
+                limit = batch_size - deleted
+                cursor = await conn.execute(delete, (guild_id, f"-{days} days", limit))
+                deleted += cursor.rowcount
+                if cursor.rowcount >= limit:
+                    # This guild may have more; it leads the next batch
+                    break
+                done += 1
+        return deleted, done
+    
+    async def expired_event_guilds(self, default_days: int) -> List[Tuple[Optional[int], int]]:
+        """(guild_id, retention days) for every guild with analytics rows to prune.
+        
+        The oldest row of each guild is one seek on (guild_id, created_at).
+        """
+        return await self._expired_guilds(
+            "analytics",
+            "analytics_retention_days",
+            default_days,
+            "(SELECT MIN(created_at) FROM analytics WHERE guild_id IS guild.id) < guild.at"
+        )
+    
+    async def prune_events(self, retention: List[Tuple[Optional[int], int]], batch_size: int = 1000) -> Tuple[int, int]:
+        """Delete expired analytics rows for the guilds in `retention`, in order.
+        
+        One call is one transaction of at most batch_size rows and
+        PRUNE_GUILDS_PER_TRANSACTION guilds. Returns the rows deleted and how
+        many guilds from the front of `retention` are now fully pruned.
+        """
+        return await self._prune_guilds(
+            """
+            DELETE FROM analytics WHERE id IN (
+                SELECT id FROM analytics
+                WHERE guild_id IS ? AND created_at < datetime('now', ?)
+                LIMIT ?
+            )
+            """,
+            retention,
+            batch_size
+        )
+    
+    async def expired_ticket_guilds(self, default_days: int) -> List[Tuple[Optional[int], int]]:
+        # Without statistics SQLite prefers idx_tickets_closed here, which
+        # scans every guild's expired tickets once per guild.
+        return await self._expired_guilds(
+            "tickets",
+            "ticket_retention_days",
+            default_days,
+            """
+            EXISTS (
+                SELECT 1 FROM tickets INDEXED BY idx_tickets_guild_status
+                WHERE guild_id IS guild.id AND status = 'closed' AND closed_at < guild.at
+            )
+            """
+        )
+    
+    async def prune_tickets(self, retention: List[Tuple[Optional[int], int]], batch_size: int = 1000) -> Tuple[int, int]:
+        return await self._prune_guilds(
+            """
+            DELETE FROM tickets WHERE id IN (
+                SELECT id FROM tickets INDEXED BY idx_tickets_guild_status
+                WHERE guild_id IS ? AND status = 'closed' AND closed_at < datetime('now', ?)
+                LIMIT ?
+            )
+            """,
+            retention,
+            batch_size
+        )
+    
+    async def database_size(self) -> int:
+        async with self.pool.reader() as conn:
+            async with conn.execute("PRAGMA page_count") as cursor:
+                page_count = (await cursor.fetchone())[0]
+            async with conn.execute("PRAGMA page_size") as cursor:
+                page_size = (await cursor.fetchone())[0]
+        return page_count * page_size
+    
+    async def compact(self, pages: int = 1000):
+        async with self.pool.transaction() as conn:
+            async with conn.execute("PRAGMA auto_vacuum") as cursor:
+                mode = (await cursor.fetchone())[0]
+            if mode == 2:
+                # executescript steps the pragma to completion; execute() would
+                # stop after freeing a single page.
+                await conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        
+        async with self.pool.transaction() as conn:
+            async with conn.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cursor:
+                await cursor.fetchall()
+    
+    async def update_cluster_status(
+        self,
+        cluster_id: int,
+        shard_ids: List[int],
+        guild_count: int,
+        latency: float,
+        started_at: datetime
+    ):
+        async with self.pool.transaction() as conn:
+            await conn.execute(
+                """
+                INSERT INTO cluster_status (cluster_id, shard_ids, guild_count, latency, started_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (cluster_id) DO UPDATE SET
+                    shard_ids = excluded.shard_ids,
+                    guild_count = excluded.guild_count,
+                    latency = excluded.latency,
+                    started_at = excluded.started_at,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    cluster_id,
+                    ",".join(str(shard_id) for shard_id in shard_ids),
+                    guild_count,
+                    latency,
+                    started_at.strftime('%Y-%m-%d %H:%M:%S')
+                )
+            )
+    
+    async def get_cluster_status(self, max_age: int = 120) -> List[Dict[str, Any]]:
+        async with self.pool.reader() as conn:
+            async with conn.execute(
+                """
+                SELECT * FROM cluster_status
+                WHERE updated_at >= datetime('now', ?)
+                ORDER BY cluster_id
+                """,
+                (f"-{max_age} seconds",)
+            ) as cursor:
+                return [dict(row) async for row in cursor]
+    
+    async def add_warn(self, guild_id: int, user_id: int, moderator_id: int, reason: str) -> Tuple[int, int]:
+        """Record a warning and return its id with the member's new warning count."""
+        async with self.pool.transaction() as conn:
+            cursor = await conn.execute(
+                "INSERT INTO warns (guild_id, user_id, moderator_id, reason) VALUES (?, ?, ?, ?)",
+                (guild_id, user_id, moderator_id, reason)
+            )
+            warn_id = cursor.lastrowid
+            async with conn.execute(
+                """
+                INSERT INTO warn_counts (guild_id, user_id, count) VALUES (?, ?, 1)
+                ON CONFLICT (guild_id, user_id) DO UPDATE SET count = count + 1
+                RETURNING count
+                """,
+                (guild_id, user_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+        return warn_id, row['count']
+    
+    async def get_warn_count(self, guild_id: int, user_id: int) -> int:
+        async with self.pool.reader() as conn:
+            async with conn.execute(
+                "SELECT count FROM warn_counts WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+        return row['count'] if row else 0
+    
+    async def get_warns(
+        self,
+        guild_id: int,
+        user_id: int,
+        limit: int = 10,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Return one page of a member's warnings, newest first.
+        
+        Pages are keyed on the warning id: before_id pages towards older
+        warnings and after_id towards newer ones, so every page is a range
+        scan of idx_warns_guild_user however many warnings precede it.
+        """
+        query = "SELECT * FROM warns WHERE guild_id = ? AND user_id = ?"
+        params: List[Any] = [guild_id, user_id]
+        if after_id is not None:
+            query += " AND id > ? ORDER BY id ASC LIMIT ?"
+            params += [after_id, limit]
+        else:
+            if before_id is not None:
+                query += " AND id < ?"
+                params.append(before_id)
+            query += " ORDER BY id DESC LIMIT ?"
+            params.append(limit)
+        
+        async with self.pool.reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                rows = [dict(row) async for row in cursor]
+        
+        if after_id is not None:
+            rows.reverse()
+        return rows
+    
+    async def remove_warn(self, guild_id: int, warn_id: int) -> bool:
+        async with self.pool.transaction() as conn:
+            async with conn.execute(
+                "DELETE FROM warns WHERE id = ? AND guild_id = ? RETURNING user_id",
+                (warn_id, guild_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                return False
+            
+            await conn.execute(
+                "UPDATE warn_counts SET count = MAX(count - 1, 0) WHERE guild_id = ? AND user_id = ?",
+                (guild_id, row['user_id'])
+            )
+            await conn.execute(
+                "DELETE FROM warn_counts WHERE guild_id = ? AND user_id = ? AND count = 0",
+                (guild_id, row['user_id'])
+            )
+        return True
+    
+    async def get_state(self, key: str) -> Optional[str]:
+        async with self.pool.reader() as conn:
+            async with conn.execute("SELECT value FROM bot_state WHERE key = ?", (key,)) as cursor:
+                row = await cursor.fetchone()
+        return row['value'] if row else None
+    
+    async def set_state(self, key: str, value: str):
+        async with self.pool.transaction() as conn:
+            await conn.execute(
+                """
+                INSERT INTO bot_state (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+                """,
+                (key, value)
+            )
+    
+    async def migrate(self) -> List[int]:
+        return await run_migrations(self.conn)
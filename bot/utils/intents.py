@@ -0,0 +1,50 @@
+import discord
+from typing import Dict, Iterable
+
+# Gateway intents each extension needs on top of `guilds`. Slash commands
+# resolve members from the interaction payload, so only listeners count here.
+COG_INTENTS: Dict[str, Dict[str, bool]] = {
+    "cogs.moderation": {
+        # Mass actions load the member list to match and rank-check targets
+        "members": True
+    },
+    "cogs.welcome": {
+        "members": True,
+        "guild_messages": True,
+        "message_content": True
+    },
+    "cogs.tickets": {},
+    "cogs.automod": {
+        "guild_messages": True,
+        "message_content": True
+    },
+    "cogs.utility": {}
+}
+
+def build_intents(cogs: Iterable[str], profile: str = "auto") -> discord.Intents:
+    if profile == "all":
+        return discord.Intents.all()
+    
+    intents = discord.Intents.none()
+    intents.guilds = True
+    for cog in cogs:
+        for name, value in COG_INTENTS.get(cog, {}).items():
+            setattr(intents, name, value)
+    return intents
+
+def build_member_cache_flags(policy: str, intents: discord.Intents) -> discord.MemberCacheFlags:
+    if policy == "none":
+        return discord.MemberCacheFlags.none()
+    if policy == "joined":
+        return discord.MemberCacheFlags(joined=intents.members, voice=False)
+    return discord.MemberCacheFlags.from_intents(intents)
+
+async def get_or_fetch_member(guild: discord.Guild, user_id: int):
+    member = guild.get_member(user_id)
+    if member is not None:
+        return member
+    
+    try:
+        return await guild.fetch_member(user_id)
+    except discord.NotFound:
+        return None
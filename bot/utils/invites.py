@@ -0,0 +1,49 @@
+import asyncio
+import discord
+from typing import Optional, Dict
+
+class InviteTracker:
+    """Works out which invite a member joined with by diffing use counts.
+
+    Invites are only fetched for guilds whose welcome template asks for
+    them. The first join after startup records a baseline and reports no
+    invite; later joins compare against the previous snapshot.
+    """
+
+    def __init__(self):
+        self._uses: Dict[int, Dict[str, int]] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    async def _fetch(self, guild: discord.Guild) -> Optional[Dict[str, discord.Invite]]:
+        try:
+            return {invite.code: invite for invite in await guild.invites()}
+        except discord.HTTPException:
+            return None
+
+    async def prime(self, guild: discord.Guild):
+        invites = await self._fetch(guild)
+        if invites is not None:
+            self._uses[guild.id] = {code: invite.uses or 0 for code, invite in invites.items()}
+
+    async def find_used(self, guild: discord.Guild) -> Optional[discord.Invite]:
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            invites = await self._fetch(guild)
+            if invites is None:
+                return None
+
+            previous = self._uses.get(guild.id)
+            self._uses[guild.id] = {code: invite.uses or 0 for code, invite in invites.items()}
+            if previous is None:
+                return None
+
+            used = [
+                invite for code, invite in invites.items()
+                if (invite.uses or 0) > previous.get(code, 0)
+            ]
+            # Several bumped counters means joins overlapped; don't guess
+            return used[0] if len(used) == 1 else None
+
+    def forget(self, guild_id: int):
+        self._uses.pop(guild_id, None)
+        self._locks.pop(guild_id, None)
@@ -0,0 +1,130 @@
+import discord
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+class GuildJoinState:
+    __slots__ = ('joins', 'raid', 'pending', 'sample', 'task')
+
+    def __init__(self, threshold: int):
+        self.joins: Deque[float] = deque(maxlen=threshold)
+        self.raid = False
+        self.pending = 0
+        self.sample: List[str] = []
+        self.task: Optional[asyncio.Task] = None
+
+class JoinMonitor:
+    """Per-guild join burst detection with a digest mode for raids.
+
+    Each guild keeps only the timestamps of its last `threshold` joins. When
+    all of them fall within `window` seconds the guild switches to digest
+    mode: individual welcomes stop and one "N members joined" embed is posted
+    every `digest_interval` seconds until the join rate falls back below the
+    threshold.
+    """
+
+    def __init__(self, digest_interval: float = 30.0, sample_size: int = 10, idle_after: float = 300.0):
+        self.digest_interval = digest_interval
+        self.sample_size = sample_size
+        self.idle_after = idle_after
+        
+        self._states: Dict[int, GuildJoinState] = {}
+        self._records = 0
+        
+        self.raids_started = 0
+        self.digests_sent = 0
+    
+    def record(self, guild_id: int, threshold: int, window: float, now: Optional[float] = None) -> bool:
+        """Record a join and return True if the guild is in digest mode."""
+        if threshold <= 0:
+            return False
+        
+        now = time.monotonic() if now is None else now
+        state = self._states.get(guild_id)
+        if state is None:
+            state = self._states[guild_id] = GuildJoinState(threshold)
+        elif state.joins.maxlen != threshold:
+            state.joins = deque(state.joins, maxlen=threshold)
+        
+        state.joins.append(now)
+        if not state.raid and self._bursting(state, window, now):
+            state.raid = True
+            self.raids_started += 1
+        
+        self._records += 1
+        if self._records % 1000 == 0:
+            self._sweep(now)
+        
+        return state.raid
+    
+    def is_raid(self, guild_id: int) -> bool:
+        state = self._states.get(guild_id)
+        return state is not None and state.raid
+    
+    def add_to_digest(self, guild_id: int, channel: discord.abc.Messageable, member: discord.Member, window: float):
+        state = self._states[guild_id]
+        state.pending += 1
+        if len(state.sample) < self.sample_size:
+            state.sample.append(member.mention)
+        
+        if state.task is None:
+            state.task = asyncio.create_task(self._run_digest(guild_id, channel, window))
+    
+    def take_digest(self, guild_id: int, window: float, now: Optional[float] = None):
+        """Pop the pending digest and leave digest mode if the burst is over."""
+        now = time.monotonic() if now is None else now
+        state = self._states[guild_id]
+        
+        count, sample = state.pending, state.sample
+        state.pending, state.sample = 0, []
+        
+        if not self._bursting(state, window, now):
+            state.raid = False
+        
+        return count, sample
+    
+    async def close(self):
+        tasks = [state.task for state in self._states.values() if state.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def _bursting(self, state: GuildJoinState, window: float, now: float) -> bool:
+        return len(state.joins) == state.joins.maxlen and now - state.joins[0] <= window
+    
+    def _sweep(self, now: float):
+        idle = [
+            guild_id for guild_id, state in self._states.items()
+            if not state.raid and state.task is None
+            and (not state.joins or now - state.joins[-1] > self.idle_after)
+        ]
+        for guild_id in idle:
+            del self._states[guild_id]
+    
+    async def _run_digest(self, guild_id: int, channel: discord.abc.Messageable, window: float):
+        state = self._states[guild_id]
+        try:
+            while True:
+                await asyncio.sleep(self.digest_interval)
+                count, sample = self.take_digest(guild_id, window)
+                
+                if count:
+                    embed = discord.Embed(
+                        title=f"👋 {count} members joined",
+                        description=" ".join(sample) + (f" and {count - len(sample)} more" if count > len(sample) else ""),
+                        color=discord.Color.green()
+                    )
+                    embed.set_footer(text="Join burst detected • individual welcomes are paused")
+                    embed.timestamp = discord.utils.utcnow()
+                    
+                    try:
+                        await channel.send(embed=embed)
+                        self.digests_sent += 1
+                    except discord.HTTPException as e:
+                        print(f"✗ Failed to send join digest to {channel.id}: {e}")
+                
+                if not state.raid:
+                    break
+        finally:
+            state.task = None
@@ -0,0 +1,154 @@
+import discord
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Any, List
+
+MAX_EMBEDS_PER_MESSAGE = 10
+# Discord rejects a message whose embeds total more than this
+MAX_EMBED_CHARACTERS = 6000
+# Room left in the last message of a flush for the summary embed
+SUMMARY_CHARACTERS = 1000
+
+class LogDispatcher:
+    """Coalesces log embeds per channel into as few messages as possible.
+    
+    Embeds submitted for a channel wait up to `linger` seconds for others to
+    arrive, then go out packed into messages of up to 10 embeds and 6000
+    characters. A flush sends at most `max_messages` messages; embeds that
+    don't fit are folded into one "...and N more events" summary at the end
+    of the last one. Each channel queue holds at most `max_queue` embeds;
+    the oldest are dropped beyond that.
+    """
+    
+    def __init__(self, linger: float = 1.5, max_queue: int = 500, max_messages: int = 3):
+        self.linger = linger
+        self.max_queue = max_queue
+        self.max_messages = max(1, max_messages)
+        
+        self._queues: Dict[int, Deque[discord.Embed]] = {}
+        self._channels: Dict[int, discord.abc.Messageable] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._closing = False
+        
+        self.submitted = 0
+        self.dropped = 0
+        self.summarized = 0
+        self.sent_messages = 0
+        self.sent_embeds = 0
+        self.failed_sends = 0
+    
+    def submit(self, channel: discord.abc.Messageable, embed: discord.Embed):
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = deque()
+        
+        if len(queue) >= self.max_queue:
+            queue.popleft()
+            self.dropped += 1
+        
+        queue.append(embed)
+        self.submitted += 1
+        self._channels[channel.id] = channel
+        
+        if channel.id not in self._tasks:
+            self._tasks[channel.id] = asyncio.create_task(self._drain(channel.id))
+    
+    async def close(self):
+        self._closing = True
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+    
+    async def _drain(self, channel_id: int):
+        queue = self._queues[channel_id]
+        try:
+            while queue:
+                if not self._closing:
+                    await asyncio.sleep(self.linger)
+                
+                await self._flush(self._channels[channel_id], queue)
+        finally:
+            del self._tasks[channel_id]
+            if not queue:
+                del self._queues[channel_id]
+                del self._channels[channel_id]
+    
+    async def _flush(self, channel: discord.abc.Messageable, queue: Deque[discord.Embed]):
+        for _ in range(self.max_messages - 1):
+            if not queue:
+                return
+            await self._send(channel, self._pack(queue))
+        if not queue:
+            return
+        
+        # The last message keeps a slot and some room for the summary
+        room = MAX_EMBED_CHARACTERS - SUMMARY_CHARACTERS
+        batch = []
+        if len(queue[0]) <= room:
+            batch = self._pack(queue, MAX_EMBEDS_PER_MESSAGE - 1, room)
+        if queue:
+            rest = list(queue)
+            queue.clear()
+            self.summarized += len(rest)
+            batch.append(self._summary(rest))
+        await self._send(channel, batch)
+    
+    def _pack(
+        self,
+        queue: Deque[discord.Embed],
+        max_embeds: int = MAX_EMBEDS_PER_MESSAGE,
+        max_characters: int = MAX_EMBED_CHARACTERS
+    ) -> List[discord.Embed]:
+        batch = [queue.popleft()]
+        characters = len(batch[0])
+        while queue and len(batch) < max_embeds:
+            length = len(queue[0])
+            if characters + length > max_characters:
+                break
+            batch.append(queue.popleft())
+            characters += length
+        return batch
+    
+    def _summary(self, embeds: List[discord.Embed]) -> discord.Embed:
+        counts: Dict[str, int] = {}
+        for embed in embeds:
+            title = embed.title or "Log event"
+            counts[title] = counts.get(title, 0) + 1
+        
+        title = f"📋 ...and {len(embeds)} more events"
+        description = "\n".join(
+            f"{name} × {count}"
+            for name, count in sorted(counts.items(), key=lambda x: x[1], reverse=True)
+        )
+        limit = SUMMARY_CHARACTERS - len(title)
+        if len(description) > limit:
+            description = description[:limit - 1] + "…"
+        
+        summary = discord.Embed(title=title, description=description, color=discord.Color.greyple())
+        summary.timestamp = discord.utils.utcnow()
+        return summary
+    
+    async def _send(self, channel: discord.abc.Messageable, batch: List[discord.Embed]):
+        try:
+            await channel.send(embeds=batch)
+            self.sent_messages += 1
+            self.sent_embeds += len(batch)
+        except discord.HTTPException as e:
+            self.failed_sends += 1
+            self.dropped += len(batch)
+            print(f"✗ Failed to send {len(batch)} log embeds to {channel.id}: {e}")
+    
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self.queue_depth,
+            'channels': len(self._queues),
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'summarized': self.summarized,
+            'sent_messages': self.sent_messages,
+            'sent_embeds': self.sent_embeds,
+            'failed_sends': self.failed_sends
+        }
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from typing import Optional, Dict, Any
+
+class MaintenanceTask:
+    """Periodically prunes expired rows and compacts the database.
+    
+    Only guilds with expired rows are visited. Deletes run in small batches,
+    each in its own short transaction of a bounded number of rows and
+    guilds, with a pause between them so event flushes and command writes
+    are not held up.
+    """
+    
+    def __init__(
+        self,
+        db,
+        interval: float = 3600,
+        analytics_retention_days: int = 90,
+        ticket_retention_days: int = 30,
+        batch_size: int = 1000,
+        batch_pause: float = 0.05
+    ):
+        self.db = db
+        self.interval = interval
+        self.analytics_retention_days = analytics_retention_days
+        self.ticket_retention_days = ticket_retention_days
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        
+        self._task: Optional[asyncio.Task] = None
+        self._closing = asyncio.Event()
+        self.last_report: Optional[Dict[str, Any]] = None
+    
+    def start(self):
+        if self._task is None:
+            self._closing.clear()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        # Let an in-flight batch finish rather than cancelling it mid-query.
+        if self._task is not None:
+            self._closing.set()
+            await self._task
+            self._task = None
+    
+    async def _prune(self, expired_guilds, prune, default_days: int) -> int:
+        retention = await expired_guilds(default_days)
+        removed = 0
+        while retention and not self._closing.is_set():
+            deleted, done = await prune(retention, self.batch_size)
+            removed += deleted
+            retention = retention[done:]
+            if retention:
+                await asyncio.sleep(self.batch_pause)
+        return removed
+    
+    async def run_pass(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        size_before = await self.db.database_size()
+        
+        events_removed = await self._prune(
+            self.db.expired_event_guilds,
+            self.db.prune_events,
+            self.analytics_retention_days
+        )
+        tickets_removed = await self._prune(
+            self.db.expired_ticket_guilds,
+            self.db.prune_tickets,
+            self.ticket_retention_days
+        )
+        await self.db.prune_settings_changes()
+        await self.db.prune_hourly_rollups()
+        await self.db.compact()
+        
+        size_after = await self.db.database_size()
+        self.last_report = {
+            'events_removed': events_removed,
+            'tickets_removed': tickets_removed,
+            'bytes_reclaimed': max(0, size_before - size_after),
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2)
+        }
+        return self.last_report
+    
+    async def _run(self):
+        while not self._closing.is_set():
+            try:
+                report = await self.run_pass()
+                print(
+                    f"✓ Maintenance: removed {report['events_removed']} events, "
+                    f"{report['tickets_removed']} tickets, reclaimed {report['bytes_reclaimed']} bytes "
+                    f"in {report['duration_ms']}ms"
+                )
+            except Exception as e:
+                print(f"✗ Maintenance pass failed: {e}")
+            
+            try:
+                await asyncio.wait_for(self._closing.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
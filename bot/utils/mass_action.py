@@ -0,0 +1,217 @@
+import asyncio
+import re
+import time
+import discord
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Callable, Awaitable, Iterable
+
+from utils.intents import get_or_fetch_member
+
+MASS_ACTIONS = ("ban", "kick")
+
+class TargetSelector:
+    """Picks raid accounts from the guild's members and an ID list.
+    
+    Member criteria are combined with AND; IDs given explicitly are always
+    included. Members the moderator or the bot could not act on (the owner,
+    the moderator, anyone at or above either top role) are never selected.
+    Guilds aren't chunked at startup, so members are loaded before matching
+    and listed IDs missing from the cache are fetched for the role check.
+    """
+    
+    def __init__(
+        self,
+        joined_within: Optional[timedelta] = None,
+        account_younger_than: Optional[timedelta] = None,
+        name_pattern: Optional[str] = None,
+        user_ids: Iterable[int] = ()
+    ):
+        self.joined_within = joined_within
+        self.account_younger_than = account_younger_than
+        self.name_pattern = re.compile(name_pattern, re.IGNORECASE) if name_pattern else None
+        self.user_ids = set(user_ids)
+    
+    @property
+    def has_member_criteria(self) -> bool:
+        return any((self.joined_within, self.account_younger_than, self.name_pattern))
+    
+    def matches(self, member: discord.Member, now: datetime) -> bool:
+        if self.joined_within is not None and (member.joined_at is None or now - member.joined_at > self.joined_within):
+            return False
+        if self.account_younger_than is not None and now - member.created_at > self.account_younger_than:
+            return False
+        if self.name_pattern is not None and not (
+            self.name_pattern.search(member.name) or self.name_pattern.search(member.display_name)
+        ):
+            return False
+        return True
+    
+    async def select(self, guild: discord.Guild, moderator: discord.Member, limit: int) -> List[discord.abc.Snowflake]:
+        if self.has_member_criteria and not guild.chunked:
+            await guild.chunk()
+        
+        now = datetime.now(timezone.utc)
+        protected = {guild.owner_id, moderator.id, guild.me.id}
+        
+        def actionable(member: discord.Member) -> bool:
+            if member.id in protected:
+                return False
+            if member.top_role >= guild.me.top_role:
+                return False
+            return moderator.id == guild.owner_id or member.top_role < moderator.top_role
+        
+        targets = {}
+        if self.has_member_criteria:
+            for member in guild.members:
+                if len(targets) >= limit:
+                    break
+                if self.matches(member, now) and actionable(member):
+                    targets[member.id] = member
+        
+        for user_id in sorted(self.user_ids):
+            if len(targets) >= limit:
+                break
+            if user_id in targets or user_id in protected:
+                continue
+            member = guild.get_member(user_id)
+            if member is None and not guild.chunked:
+                member = await get_or_fetch_member(guild, user_id)
+            if member is None:
+                # Not in the guild, so there is no role to outrank; bans still work by ID
+                targets[user_id] = discord.Object(id=user_id)
+            elif actionable(member):
+                targets[user_id] = member
+        
+        return list(targets.values())
+    
+    def describe(self) -> str:
+        parts = []
+        if self.joined_within is not None:
+            parts.append(f"joined within {self.joined_within}")
+        if self.account_younger_than is not None:
+            parts.append(f"account younger than {self.account_younger_than}")
+        if self.name_pattern is not None:
+            parts.append(f"name ~ {self.name_pattern.pattern!r}")
+        if self.user_ids:
+            parts.append(f"{len(self.user_ids)} listed IDs")
+        return ", ".join(parts) or "none"
+
+class MassActionJob:
+    """Bans or kicks a list of targets with a fixed number of workers.
+    
+    discord.py already waits out per-route rate limits and retries 429s, so
+    the workers only bound how many requests are in flight at once. Audit
+    rows are collected and written in one transaction when the job ends.
+    """
+    
+    def __init__(
+        self,
+        db,
+        guild: discord.Guild,
+        moderator: discord.abc.User,
+        action: str,
+        targets: List[discord.abc.Snowflake],
+        reason: str,
+        concurrency: int = 5,
+        dry_run: bool = False,
+        on_progress: Optional[Callable[["MassActionJob"], Awaitable[None]]] = None
+    ):
+        if action not in MASS_ACTIONS:
+            raise ValueError(f"Unknown action: {action}")
+        
+        self.db = db
+        self.guild = guild
+        self.moderator = moderator
+        self.action = action
+        self.targets = targets
+        self.reason = reason
+        self.concurrency = max(1, concurrency)
+        self.dry_run = dry_run
+        self.on_progress = on_progress
+        
+        self.done_count = 0
+        self.succeeded: List[int] = []
+        self.failed: List[int] = []
+        self.status = "pending"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancelled = asyncio.Event()
+    
+    def cancel(self):
+        self._cancelled.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+    
+    @property
+    def done(self) -> bool:
+        return self.status in ("finished", "cancelled", "dry run")
+    
+    @property
+    def duration(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+    
+    async def run(self):
+        self.started_at = time.monotonic()
+        if self.dry_run:
+            self.status = "dry run"
+            self.finished_at = time.monotonic()
+            await self._report()
+            return
+        
+        self.status = "running"
+        queue: "asyncio.Queue[discord.abc.Snowflake]" = asyncio.Queue()
+        for target in self.targets:
+            queue.put_nowait(target)
+        
+        workers = [
+            asyncio.create_task(self._worker(queue))
+            for _ in range(min(self.concurrency, len(self.targets)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            self.status = "cancelled" if self.cancelled else "finished"
+            self.finished_at = time.monotonic()
+            await self._write_audit()
+        await self._report()
+    
+    async def _worker(self, queue: "asyncio.Queue[discord.abc.Snowflake]"):
+        reason = f"{self.reason} (mass {self.action} by {self.moderator})"
+        while not self.cancelled:
+            try:
+                target = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            
+            try:
+                if self.action == "ban":
+                    await self.guild.ban(target, reason=reason, delete_message_seconds=0)
+                else:
+                    await self.guild.kick(target, reason=reason)
+                self.succeeded.append(target.id)
+            except discord.HTTPException:
+                self.failed.append(target.id)
+            
+            self.done_count += 1
+            await self._report()
+    
+    async def _write_audit(self):
+        if not self.succeeded:
+            return
+        event_type = f"moderation_{self.action}"
+        verb = "banned" if self.action == "ban" else "kicked"
+        await self.db.log_events([
+            (self.guild.id, event_type, f"User {user_id} {verb} by {self.moderator.id} (mass)")
+            for user_id in self.succeeded
+        ])
+    
+    async def _report(self):
+        if self.on_progress is not None:
+            try:
+                await self.on_progress(self)
+            except Exception as e:
+                print(f"✗ Mass {self.action} progress update failed: {e}")
@@ -0,0 +1,189 @@
+import asyncio
+import functools
+import inspect
+import time
+from aiohttp import web
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms in Prometheus text format."""
+
+    def __init__(self):
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]] = []
+    
+    def describe(self, name: str, kind: str, help_text: str):
+        self._help[name] = (kind, help_text)
+    
+    def inc(self, name: str, value: float = 1, **labels):
+        series = self._counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0) + value
+    
+    def set(self, name: str, value: float, **labels):
+        self._gauges.setdefault(name, {})[_labels(labels)] = value
+    
+    def observe(self, name: str, value: float, **labels):
+        series = self._histograms.setdefault(name, {})
+        key = _labels(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+    
+    def histograms(self, name: str) -> Dict[Labels, Histogram]:
+        return self._histograms.get(name, {})
+    
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]):
+        """Register a callable that yields (gauge name, labels, value) at scrape time."""
+        self._collectors.append(collector)
+    
+    def render(self) -> str:
+        gauges = {name: dict(series) for name, series in self._gauges.items()}
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    gauges.setdefault(name, {})[_labels(labels)] = value
+            except Exception as e:
+                print(f"✗ Metrics collector failed: {e}")
+        
+        lines = []
+        for kind, metrics in (("counter", self._counters), ("gauge", gauges)):
+            for name, series in sorted(metrics.items()):
+                lines.extend(self._header(name, kind))
+                for labels, value in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        
+        for name, series in sorted(self._histograms.items()):
+            lines.extend(self._header(name, "histogram"))
+            for labels, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def _header(self, name: str, kind: str) -> List[str]:
+        _, help_text = self._help.get(name, (kind, name))
+        return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+def timed(metrics: MetricsRegistry, prefix: str, func, **labels):
+    """Wrap a coroutine function so every call is counted and timed."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            metrics.inc(f"{prefix}_errors_total", **labels)
+            raise
+        finally:
+            metrics.inc(f"{prefix}_calls_total", **labels)
+            metrics.observe(f"{prefix}_duration_seconds", time.perf_counter() - start, **labels)
+    return wrapper
+
+def instrument_database(db, metrics: MetricsRegistry):
+    for name, method in inspect.getmembers(db, inspect.iscoroutinefunction):
+        if name.startswith('_') or name in ('connect', 'close'):
+            continue
+        setattr(db, name, timed(metrics, "happy_db", method, method=name))
+
+def instrument_app_commands(cog, metrics: MetricsRegistry):
+    # Commands keep the undecorated coroutine in _callback; parameters were
+    # already parsed from it, so swapping in a wrapper leaves them intact.
+    for command in cog.walk_app_commands():
+        callback = getattr(command, '_callback', None)
+        if callback is None or getattr(callback, '__happy_timed__', False):
+            continue
+        wrapper = timed(metrics, "happy_command", callback, command=command.qualified_name)
+        wrapper.__happy_timed__ = True
+        command._callback = wrapper
+
+class LoopLagMonitor:
+    def __init__(self, metrics: MetricsRegistry, interval: float = 0.5):
+        self.metrics = metrics
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.metrics.set("happy_event_loop_lag_seconds", lag)
+            self.metrics.observe("happy_event_loop_lag_sample_seconds", lag)
+
+class MetricsServer:
+    def __init__(self, metrics: MetricsRegistry, host: str = "127.0.0.1", port: int = 9100):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+    
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"✓ Metrics served on http://{self.host}:{self.port}/metrics")
+    
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self.metrics.render(),
+            content_type="text/plain",
+            headers={"X-Content-Type-Options": "nosniff"}
+        )
@@ -0,0 +1,213 @@
+import aiosqlite
+from typing import List, Tuple
+
+# Each migration is (version, description, statements). Versions must be
+# strictly increasing; applied migrations are never edited, only appended.
+MIGRATIONS: List[Tuple[int, str, Tuple[str, ...]]] = [
+    (1, "initial schema", (
+        '''
+        CREATE TABLE IF NOT EXISTS guilds (
+            guild_id INTEGER PRIMARY KEY,
+            name TEXT,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id INTEGER PRIMARY KEY,
+            welcome_enabled INTEGER DEFAULT 0,
+            welcome_channel_id INTEGER,
+            welcome_message TEXT DEFAULT 'Welcome {user} to {guild}!',
+            leave_enabled INTEGER DEFAULT 0,
+            leave_channel_id INTEGER,
+            log_enabled INTEGER DEFAULT 0,
+            log_channel_id INTEGER,
+            ticket_enabled INTEGER DEFAULT 0,
+            ticket_category_id INTEGER,
+            FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS warns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            user_id INTEGER,
+            moderator_id INTEGER,
+            reason TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            channel_id INTEGER,
+            user_id INTEGER,
+            status TEXT DEFAULT 'open',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            closed_at TIMESTAMP,
+            FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS analytics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            event_type TEXT,
+            event_data TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (guild_id) REFERENCES guilds(guild_id)
+        )
+        '''
+    )),
+    (2, "index warns by guild and user", (
+        "CREATE INDEX IF NOT EXISTS idx_warns_guild_user ON warns (guild_id, user_id, id)",
+    )),
+    (3, "index analytics by guild and time", (
+        "CREATE INDEX IF NOT EXISTS idx_analytics_guild_created ON analytics (guild_id, created_at, event_type)",
+    )),
+    (4, "index tickets by guild and status", (
+        "CREATE INDEX IF NOT EXISTS idx_tickets_guild_status ON tickets (guild_id, status)",
+    )),
+    (5, "daily analytics rollups", (
+        '''
+        CREATE TABLE IF NOT EXISTS analytics_daily (
+            guild_id INTEGER NOT NULL,
+            event_type TEXT NOT NULL,
+            day TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, event_type, day)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT OR IGNORE INTO analytics_daily (guild_id, event_type, day, count)
+        SELECT guild_id, event_type, date(created_at), COUNT(*) FROM analytics
+        WHERE guild_id IS NOT NULL AND event_type IS NOT NULL AND created_at IS NOT NULL
+        GROUP BY guild_id, event_type, date(created_at)
+        '''
+    )),
+    (6, "per-guild retention settings", (
+        "ALTER TABLE guild_settings ADD COLUMN analytics_retention_days INTEGER",
+        "ALTER TABLE guild_settings ADD COLUMN ticket_retention_days INTEGER",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_closed ON tickets (status, closed_at)",
+    )),
+    (7, "join burst thresholds", (
+        "ALTER TABLE guild_settings ADD COLUMN raid_join_threshold INTEGER DEFAULT 10",
+        "ALTER TABLE guild_settings ADD COLUMN raid_join_window INTEGER DEFAULT 10",
+    )),
+    (8, "cluster worker status", (
+        '''
+        CREATE TABLE IF NOT EXISTS cluster_status (
+            cluster_id INTEGER PRIMARY KEY,
+            shard_ids TEXT,
+            guild_count INTEGER,
+            latency REAL,
+            started_at TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    )),
+    (9, "bot state key-value store", (
+        '''
+        CREATE TABLE IF NOT EXISTS bot_state (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    )),
+    (10, "settings change log", (
+        '''
+        CREATE TABLE IF NOT EXISTS settings_changes (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    )),
+    (11, "per-member warning counters", (
+        '''
+        CREATE TABLE IF NOT EXISTS warn_counts (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT OR IGNORE INTO warn_counts (guild_id, user_id, count)
+        SELECT guild_id, user_id, COUNT(*) FROM warns
+        WHERE guild_id IS NOT NULL AND user_id IS NOT NULL
+        GROUP BY guild_id, user_id
+        '''
+    )),
+    (12, "auto-moderation settings", (
+        "ALTER TABLE guild_settings ADD COLUMN automod_enabled INTEGER DEFAULT 0",
+        "ALTER TABLE guild_settings ADD COLUMN automod_words TEXT",
+        "ALTER TABLE guild_settings ADD COLUMN automod_flood_limit INTEGER DEFAULT 6",
+        "ALTER TABLE guild_settings ADD COLUMN automod_mention_limit INTEGER DEFAULT 8",
+        "ALTER TABLE guild_settings ADD COLUMN automod_timeout_minutes INTEGER DEFAULT 10",
+    )),
+    (13, "leave message template", (
+        "ALTER TABLE guild_settings ADD COLUMN leave_message TEXT DEFAULT '{user} has left the server'",
+    )),
+    (14, "hourly analytics rollups", (
+        '''
+        CREATE TABLE IF NOT EXISTS analytics_hourly (
+            guild_id INTEGER NOT NULL,
+            event_type TEXT NOT NULL,
+            hour TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, hour, event_type)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT OR IGNORE INTO analytics_hourly (guild_id, event_type, hour, count)
+        SELECT guild_id, event_type, strftime('%Y-%m-%d %H:00:00', created_at), COUNT(*) FROM analytics
+        WHERE guild_id IS NOT NULL AND event_type IS NOT NULL AND created_at >= datetime('now', '-7 days')
+        GROUP BY guild_id, event_type, strftime('%Y-%m-%d %H:00:00', created_at)
+        '''
+    )),
+]
+
+async def get_schema_version(conn: aiosqlite.Connection) -> int:
+    async with conn.execute("PRAGMA user_version") as cursor:
+        row = await cursor.fetchone()
+    return row[0]
+
+async def run_migrations(conn: aiosqlite.Connection) -> List[int]:
+    """Apply every migration newer than the database's user_version.
+    
+    Each migration runs in its own transaction together with the version
+    bump, so an interrupted upgrade resumes from the last completed step.
+    Cluster workers start together against one file, so each step takes
+    the write lock first and re-reads the version under it; a step another
+    worker applied in the meantime is skipped.
+    """
+    current = await get_schema_version(conn)
+    applied = []
+    
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+            current = await get_schema_version(conn)
+            if version <= current:
+                await conn.commit()
+                continue
+            
+            for statement in statements:
+                await conn.execute(statement)
+            await conn.execute(f"PRAGMA user_version = {version}")
+            await conn.commit()
+        except Exception as e:
+            await conn.rollback()
+            raise RuntimeError(f"Migration {version} ({description}) failed: {e}") from e
+        
+        print(f"✓ Applied migration {version}: {description}")
+        applied.append(version)
+    
+    return applied
@@ -0,0 +1,90 @@
+import aiosqlite
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+# auto_vacuum only takes effect on a new database; older files keep their
+# mode and only get WAL checkpoints from the maintenance task.
+# busy_timeout comes first so that switching a new file to WAL waits for
+# other processes opening it at the same time instead of failing.
+WRITER_PRAGMAS = (
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA auto_vacuum = INCREMENTAL",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000"
+)
+
+READER_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -4000"
+)
+
+class ConnectionPool:
+    """One writer connection plus a small pool of read-only connections.
+    
+    With the database in WAL mode readers never wait for the writer, so
+    queries run concurrently with batched inserts. All writes go through
+    transaction(), which serialises them on the single writer.
+    """
+    
+    def __init__(self, db_path: str, readers: int = 4):
+        self.db_path = db_path
+        self.reader_count = max(1, readers)
+        
+        self.writer: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+        self._write_lock = asyncio.Lock()
+    
+    async def open(self):
+        self.writer = await aiosqlite.connect(self.db_path)
+        self.writer.row_factory = aiosqlite.Row
+        for pragma in WRITER_PRAGMAS:
+            await self.writer.execute(pragma)
+    
+    async def open_readers(self):
+        # Readers are opened after the schema exists, since a read-only
+        # connection cannot create the database file.
+        for _ in range(self.reader_count):
+            conn = await aiosqlite.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            conn.row_factory = aiosqlite.Row
+            for pragma in READER_PRAGMAS:
+                await conn.execute(pragma)
+            self._readers.append(conn)
+            self._idle.put_nowait(conn)
+    
+    async def close(self):
+        for conn in self._readers:
+            await conn.close()
+        self._readers.clear()
+        self._idle = asyncio.Queue()
+        
+        if self.writer is not None:
+            await self.writer.close()
+            self.writer = None
+    
+    @asynccontextmanager
+    async def reader(self):
+        if not self._readers:
+            yield self.writer
+            return
+        
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+    
+    @asynccontextmanager
+    async def transaction(self):
+        async with self._write_lock:
+            try:
+                yield self.writer
+            except Exception:
+                await self.writer.rollback()
+                raise
+            await self.writer.commit()
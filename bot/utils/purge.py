@@ -0,0 +1,192 @@
+import asyncio
+import re
+import time
+import discord
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Callable, Awaitable
+
+# Discord only bulk-deletes messages younger than 14 days; the minute of
+# slack keeps a message from ageing out between the check and the request.
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=1)
+BULK_DELETE_SIZE = 100
+
+class PurgeFilter:
+    """Decides which messages a purge job deletes."""
+    
+    def __init__(
+        self,
+        author_id: Optional[int] = None,
+        pattern: Optional[str] = None,
+        attachments_only: bool = False,
+        after: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        include_pinned: bool = True
+    ):
+        self.author_id = author_id
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.attachments_only = attachments_only
+        self.after = after
+        self.before = before
+        self.include_pinned = include_pinned
+    
+    def matches(self, message: discord.Message) -> bool:
+        if self.author_id is not None and message.author.id != self.author_id:
+            return False
+        if self.attachments_only and not message.attachments:
+            return False
+        if self.pattern is not None and not self.pattern.search(message.content):
+            return False
+        if not self.include_pinned and message.pinned:
+            return False
+        return True
+    
+    def describe(self) -> str:
+        parts = []
+        if self.author_id is not None:
+            parts.append(f"author={self.author_id}")
+        if self.pattern is not None:
+            parts.append(f"pattern={self.pattern.pattern!r}")
+        if self.attachments_only:
+            parts.append("attachments")
+        if self.after is not None:
+            parts.append(f"after={self.after.isoformat()}")
+        if self.before is not None:
+            parts.append(f"before={self.before.isoformat()}")
+        return ", ".join(parts) or "none"
+
+class PurgeJob:
+    """Streams a channel's history and deletes matching messages in the background.
+    
+    History is read newest first, 100 messages per request. Matches younger
+    than 14 days are bulk-deleted 100 at a time; once the stream passes that
+    age the rest are deleted one by one. Progress is reported through
+    on_progress after every chunk, and cancel() stops the job after the
+    chunk in flight.
+    """
+    
+    def __init__(
+        self,
+        channel: discord.abc.Messageable,
+        moderator: discord.abc.User,
+        limit: int,
+        purge_filter: PurgeFilter,
+        scan_limit: Optional[int] = None,
+        on_progress: Optional[Callable[["PurgeJob"], Awaitable[None]]] = None
+    ):
+        self.channel = channel
+        self.moderator = moderator
+        self.limit = limit
+        self.filter = purge_filter
+        self.scan_limit = scan_limit or limit * 10
+        self.on_progress = on_progress
+        
+        self.scanned = 0
+        self.deleted = 0
+        self.failed = 0
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancelled = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> asyncio.Task:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+    
+    def cancel(self):
+        self._cancelled.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+    
+    @property
+    def done(self) -> bool:
+        return self.status in ("finished", "cancelled", "failed")
+    
+    @property
+    def duration(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+    
+    async def run(self):
+        self.status = "running"
+        self.started_at = time.monotonic()
+        batch: List[discord.Message] = []
+        
+        try:
+            async for message in self.channel.history(
+                limit=self.scan_limit,
+                before=self.filter.before,
+                after=self.filter.after,
+                oldest_first=False
+            ):
+                if self.cancelled:
+                    break
+                
+                self.scanned += 1
+                if self.filter.matches(message):
+                    batch.append(message)
+                    if self.deleted + len(batch) >= self.limit:
+                        break
+                if len(batch) >= BULK_DELETE_SIZE:
+                    await self._delete(batch)
+                    batch = []
+            
+            if batch and not self.cancelled:
+                await self._delete(batch)
+            self.status = "cancelled" if self.cancelled else "finished"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = time.monotonic()
+        
+        await self._report()
+    
+    async def _delete(self, messages: List[discord.Message]):
+        cutoff = datetime.now(timezone.utc) - BULK_DELETE_MAX_AGE
+        recent = [m for m in messages if m.created_at > cutoff]
+        old = [m for m in messages if m.created_at <= cutoff]
+        
+        if len(recent) > 1:
+            try:
+                await self.channel.delete_messages(recent)
+                self.deleted += len(recent)
+            except discord.NotFound:
+                # Someone else deleted one of them; retry individually
+                old = recent + old
+            except discord.HTTPException:
+                self.failed += len(recent)
+        else:
+            old = recent + old
+        
+        for message in old:
+            if self.cancelled:
+                break
+            try:
+                await message.delete()
+                self.deleted += 1
+            except discord.NotFound:
+                pass
+            except discord.HTTPException:
+                self.failed += 1
+        
+        await self._report()
+    
+    async def _report(self):
+        if self.on_progress is not None:
+            try:
+                await self.on_progress(self)
+            except Exception as e:
+                print(f"✗ Purge progress update failed: {e}")
+    
+    def summary(self) -> str:
+        return (
+            f"{self.deleted} messages purged in {self.channel.id} by {self.moderator.id} "
+            f"(scanned {self.scanned}, failed {self.failed}, filters: {self.filter.describe()}, {self.status})"
+        )
+
@@ -0,0 +1,63 @@
+import asyncio
+import time
+from typing import Optional, Dict, Any
+
+class SettingsWatcher:
+    """Follows the settings_changes log and refreshes changed guilds.
+    
+    The dashboard API and every cluster worker append a row per changed
+    guild in the same transaction as the update. Polling `version > last`
+    is a primary-key range scan, so a short interval costs next to nothing.
+    """
+    
+    def __init__(self, db, interval: float = 1.0):
+        self.db = db
+        self.interval = interval
+        
+        self.version = 0
+        self.refreshed = 0
+        self.last_refresh: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = asyncio.Event()
+    
+    async def start(self):
+        if self._task is None:
+            self.version = await self.db.get_settings_version()
+            self._closing.clear()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._closing.set()
+            await self._task
+            self._task = None
+    
+    async def poll(self) -> int:
+        version, guild_ids = await self.db.get_settings_changes(self.version)
+        self.version = version
+        if not guild_ids:
+            return 0
+        
+        refreshed = await self.db.refresh_guild_settings(guild_ids)
+        self.refreshed += refreshed
+        self.last_refresh = time.time()
+        return refreshed
+    
+    async def _run(self):
+        while not self._closing.is_set():
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"✗ Settings poll failed: {e}")
+            
+            try:
+                await asyncio.wait_for(self._closing.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'refreshed': self.refreshed,
+            'last_refresh': self.last_refresh
+        }
@@ -0,0 +1,57 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+class StartupTracer:
+    """Records how long each cold-start phase takes.
+
+    Times are in milliseconds relative to `origin`, normally the moment
+    main.py started importing. Phases may overlap when they run concurrently.
+    """
+
+    def __init__(self, origin: Optional[float] = None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases: List[Dict[str, Any]] = []
+        self.written = False
+    
+    def record(self, name: str, start: float, end: float, **extra):
+        self.phases.append({
+            'phase': name,
+            'start_ms': round((start - self.origin) * 1000, 2),
+            'duration_ms': round((end - start) * 1000, 2),
+            **extra
+        })
+    
+    @contextmanager
+    def phase(self, name: str, **extra):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(name, start, time.perf_counter(), failed=True, **extra)
+            raise
+        self.record(name, start, time.perf_counter(), **extra)
+    
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.record(name, now, now)
+    
+    def report(self) -> Dict[str, Any]:
+        end = max((p['start_ms'] + p['duration_ms'] for p in self.phases), default=0.0)
+        return {
+            'total_ms': round(end, 2),
+            'phases': sorted(self.phases, key=lambda p: p['start_ms'])
+        }
+    
+    def write(self, path: Optional[str] = None):
+        report = self.report()
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+        
+        for phase in report['phases']:
+            print(f"⏱ {phase['phase']}: {phase['duration_ms']}ms (at {phase['start_ms']}ms)")
+        print(f"⏱ Startup took {report['total_ms']}ms")
+        self.written = True
+        return report
@@ -1,24 +1,385 @@
 # api/auth.py
 from fastapi import APIRouter, HTTPException, Request, Query
 from fastapi.responses import RedirectResponse
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import aiosqlite
+import asyncio
 import httpx
+import importlib.util
+import json
 import os
+import time
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Optional, Dict, Any
 import urllib.parse
 
 load_dotenv()
 
-router = APIRouter()
-
 # Discord OAuth2 credentials
 DISCORD_CLIENT_ID = os.getenv("DISCORD_CLIENT_ID", "1460690691834249257")
 DISCORD_CLIENT_SECRET = os.getenv("DISCORD_CLIENT_SECRET")
 DISCORD_REDIRECT_URI = os.getenv("DISCORD_REDIRECT_URI", "https://api-happy-production.up.railway.app/api/auth/callback")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "https://happy-manifest.vercel.app")
 
-# In-memory token storage (use database in production)
-user_tokens = {}
+# Session storage
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "data/sessions.db")
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "5000"))
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "60"))
+
+# Shared Discord HTTP client
+DISCORD_API_BASE = os.getenv("DISCORD_API_BASE", "https://discord.com/api")
+DISCORD_HTTP_RETRIES = int(os.getenv("DISCORD_HTTP_RETRIES", "3"))
+
+# Guild list cache
+BOT_DATABASE_PATH = os.getenv("DATABASE_PATH", "data/nooby.db")
+GUILD_CACHE_TTL = float(os.getenv("GUILD_CACHE_TTL", "60"))
+GUILD_CACHE_MAX_STALE = float(os.getenv("GUILD_CACHE_MAX_STALE", "3600"))
+BOT_GUILDS_TTL = float(os.getenv("BOT_GUILDS_TTL", "30"))
+
+MANAGE_GUILD = 0x20
+ADMINISTRATOR = 0x8
+
+# httpx only negotiates HTTP/2 when the h2 package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+class DiscordHTTP:
+    """One pooled keep-alive client for every call to Discord.
+    
+    Rate limits are tracked per route (method, path and token). A route whose
+    bucket is exhausted waits for its reset before the next request, and a
+    429 is retried after the delay Discord asks for. A route's state is
+    dropped once it has no requests in flight and its reset has passed, so
+    the tables only hold routes that are in use or still limited.
+    """
+    
+    def __init__(self, base_url: str = DISCORD_API_BASE, retries: int = 3):
+        self.base_url = base_url.rstrip('/')
+        self.retries = retries
+        
+        self._client: Optional[httpx.AsyncClient] = None
+        self._reset_at: Dict[str, float] = {}
+        self._route_locks: Dict[str, asyncio.Lock] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._next_sweep = 0.0
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+            )
+        return self._client
+    
+    def _url(self, url: str) -> str:
+        # Accept both full discord.com URLs and paths relative to the API base
+        if url.startswith("https://discord.com/api"):
+            url = url[len("https://discord.com/api"):]
+        return url if url.startswith("http") else f"{self.base_url}{url}"
+    
+    def _route(self, method: str, url: str, headers: Optional[Dict[str, str]]) -> str:
+        path = urllib.parse.urlsplit(url).path
+        auth = (headers or {}).get('Authorization', '')
+        return f"{method} {path} {hash(auth)}"
+    
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        url = self._url(url)
+        route = self._route(method, url, kwargs.get('headers'))
+        if route not in self._route_locks:
+            self._sweep()
+        lock = self._route_locks.setdefault(route, asyncio.Lock())
+        self._in_flight[route] = self._in_flight.get(route, 0) + 1
+        
+        try:
+            for attempt in range(self.retries + 1):
+                async with lock:
+                    delay = self._reset_at.get(route, 0) - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                
+                response = await self._get_client().request(method, url, **kwargs)
+                self._update_limits(route, response)
+                
+                if response.status_code != 429 or attempt == self.retries:
+                    return response
+                
+                retry_after = self._retry_after(response)
+                print(f"⚠️ Discord rate limited {method} {url}, retrying in {retry_after:.2f}s")
+                await asyncio.sleep(retry_after)
+            
+            return response
+        finally:
+            self._in_flight[route] -= 1
+            if not self._in_flight[route]:
+                del self._in_flight[route]
+                if route not in self._reset_at:
+                    del self._route_locks[route]
+    
+    def _sweep(self):
+        # Idle routes still waiting on a reset outlive their last request;
+        # drop them once the reset has passed. Runs at most once a second.
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + 1.0
+        
+        for route, reset_at in list(self._reset_at.items()):
+            if reset_at <= now and route not in self._in_flight:
+                del self._reset_at[route]
+                self._route_locks.pop(route, None)
+    
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+    
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+    
+    def _update_limits(self, route: str, response: httpx.Response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset_after = response.headers.get('X-RateLimit-Reset-After')
+        if remaining == '0' and reset_after:
+            self._reset_at[route] = time.monotonic() + float(reset_after)
+        elif route in self._reset_at and self._reset_at[route] <= time.monotonic():
+            del self._reset_at[route]
+    
+    def _retry_after(self, response: httpx.Response) -> float:
+        try:
+            return float(response.json().get('retry_after'))
+        except (ValueError, TypeError, AttributeError):
+            pass
+        for header in ('Retry-After', 'X-RateLimit-Reset-After'):
+            if response.headers.get(header):
+                return float(response.headers[header])
+        return 1.0
+    
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+discord_http = DiscordHTTP(retries=DISCORD_HTTP_RETRIES)
+
+class SessionStore:
+    """Sessions persisted in SQLite with a bounded in-memory LRU in front.
+    
+    SQLite is the source of truth, so sessions survive restarts and are
+    shared by every API worker. Cached entries are re-read after
+    SESSION_CACHE_TTL seconds so a logout in one worker reaches the others.
+    Expired sessions are evicted on access and purged periodically.
+    """
+    
+    def __init__(self, db_path: str, cache_size: int = 5000, cache_ttl: float = 60):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+        self._last_purge = 0.0
+    
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            async with self._lock:
+                if self._conn is None:
+                    directory = os.path.dirname(self.db_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    conn = await aiosqlite.connect(self.db_path)
+                    await conn.execute("PRAGMA journal_mode = WAL")
+                    await conn.execute("PRAGMA busy_timeout = 5000")
+                    await conn.execute('''
+                        CREATE TABLE IF NOT EXISTS sessions (
+                            token TEXT PRIMARY KEY,
+                            data TEXT NOT NULL,
+                            expires_at REAL NOT NULL
+                        )
+                    ''')
+                    await conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+                    await conn.commit()
+                    self._conn = conn
+        return self._conn
+    
+    def _remember(self, token: str, session: Dict[str, Any]):
+        self._cache[token] = (session, time.time())
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    async def get(self, token: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        cached = self._cache.get(token)
+        if cached is not None:
+            session, cached_at = cached
+            if session['expires_at'] <= now:
+                await self.delete(token)
+                return None
+            if now - cached_at < self.cache_ttl:
+                self._cache.move_to_end(token)
+                return session
+        
+        conn = await self._connection()
+        async with conn.execute(
+            "SELECT data FROM sessions WHERE token = ? AND expires_at > ?",
+            (token, now)
+        ) as cursor:
+            row = await cursor.fetchone()
+        
+        if row is None:
+            self._cache.pop(token, None)
+            return None
+        
+        session = json.loads(row[0])
+        self._remember(token, session)
+        return session
+    
+    async def set(self, token: str, session: Dict[str, Any]):
+        conn = await self._connection()
+        await conn.execute(
+            "INSERT OR REPLACE INTO sessions (token, data, expires_at) VALUES (?, ?, ?)",
+            (token, json.dumps(session), session['expires_at'])
+        )
+        await conn.commit()
+        self._remember(token, session)
+        
+        if time.time() - self._last_purge > 300:
+            await self.purge_expired()
+    
+    async def delete(self, token: str):
+        self._cache.pop(token, None)
+        conn = await self._connection()
+        await conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+        await conn.commit()
+    
+    async def purge_expired(self) -> int:
+        now = time.time()
+        self._last_purge = now
+        for token in [t for t, (session, _) in self._cache.items() if session['expires_at'] <= now]:
+            del self._cache[token]
+        
+        conn = await self._connection()
+        cursor = await conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        await conn.commit()
+        return cursor.rowcount
+    
+    async def close(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+        self._cache.clear()
+
+sessions = SessionStore(SESSION_DB_PATH, SESSION_CACHE_SIZE, SESSION_CACHE_TTL)
+
+class BotGuildSet:
+    """The set of guild ids the bot is in, read from the bot's `guilds` table.
+    
+    The ids are held in memory and re-read at most every BOT_GUILDS_TTL
+    seconds. If the bot database can't be read the last known set is kept.
+    """
+    
+    def __init__(self, db_path: str, ttl: float = 30):
+        self.db_path = db_path
+        self.ttl = ttl
+        
+        self._ids: frozenset = frozenset()
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def get(self) -> frozenset:
+        if time.time() - self._loaded_at < self.ttl:
+            return self._ids
+        
+        async with self._lock:
+            if time.time() - self._loaded_at >= self.ttl:
+                try:
+                    uri = f"file:{urllib.parse.quote(os.path.abspath(self.db_path))}?mode=ro"
+                    async with aiosqlite.connect(uri, uri=True) as conn:
+                        async with conn.execute("SELECT guild_id FROM guilds") as cursor:
+                            self._ids = frozenset(str(row[0]) for row in await cursor.fetchall())
+                except Exception as e:
+                    print(f"⚠️ Could not read bot guilds: {e}")
+                self._loaded_at = time.time()
+        return self._ids
+
+bot_guilds = BotGuildSet(BOT_DATABASE_PATH, BOT_GUILDS_TTL)
+
+def manageable_guilds(guilds: list) -> list:
+    """Keep the guilds the user can manage, trimmed to what the dashboard uses."""
+    result = []
+    for guild in guilds:
+        permissions = int(guild.get('permissions') or 0)
+        if not (permissions & (MANAGE_GUILD | ADMINISTRATOR) or guild.get('owner') is True):
+            continue
+        result.append({
+            'id': guild['id'],
+            'name': guild.get('name'),
+            'icon': guild.get('icon'),
+            'icon_url': f"https://cdn.discordapp.com/icons/{guild['id']}/{guild['icon']}.png?size=256" if guild.get('icon') else None,
+            'owner': guild.get('owner', False),
+            'permissions': guild.get('permissions', '0'),
+            'can_manage': True
+        })
+    return result
+
+async def fetch_guilds(access_token: str) -> Optional[list]:
+    response = await discord_http.get(
+        "https://discord.com/api/users/@me/guilds",
+        headers={'Authorization': f'Bearer {access_token}'}
+    )
+    if response.status_code != 200:
+        print(f"⚠️ Guild fetch failed: {response.status_code}")
+        return None
+    return manageable_guilds(response.json())
+
+_guild_refreshes: Dict[str, asyncio.Task] = {}
+
+async def refresh_guilds(token: str, session: Dict[str, Any]) -> bool:
+    try:
+        guilds = await fetch_guilds(session['access_token'])
+    except Exception as e:
+        print(f"⚠️ Guild fetch error: {e}")
+        return False
+    if guilds is None:
+        return False
+    
+    session['guilds'] = guilds
+    session['guilds_fetched_at'] = time.time()
+    await sessions.set(token, session)
+    return True
+
+def schedule_guild_refresh(token: str, session: Dict[str, Any]):
+    task = _guild_refreshes.get(token)
+    if task is not None and not task.done():
+        return
+    task = asyncio.create_task(refresh_guilds(token, session))
+    _guild_refreshes[token] = task
+    task.add_done_callback(lambda _: _guild_refreshes.pop(token, None))
+
+@asynccontextmanager
+async def lifespan(app):
+    discord_http._get_client()
+    yield
+    for task in list(_guild_refreshes.values()):
+        task.cancel()
+    await discord_http.close()
+    await sessions.close()
+
+router = APIRouter(lifespan=lifespan)
+
+async def require_session(request: Request) -> tuple:
+    auth_header = request.headers.get("Authorization")
+    
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid authorization token")
+    
+    token = auth_header[7:]  # Remove "Bearer "
+    session = await sessions.get(token)
+    
+    if session is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    
+    return token, session
 
 @router.get("/login")
 async def login():
@@ -66,84 +427,80 @@ async def callback(
         print("🔄 Exchanging code for access token...")
         
         # Exchange code for access token
-        async with httpx.AsyncClient() as client:
-            token_data = {
-                'client_id': DISCORD_CLIENT_ID,
-                'client_secret': DISCORD_CLIENT_SECRET,
-                'grant_type': 'authorization_code',
-                'code': code,
-                'redirect_uri': DISCORD_REDIRECT_URI,
-                'scope': 'identify guilds'
-            }
-            
-            token_response = await client.post(
-                "https://discord.com/api/oauth2/token",
-                data=token_data,
-                headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        token_data = {
+            'client_id': DISCORD_CLIENT_ID,
+            'client_secret': DISCORD_CLIENT_SECRET,
+            'grant_type': 'authorization_code',
+            'code': code,
+            'redirect_uri': DISCORD_REDIRECT_URI,
+            'scope': 'identify guilds'
+        }
+        
+        token_response = await discord_http.post(
+            "https://discord.com/api/oauth2/token",
+            data=token_data,
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
+        
+        print(f"📥 Token response status: {token_response.status_code}")
+        
+        if token_response.status_code != 200:
+            error_text = token_response.text[:200]
+            print(f"❌ Token error: {error_text}")
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Discord token error: {error_text}"
             )
-            
-            print(f"📥 Token response status: {token_response.status_code}")
-            
-            if token_response.status_code != 200:
-                error_text = token_response.text[:200]
-                print(f"❌ Token error: {error_text}")
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Discord token error: {error_text}"
-                )
-            
-            tokens = token_response.json()
-            access_token = tokens['access_token']
-            
-            print(f"✅ Access token received")
-            
-            # Get user info
-            user_response = await client.get(
-                "https://discord.com/api/users/@me",
-                headers={'Authorization': f'Bearer {access_token}'}
+        
+        tokens = token_response.json()
+        access_token = tokens['access_token']
+        
+        print(f"✅ Access token received")
+        
+        # Get user info
+        user_response = await discord_http.get(
+            "https://discord.com/api/users/@me",
+            headers={'Authorization': f'Bearer {access_token}'}
+        )
+        
+        if user_response.status_code != 200:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Failed to get user info: {user_response.text}"
             )
-            
-            if user_response.status_code != 200:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Failed to get user info: {user_response.text}"
-                )
-            
-            user_data = user_response.json()
-            print(f"✅ User authenticated: {user_data['username']}#{user_data.get('discriminator', '0')}")
-            
-            # Generate session token
-            import uuid
-            import time
-            session_token = str(uuid.uuid4())
-            
-            # Store user data
-            user_tokens[session_token] = {
-                'user': user_data,
-                'access_token': access_token,
-                'expires_at': time.time() + tokens.get('expires_in', 604800)
-            }
-            
-            # Get guilds (optional, can be fetched later)
-            try:
-                guilds_response = await client.get(
-                    "https://discord.com/api/users/@me/guilds",
-                    headers={'Authorization': f'Bearer {access_token}'}
-                )
-                
-                if guilds_response.status_code == 200:
-                    guilds = guilds_response.json()
-                    print(f"✅ Fetched {len(guilds)} guilds")
-                    user_tokens[session_token]['guilds'] = guilds
-            except Exception as guild_error:
-                print(f"⚠️ Guild fetch error: {guild_error}")
-            
-            # Redirect to frontend dashboard with token
-            redirect_url = f"{FRONTEND_URL}/dashboard?token={session_token}"
-            print(f"🔗 Redirecting to: {redirect_url}")
-            
-            return RedirectResponse(url=redirect_url)
-            
+        
+        user_data = user_response.json()
+        print(f"✅ User authenticated: {user_data['username']}#{user_data.get('discriminator', '0')}")
+        
+        # Generate session token
+        import uuid
+        session_token = str(uuid.uuid4())
+        
+        # Store user data
+        session = {
+            'user': user_data,
+            'access_token': access_token,
+            'expires_at': time.time() + tokens.get('expires_in', 604800)
+        }
+        
+        # Get guilds (optional, can be fetched later)
+        try:
+            guilds = await fetch_guilds(access_token)
+            if guilds is not None:
+                print(f"✅ Fetched {len(guilds)} manageable guilds")
+                session['guilds'] = guilds
+                session['guilds_fetched_at'] = time.time()
+        except Exception as guild_error:
+            print(f"⚠️ Guild fetch error: {guild_error}")
+        
+        await sessions.set(session_token, session)
+        
+        # Redirect to frontend dashboard with token
+        redirect_url = f"{FRONTEND_URL}/dashboard?token={session_token}"
+        print(f"🔗 Redirecting to: {redirect_url}")
+        
+        return RedirectResponse(url=redirect_url)
+    
     except Exception as e:
         print(f"❌ Auth error: {str(e)}")
         
@@ -155,48 +512,32 @@ async def callback(
 @router.get("/me")
 async def get_current_user(request: Request):
     """Get current authenticated user"""
-    auth_header = request.headers.get("Authorization")
-    
-    if not auth_header or not auth_header.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid authorization token")
-    
-    token = auth_header[7:]  # Remove "Bearer "
-    
-    if token not in user_tokens:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    
-    return user_tokens[token]['user']
+    _, session = await require_session(request)
+    return session['user']
+
+@router.post("/logout")
+async def logout(request: Request):
+    """End the current session"""
+    token, _ = await require_session(request)
+    await sessions.delete(token)
+    return {"success": True}
 
 @router.get("/guilds")
 async def get_user_guilds(request: Request):
-    """Get user's Discord guilds"""
-    auth_header = request.headers.get("Authorization")
+    """Get the guilds the user can manage and the bot is in
     
-    if not auth_header or not auth_header.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing or invalid authorization token")
+    The list is cached in the session. Within GUILD_CACHE_TTL it is served
+    as is; after that it is still served (up to GUILD_CACHE_MAX_STALE) while
+    a background task fetches a fresh copy from Discord.
+    """
+    token, session = await require_session(request)
     
-    token = auth_header[7:]
+    age = time.time() - session.get('guilds_fetched_at', 0)
+    if 'guilds' not in session or age > GUILD_CACHE_MAX_STALE:
+        if not await refresh_guilds(token, session) and 'guilds' not in session:
+            return []
+    elif age > GUILD_CACHE_TTL:
+        schedule_guild_refresh(token, session)
     
-    if token not in user_tokens:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    
-    # Return cached guilds or fetch fresh
-    if 'guilds' in user_tokens[token]:
-        return user_tokens[token]['guilds']
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://discord.com/api/users/@me/guilds",
-                headers={'Authorization': f'Bearer {user_tokens[token]["access_token"]}'}
-            )
-            
-            if response.status_code == 200:
-                guilds = response.json()
-                user_tokens[token]['guilds'] = guilds
-                return guilds
-            else:
-                return []
-                
-    except Exception:
-        return []
+    bot_guild_ids = await bot_guilds.get()
+    return [guild for guild in session['guilds'] if guild.get('can_manage') and guild['id'] in bot_guild_ids]
@@ -0,0 +1,279 @@
+# api/config.py
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from contextlib import asynccontextmanager
+import aiosqlite
+import asyncio
+import hashlib
+import json
+import os
+from dotenv import load_dotenv
+from typing import Optional, Dict, Any, Tuple
+
+from .auth import require_session
+
+load_dotenv()
+
+# Guild settings live in the bot's database
+BOT_DATABASE_PATH = os.getenv("DATABASE_PATH", "data/nooby.db")
+CONFIG_WRITE_DELAY = float(os.getenv("CONFIG_WRITE_DELAY", "0.25"))
+
+# Dashboard toggle names for guild_settings columns
+CONFIG_ALIASES = {
+    'welcome': 'welcome_enabled',
+    'moderation': 'log_enabled',
+    'music': 'ticket_enabled'
+}
+
+class ConfigStore:
+    """Reads and writes the bot's guild_settings table for the dashboard.
+    
+    Columns are read from the table itself, so the API follows the bot's
+    migrations without a copy of the schema. Updates are held for
+    CONFIG_WRITE_DELAY seconds; updates to the same guild in that window are
+    merged, and everything pending is written in one transaction.
+    """
+    
+    def __init__(self, db_path: str, write_delay: float = 0.25):
+        self.db_path = db_path
+        self.write_delay = write_delay
+        
+        self.columns: Dict[str, str] = {}
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+        self._pending: Dict[int, Tuple[Dict[str, Any], asyncio.Future]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            async with self._lock:
+                if self._conn is None:
+                    conn = await aiosqlite.connect(self.db_path)
+                    conn.row_factory = aiosqlite.Row
+                    await conn.execute("PRAGMA journal_mode = WAL")
+                    await conn.execute("PRAGMA busy_timeout = 5000")
+                    async with conn.execute("PRAGMA table_info(guild_settings)") as cursor:
+                        self.columns = {
+                            row['name']: row['type'].upper()
+                            async for row in cursor
+                            if row['name'] != 'guild_id'
+                        }
+                    if not self.columns:
+                        await conn.close()
+                        raise RuntimeError(f"guild_settings table not found in {self.db_path}")
+                    self._conn = conn
+        return self._conn
+    
+    def _serialize(self, guild_id: int, row: Optional[aiosqlite.Row]) -> Dict[str, Any]:
+        config = {'guild_id': str(guild_id)}
+        for column in self.columns:
+            value = row[column] if row is not None else None
+            # Snowflakes don't fit in a JavaScript number
+            if column.endswith('_id') and value is not None:
+                value = str(value)
+            config[column] = value
+        return config
+    
+    @staticmethod
+    def etag(config: Dict[str, Any]) -> str:
+        digest = hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()
+        return f'"{digest[:20]}"'
+    
+    def normalize(self, changes: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Map dashboard aliases to columns and coerce values to column types.
+        
+        Returns the usable settings and, keyed by the name the client sent,
+        the reason each rejected one was dropped.
+        """
+        settings = {}
+        rejected = {}
+        for key, value in changes.items():
+            column = CONFIG_ALIASES.get(key, key)
+            if column not in self.columns:
+                rejected[key] = "Unknown setting"
+                continue
+            
+            if value is None:
+                settings[column] = None
+            elif self.columns[column] == 'INTEGER':
+                if isinstance(value, bool):
+                    value = int(value)
+                elif isinstance(value, str) and value.isdigit():
+                    value = int(value)
+                if not isinstance(value, int):
+                    rejected[key] = "Must be an integer"
+                    continue
+                settings[column] = value
+            else:
+                if not isinstance(value, str):
+                    rejected[key] = "Must be a string"
+                    continue
+                settings[column] = value
+        return settings, rejected
+    
+    async def get(self, guild_id: int) -> Dict[str, Any]:
+        conn = await self._connection()
+        # Shares the connection with flush(), so wait out any open transaction
+        async with self._lock:
+            async with conn.execute(
+                "SELECT * FROM guild_settings WHERE guild_id = ?",
+                (guild_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+        return self._serialize(guild_id, row)
+    
+    async def update(self, guild_id: int, changes: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Queue a partial update and wait for it to be written.
+        
+        Invalid settings are dropped rather than failing the batch they would
+        be merged into; raises ValueError only when nothing usable is left.
+        """
+        await self._connection()
+        settings, rejected = self.normalize(changes)
+        if rejected and not settings:
+            raise ValueError("; ".join(f"{key}: {reason}" for key, reason in rejected.items()))
+        
+        if guild_id in self._pending:
+            pending, future = self._pending[guild_id]
+            pending.update(settings)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[guild_id] = (dict(settings), future)
+        
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await asyncio.shield(future), rejected
+    
+    async def _flush_later(self):
+        # Updates queued while a flush is writing are picked up by the next round
+        while self._pending:
+            await asyncio.sleep(self.write_delay)
+            await self.flush()
+    
+    async def flush(self):
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        
+        conn = await self._connection()
+        results: Dict[int, Dict[str, Any]] = {}
+        try:
+            async with self._lock:
+                await conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for guild_id, (settings, _) in batch.items():
+                        await self._write(conn, guild_id, settings)
+                        async with conn.execute(
+                            "SELECT * FROM guild_settings WHERE guild_id = ?",
+                            (guild_id,)
+                        ) as cursor:
+                            results[guild_id] = self._serialize(guild_id, await cursor.fetchone())
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+        except Exception as e:
+            print(f"❌ Config write failed for {len(batch)} guilds: {e}")
+            for _, future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        print(f"✅ Wrote config for {len(batch)} guilds")
+        for guild_id, (_, future) in batch.items():
+            if not future.done():
+                future.set_result(results[guild_id])
+    
+    async def _write(self, conn: aiosqlite.Connection, guild_id: int, settings: Dict[str, Any]):
+        await conn.execute(
+            "INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)",
+            (guild_id,)
+        )
+        if settings:
+            assignments = ", ".join(f"{column} = ?" for column in settings)
+            await conn.execute(
+                f"UPDATE guild_settings SET {assignments} WHERE guild_id = ?",
+                (*settings.values(), guild_id)
+            )
+        # Picked up by the bot's SettingsWatcher, which refreshes its cache
+        await conn.execute(
+            "INSERT INTO settings_changes (guild_id) VALUES (?)",
+            (guild_id,)
+        )
+    
+    async def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self.flush()
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+configs = ConfigStore(BOT_DATABASE_PATH, CONFIG_WRITE_DELAY)
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await configs.close()
+
+router = APIRouter(lifespan=lifespan)
+
+async def require_manager(request: Request, guild_id: int):
+    _, session = await require_session(request)
+    
+    guild_ids = {guild['id'] for guild in session.get('guilds', []) if guild.get('can_manage')}
+    if str(guild_id) not in guild_ids:
+        raise HTTPException(status_code=403, detail="You can't manage this server")
+
+def config_response(config: Dict[str, Any], rejected: Optional[Dict[str, str]] = None) -> JSONResponse:
+    content = config
+    if rejected:
+        content = {**config, 'rejected': rejected}
+    return JSONResponse(
+        content=content,
+        headers={
+            'ETag': ConfigStore.etag(config),
+            'Cache-Control': 'private, no-cache',
+            'Vary': 'Authorization'
+        }
+    )
+
+@router.get("/{guild_id}")
+async def get_config(guild_id: int, request: Request):
+    """Get a guild's settings
+    
+    Responds 304 when If-None-Match carries the current ETag.
+    """
+    await require_manager(request, guild_id)
+    config = await configs.get(guild_id)
+    
+    etag = ConfigStore.etag(config)
+    if_none_match = request.headers.get("If-None-Match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={'ETag': etag, 'Vary': 'Authorization'})
+    
+    return config_response(config)
+
+@router.post("/{guild_id}")
+async def update_config(guild_id: int, request: Request):
+    """Apply a partial update to a guild's settings
+    
+    The body is an object of settings to change; dashboard toggle names
+    (welcome, moderation, music) are accepted alongside column names.
+    Unknown or mistyped settings are skipped and listed under "rejected".
+    """
+    await require_manager(request, guild_id)
+    
+    try:
+        changes = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON")
+    if not isinstance(changes, dict):
+        raise HTTPException(status_code=400, detail="Body must be a JSON object")
+    
+    try:
+        config, rejected = await configs.update(guild_id, changes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return config_response(config, rejected)
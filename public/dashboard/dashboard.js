@@ -678,34 +678,68 @@ function logout() {
 }
 
 // Toggle switch handler
+// Changes made in quick succession are sent as one batched update
+const pendingSettings = { guildId: null, changes: {}, toggles: {}, timer: null };
+
+function flushSettings() {
+    const { guildId, changes, toggles } = pendingSettings;
+    const token = window.dashboard?.userToken;
+    
+    pendingSettings.changes = {};
+    pendingSettings.toggles = {};
+    pendingSettings.timer = null;
+    
+    if (!guildId || !token || Object.keys(changes).length === 0) return;
+    
+    console.log(`🔄 Updating ${Object.keys(changes).join(', ')} for guild ${guildId}`);
+    
+    const revert = (settings = Object.keys(toggles)) => {
+        settings.forEach(setting => {
+            toggles[setting].checked = !changes[setting]; // Revert on error
+        });
+    };
+    
+    fetch(`https://api-happy-production.up.railway.app/api/config/${guildId}`, {
+        method: 'POST',
+        headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(changes)
+    }).then(response => {
+        if (!response.ok) {
+            console.error('Failed to update settings');
+            revert();
+            return;
+        }
+        return response.json().then(config => {
+            // The rest of the batch was saved; only undo what the API skipped
+            const rejected = Object.keys(config.rejected || {}).filter(setting => setting in toggles);
+            if (rejected.length > 0) {
+                console.error(`Settings not saved: ${rejected.join(', ')}`);
+                revert(rejected);
+            }
+        });
+    }).catch(() => revert());
+}
+
 document.addEventListener('change', (e) => {
     if (e.target.type === 'checkbox' && e.target.id.includes('Toggle')) {
         const setting = e.target.id.replace('Toggle', '');
-        const value = e.target.checked;
         const guildId = window.dashboard?.currentServer?.id;
-        const token = window.dashboard?.userToken;
         
-        if (guildId && token) {
-            console.log(`🔄 Updating ${setting} to ${value} for guild ${guildId}`);
+        if (guildId && window.dashboard?.userToken) {
+            if (pendingSettings.guildId !== guildId) {
+                clearTimeout(pendingSettings.timer);
+                flushSettings();
+                pendingSettings.guildId = guildId;
+            }
             
-            // Send update to API
-            fetch(`https://api-happy-production.up.railway.app/api/config/${guildId}`, {
-                method: 'POST',
-                headers: {
-                    'Authorization': `Bearer ${token}`,
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    [setting]: value
-                })
-            }).then(response => {
-                if (!response.ok) {
-                    console.error('Failed to update setting');
-                    e.target.checked = !value; // Revert on error
-                }
-            }).catch(() => {
-                e.target.checked = !value;
-            });
+            pendingSettings.changes[setting] = e.target.checked;
+            pendingSettings.toggles[setting] = e.target;
+            
+            clearTimeout(pendingSettings.timer);
+            pendingSettings.timer = setTimeout(flushSettings, 400);
         }
     }
 });